@@ -1,24 +1,503 @@
 # (C) 2025 Bismaya Jyoti Dalei All rights reserved.
 
-from flask import Flask, render_template, request
+import os
+
+# ASYNC_MODE picks how connections are served: 'threading' runs the Werkzeug
+# dev server with an OS thread per websocket, 'gevent' (the production
+# default) or 'eventlet' serve every connection from one event loop. The
+# handlers below run unchanged in all modes. Monkey patching has to happen
+# before anything else imports socket or threading.
+ASYNC_MODE = os.environ.get(
+    'ASYNC_MODE', 'gevent' if os.environ.get('FLASK_ENV') == 'production' else 'threading')
+if ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+elif ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from flask import Flask, Response, render_template, request
 from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from flask_cors import CORS
+import functools
+import itertools
+import logging
+import threading
 import uuid
 import time
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from game_logic import GameManager
+from bot import BOT_NAME, bot_id, is_bot, start_pool, submit_move
+from game_logic import RESUME_GRACE, GameManager, parse_time_control
+from matchmaking import Matchmaker
+from metrics import REGISTRY
+from rate_limit import RateLimiter, TypingTracker
+from rating import INITIAL_RATING, RatingService
+from snapshot import open_room_snapshots
+from storage import open_match_store
+from tournament import TournamentManager
+from wire import BOARD_ENCODINGS, FanoutManager, PacketJSON, RawJSON
 import json
-import os
+
+# Structured, level-gated logging; LOG_LEVEL=DEBUG shows per-event detail
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s %(name)s %(message)s')
+logger = logging.getLogger('tictactoe')
 
 # Flask app configuration
 app = Flask(__name__, static_folder='../frontend', static_url_path='/')
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-fallback-secret-key-here')
 
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Running several workers (see cluster.py): MESSAGE_QUEUE carries broadcasts
+# between them and ROOM_SHARDS points at the processes holding room state
+MESSAGE_QUEUE = os.environ.get('MESSAGE_QUEUE')
+ROOM_SHARDS = os.environ.get('ROOM_SHARDS')
+
+# Packets queued for one client past which typing and lobby updates are
+# skipped, and past which the client is disconnected (0 disables)
+OUTBOUND_SHED_AFTER = int(os.environ.get('OUTBOUND_SHED_AFTER', 64))
+OUTBOUND_DROP_AFTER = int(os.environ.get('OUTBOUND_DROP_AFTER', 1000))
+
+socketio_options = {}
+if MESSAGE_QUEUE and MESSAGE_QUEUE.startswith('unix://'):
+    from cluster import UnixSocketManager
+    socketio_options['client_manager'] = UnixSocketManager(MESSAGE_QUEUE)
+elif MESSAGE_QUEUE:
+    # redis://, amqp://, kafka://... are handled by Flask-SocketIO itself
+    socketio_options['message_queue'] = MESSAGE_QUEUE
+else:
+    # Encode each broadcast once however many clients receive it
+    socketio_options['client_manager'] = FanoutManager()
+if 'client_manager' in socketio_options:
+    socketio_options['client_manager'].shed_after = OUTBOUND_SHED_AFTER
+    socketio_options['client_manager'].drop_after = OUTBOUND_DROP_AFTER
+
+# PacketJSON lets cached game state snapshots go out without re-encoding
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE, json=PacketJSON,
+                    **socketio_options)
 CORS(app)
 
-game_manager = GameManager()
+# Finished matches and player totals, kept across restarts (None when MATCH_DB is off).
+# In a cluster the shards write to it and workers only read.
+match_store = open_match_store()
+
+if ROOM_SHARDS:
+    from cluster import ShardedGameManager
+    game_manager = ShardedGameManager(ROOM_SHARDS.split(','))
+else:
+    game_manager = GameManager(match_store=match_store, ratings=RatingService(match_store))
+
+# Live rooms, written out as they change and loaded back on startup so a
+# restart doesn't end every match (None when ROOM_SNAPSHOT_DB is off). In a
+# cluster each shard snapshots its own rooms.
+room_snapshots = None if ROOM_SHARDS else open_room_snapshots(game_manager)
+if room_snapshots:
+    restore_started = time.perf_counter()
+    restored_rooms = room_snapshots.restore()
+    logger.info('restored %d rooms from %s in %.2fs', restored_rooms, room_snapshots.path,
+                time.perf_counter() - restore_started)
+    socketio.start_background_task(room_snapshots.run_forever, socketio.sleep,
+                                   lambda: socketio.sleep(0))
+
+# Socket.IO room of clients browsing the lobby
+LOBBY_ROOM = 'lobby'
+LOBBY_PAGE_SIZE = 50
+
+def broadcast_lobby_change(change: str, entry: dict):
+    # Push open rooms appearing and disappearing instead of making clients poll
+    socketio.emit('lobby_update', {'type': change, 'room': entry}, room=LOBBY_ROOM)
+
+# Shards publish their own lobby changes through the message queue
+if not ROOM_SHARDS:
+    game_manager.lobby_listeners.append(broadcast_lobby_change)
+
+# Spectators watch from a Socket.IO room of their own, so player-only traffic
+# (typing, spectator chat vs. player chat) stays apart. With
+# SPECTATOR_COALESCE_MS > 0 they get at most one full state per interval
+# instead of every move, so a busy room costs one encode per interval however
+# many are watching. 0 forwards every game event to them live.
+SPECTATOR_COALESCE = float(os.environ.get('SPECTATOR_COALESCE_MS', 250)) / 1000
+spectator_updates = set()  # rooms changed since the last coalesced push
+spectator_updates_lock = threading.Lock()
+
+def spectator_room(room_id: str) -> str:
+    return f'{room_id}:spectators'
+
+def emit_game_event(event: str, data, room_id: str, skip_sid=None):
+    """Send a game update to the room's players and, live or coalesced, its spectators"""
+    if SPECTATOR_COALESCE:
+        socketio.emit(event, data, room=room_id, skip_sid=skip_sid)
+        with spectator_updates_lock:
+            spectator_updates.add(room_id)
+    else:
+        socketio.emit(event, data, room=[room_id, spectator_room(room_id)], skip_sid=skip_sid)
+
+def push_spectator_updates():
+    while True:
+        socketio.sleep(SPECTATOR_COALESCE)
+        with spectator_updates_lock:
+            room_ids = list(spectator_updates)
+            spectator_updates.clear()
+
+        for room_id in room_ids:
+            try:
+                if not game_manager.count_spectators(room_id):
+                    continue
+                state = encoded_game_state(room_id)
+            except Exception:
+                logger.exception('spectator update failed room=%s', room_id)
+                continue
+            if state is not None:
+                socketio.emit('state_sync', state, room=spectator_room(room_id))
+
+if SPECTATOR_COALESCE:
+    socketio.start_background_task(push_spectator_updates)
+
+# How often the reaper looks for rooms idle past their TTL (see game_logic.ROOM_TTLS)
+# or abandoned past the resume grace window. A sweep only touches rooms that
+# are due, so sweeping often is cheap.
+REAPER_INTERVAL = float(os.environ.get('REAPER_INTERVAL', 1))
+ROOMS_EXPIRED = REGISTRY.counter(
+    'game_rooms_expired_total', 'Rooms evicted by the idle reaper', ['reason'])
+
+def reap_idle_rooms():
+    while True:
+        socketio.sleep(REAPER_INTERVAL)
+        try:
+            evicted = game_manager.reap_expired()
+        except Exception:
+            logger.exception('room reaper failed')
+            continue
+
+        for eviction in evicted:
+            room_id = eviction['room_id']
+            ROOMS_EXPIRED.inc(1, eviction['reason'])
+            logger.info('room expired room=%s reason=%s idle=%.0fs',
+                        room_id, eviction['reason'], eviction['idle_seconds'])
+            if eviction['reason'] == 'abandoned':
+                # A disconnected player didn't come back in time
+                socketio.emit('session_terminated', {
+                    'message': 'Game session terminated - opponent left the game',
+                    'reason': 'player_disconnect'
+                }, room=[room_id, spectator_room(room_id)])
+            else:
+                socketio.emit('session_terminated', {
+                    'message': 'Game session ended - the room was inactive for too long',
+                    'reason': 'room_expired',
+                    'phase': eviction['reason']
+                }, room=[room_id, spectator_room(room_id)])
+            socketio.close_room(room_id)
+            socketio.close_room(spectator_room(room_id))
+            if tournaments.is_match_room(room_id):
+                # Players who never came back forfeit; an idle room costs both the match
+                tournaments.room_closed(room_id, eviction['disconnected_ids'])
+
+socketio.start_background_task(reap_idle_rooms)
+
+# How often timed rooms (see game_logic.parse_time_control) are checked for a
+# player out of time. One sweep serves every room and only touches the rooms
+# that are due, so it costs the same with 10 clocks running or 100,000.
+TURN_CLOCK_TICK = float(os.environ.get('TURN_CLOCK_TICK_MS', 100)) / 1000
+TURN_TIMEOUTS = REGISTRY.counter('game_turn_timeouts_total', 'Matches lost on time')
+
+def expire_turn_clocks():
+    while True:
+        socketio.sleep(TURN_CLOCK_TICK)
+        try:
+            timeouts = game_manager.expire_turns()
+        except Exception:
+            logger.exception('turn clock sweep failed')
+            continue
+
+        for timeout in timeouts:
+            TURN_TIMEOUTS.inc()
+            logger.info('out of time room=%s symbol=%s', timeout['room_id'], timeout['symbol'])
+            emit_game_event('game_over', {
+                'reason': 'timeout',
+                'timed_out_symbol': timeout['symbol'],
+                'winner': timeout['winner'],
+                'winner_name': timeout['winner_name'],
+                'winning_line': None,
+                'is_draw': False,
+                'version': timeout['version'],
+                'clocks': timeout['clocks'],
+                'session_scores': timeout['session_scores'],
+                'match_history': timeout['match_history'],
+                'session_leader': timeout['session_leader']
+            }, timeout['room_id'])
+            if tournaments.is_match_room(timeout['room_id']):
+                settle_tournament_game(timeout['room_id'], timeout['winner_name'], False)
+
+socketio.start_background_task(expire_turn_clocks)
+
+BOT_MOVE_SECONDS = REGISTRY.histogram(
+    'bot_move_seconds', 'Time for the bot to pick a move, search included', ['grid_size'])
+BOT_SEARCH_NODES = REGISTRY.counter(
+    'bot_search_nodes_total', 'Positions searched by the bot', ['grid_size'])
+
+BOT_POLL_INTERVAL = 0.01
+
+
+def play_bot_turn(room_id: str):
+    """Make the bot's move if it is the bot's turn; the search runs in the bot's worker pool"""
+    turn = game_manager.get_turn_snapshot(room_id)
+    if not turn or not is_bot(turn['player_id']):
+        return
+
+    started = time.perf_counter()
+    try:
+        # A search lost to a dying worker runs once more on the replacement pool
+        for attempt in range(2):
+            future = submit_move(turn['grid_size'], turn['win_condition'], turn['x_mask'],
+                                 turn['o_mask'], turn['symbol'])
+            # Poll rather than block in result(), which would hold up the gevent/eventlet hub
+            while not future.done():
+                socketio.sleep(BOT_POLL_INTERVAL)
+            try:
+                choice = future.result()
+                break
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                logger.warning('bot worker died, retrying room=%s', room_id)
+    except Exception:
+        logger.exception('bot search failed room=%s', room_id)
+        return
+    grid_size = str(turn['grid_size'])
+    BOT_MOVE_SECONDS.observe(time.perf_counter() - started, grid_size)
+    BOT_SEARCH_NODES.inc(choice['nodes'], grid_size)
+    logger.debug('bot move room=%s position=%s depth=%s nodes=%s',
+                 room_id, choice['position'], choice['depth'], choice['nodes'])
+
+    # The game may have moved on (restart, player left) while the bot was thinking
+    current = game_manager.get_turn_snapshot(room_id)
+    if not current or current['version'] != turn['version']:
+        return
+    result = game_manager.make_move(room_id, turn['player_id'], choice['position'])
+    if result['success']:
+        broadcast_move(room_id, result)
+    else:
+        logger.warning('bot move rejected room=%s: %s', room_id, result['message'])
+
+def broadcast_move(room_id: str, result: dict):
+    # Broadcast only the move delta; clients that notice a version gap
+    # ask for a full snapshot through request_state
+    emit_game_event('move_made', {
+        'position': result['position'],
+        'symbol': result['symbol'],
+        'player_name': result['player_name'],
+        'current_turn': result['current_turn'],
+        'version': result['version'],
+        'game_over': result['game_over'],
+        'winner': result.get('winner'),
+        'winning_line': result.get('winning_line'),
+        'is_draw': result.get('is_draw', False),
+        'turn_deadline': result['turn_deadline'],
+        'clocks': result['clocks']
+    }, room_id)
+
+    # Check for game end
+    if result.get('game_over'):
+        emit_game_event('game_over', {
+            'winner': result.get('winner'),
+            'winner_name': result.get('winner_name'),
+            'winning_line': result.get('winning_line'),
+            'is_draw': result.get('is_draw', False),
+            'version': result['version'],
+            'session_scores': result['session_scores'],
+            'match_history': result['match_history'],
+            'session_leader': result['session_leader']
+        }, room_id)
+        if tournaments.is_match_room(room_id):
+            settle_tournament_game(room_id, result.get('winner_name'), result.get('is_draw', False))
+    elif result['next_player_id'] and is_bot(result['next_player_id']):
+        socketio.start_background_task(play_bot_turn, room_id)
+
+# Players waiting for find_match to pair them, on this worker
+MATCHMAKING_TICK = float(os.environ.get('MATCHMAKING_TICK_MS', 500)) / 1000
+matchmaker = Matchmaker()
+MATCHES_MADE = REGISTRY.counter(
+    'matchmaking_matches_total', 'Pairs made by the matchmaker', ['grid_size'])
+MATCH_WAIT_SECONDS = REGISTRY.histogram(
+    'matchmaking_wait_seconds', 'Time from find_match to a game', ['grid_size'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300))
+REGISTRY.gauge('matchmaking_queue_depth', 'Players waiting for a match', lambda: {
+    (grid_size,): count for grid_size, count in matchmaker.depth().items()
+}, labels=['grid_size'])
+
+def run_matchmaking():
+    while True:
+        socketio.sleep(MATCHMAKING_TICK)
+        try:
+            pairs = matchmaker.tick()
+        except Exception:
+            logger.exception('matchmaking tick failed')
+            continue
+        for first, second in pairs:
+            try:
+                start_matched_game(first, second)
+            except Exception:
+                logger.exception('starting matched game failed')
+
+def requeue(tickets):
+    # Back in the queue with their original wait, so the window stays as wide
+    for ticket in tickets:
+        matchmaker.enqueue(ticket.player_id, ticket.name, ticket.grid_size, ticket.rating,
+                           now=ticket.queued_at)
+
+def start_matched_game(first, second):
+    # Either player may have dropped or sat down in a room since the last
+    # tick; the other waits on
+    manager = socketio.server.manager
+    unavailable = [ticket for ticket in (first, second)
+                   if not manager.is_connected(ticket.player_id, '/')
+                   or game_manager.get_player_room(ticket.player_id)]
+    if unavailable:
+        requeue([ticket for ticket in (first, second) if ticket not in unavailable])
+        return
+
+    room_id = str(uuid.uuid4())[:8].upper()
+    if not game_manager.create_room(room_id, first.player_id, first.name, first.grid_size):
+        # A room id clash; neither player should lose their turn for it
+        logger.warning('matched room not created room=%s', room_id)
+        requeue((first, second))
+        return
+    result = game_manager.join_room(room_id, second.player_id, second.name)
+    for ticket in (first, second):
+        socketio.server.enter_room(ticket.player_id, room_id, namespace='/')
+        MATCH_WAIT_SECONDS.observe(time.time() - ticket.queued_at, str(ticket.grid_size))
+    MATCHES_MADE.inc(1, str(first.grid_size))
+    logger.info('matched room=%s ratings=%.0f/%.0f', room_id, first.rating, second.rating)
+
+    resume_tokens = {first.player_id: game_manager.get_resume_token(room_id, first.player_id),
+                     second.player_id: result['resume_token']}
+    announce_match(room_id, (first.player_id, first.name), (second.player_id, second.name),
+                   resume_tokens, encoded_game_state(room_id))
+
+def announce_match(room_id: str, first, second, resume_tokens: dict, game_state, **extra):
+    """Start a room opened for two (player_id, name) players, X first, with
+    the same events as creating and joining a room by hand"""
+    (first_id, first_name), (second_id, second_name) = first, second
+    socketio.emit('room_created', dict(extra, **{
+        'room_id': room_id,
+        'player_id': first_id,
+        'player_name': first_name,
+        'symbol': 'X',
+        'resume_token': resume_tokens[first_id],
+        'game_state': game_state
+    }), to=first_id)
+    socketio.emit('room_joined', dict(extra, **{
+        'room_id': room_id,
+        'player_id': second_id,
+        'player_name': second_name,
+        'symbol': 'O',
+        'opponent': {'name': first_name, 'symbol': 'X'},
+        'resume_token': resume_tokens[second_id],
+        'game_state': game_state
+    }), to=second_id)
+    socketio.emit('player_joined', {
+        'player_name': second_name,
+        'symbol': 'O',
+        'game_ready': True,
+        'game_state': game_state
+    }, to=first_id)
+    emit_game_event('game_start', game_state, room_id)
+
+socketio.start_background_task(run_matchmaking)
+
+# Tournaments hosted by this worker, like the matchmaking queue (see
+# tournament.py). Every tick opens rooms for up to TOURNAMENT_BATCH ready
+# matches, one create_match_rooms() call per grid size and time control,
+# and pushes the tick's bracket changes to each tournament's Socket.IO room.
+# Off with ROOM_SHARDS: timeouts and evictions there reach whichever worker
+# polls the shard first, not the one running the tournament.
+TOURNAMENT_TICK = float(os.environ.get('TOURNAMENT_TICK_MS', 500)) / 1000
+TOURNAMENT_BATCH = int(os.environ.get('TOURNAMENT_BATCH', 500))
+# Seconds between a drawn elimination game and its replay
+TOURNAMENT_REPLAY_DELAY = 3
+tournaments = TournamentManager()
+TOURNAMENT_ROOMS = REGISTRY.counter(
+    'tournament_rooms_opened_total', 'Rooms opened for tournament matches', ['grid_size'])
+TOURNAMENT_TICK_SECONDS = REGISTRY.histogram(
+    'tournament_tick_seconds', 'Time to open the ready tournament rooms and push bracket changes')
+REGISTRY.gauge('tournaments', 'Tournaments on this worker', lambda: len(tournaments.tournaments))
+
+def tournament_room(tournament_id: str) -> str:
+    return f'tournament:{tournament_id}'
+
+def run_tournaments():
+    while True:
+        socketio.sleep(TOURNAMENT_TICK)
+        started = time.perf_counter()
+        try:
+            start_tournament_matches()
+        except Exception:
+            logger.exception('starting tournament matches failed')
+        try:
+            for tournament_id, update in tournaments.drain_updates():
+                socketio.emit('tournament_update', update, room=tournament_room(tournament_id))
+        except Exception:
+            logger.exception('tournament updates failed')
+        TOURNAMENT_TICK_SECONDS.observe(time.perf_counter() - started)
+
+def start_tournament_matches():
+    manager = socketio.server.manager
+    ready = tournaments.take_ready(TOURNAMENT_BATCH,
+                                   lambda player_id: manager.is_connected(player_id, '/'))
+    batches = {}
+    for match in ready:
+        key = (match['grid_size'], json.dumps(match['time_control'], sort_keys=True))
+        batches.setdefault(key, []).append(match)
+
+    for matches in batches.values():
+        grid_size, time_control = matches[0]['grid_size'], matches[0]['time_control']
+        results = game_manager.create_match_rooms(
+            grid_size, [(match['room_id'], match['players']) for match in matches], time_control)
+        for match, result in zip(matches, results):
+            room_id = match['room_id']
+            if not result['success']:
+                # Someone sat down in another room between matches
+                logger.info('tournament room not opened room=%s: %s', room_id, result['message'])
+                tournaments.room_closed(room_id, result['busy_ids'])
+                continue
+            for player_id, _ in match['players']:
+                socketio.server.enter_room(player_id, room_id, namespace='/')
+            first, second = match['players']
+            announce_match(room_id, first, second, result['resume_tokens'],
+                           RawJSON(*result['game_state_variants']),
+                           tournament_id=match['tournament_id'])
+            TOURNAMENT_ROOMS.inc(1, str(grid_size))
+
+def settle_tournament_game(room_id: str, winner_name, is_draw: bool):
+    """Move a tournament on from a finished game in one of its rooms"""
+    outcome = tournaments.record_result(room_id, winner_name, is_draw)
+    if outcome == 'replay':
+        socketio.start_background_task(replay_tournament_game, room_id)
+    elif outcome == 'finished':
+        # Spectators may be waiting on a coalesced update the closed room can't give
+        state = encoded_game_state(room_id)
+        if state is not None:
+            socketio.emit('state_sync', state, room=spectator_room(room_id))
+        game_manager.close_room(room_id)
+        socketio.close_room(room_id)
+        socketio.close_room(spectator_room(room_id))
+
+def replay_tournament_game(room_id: str):
+    socketio.sleep(TOURNAMENT_REPLAY_DELAY)
+    players = game_manager.get_players_info(room_id)
+    if not players:
+        return
+    result = game_manager.restart_game(room_id, players[0]['id'])
+    if result['success']:
+        emit_game_event('game_restarted', {
+            'game_state': encoded_game_state(room_id),
+            'symbol_changes': result.get('symbol_changes', {}),
+            'replay': True
+        }, room_id)
+
+if not ROOM_SHARDS:
+    socketio.start_background_task(run_tournaments)
 
 @app.route('/')
 def index():
@@ -33,46 +512,213 @@ def static_files(filename):
 
 @app.route('/health')
 def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "state_cache": game_manager.get_state_cache_stats()
+    }
+
+SOCKET_EVENTS = REGISTRY.counter(
+    'socket_events_total', 'Socket events handled', ['event'])
+HANDLER_SECONDS = REGISTRY.histogram(
+    'socket_handler_seconds', 'Socket event handler latency', ['event'])
+REGISTRY.gauge('socket_connections', 'Connected clients on this worker',
+               lambda: len(socketio.server.eio.sockets))
+REGISTRY.gauge('socket_emit_queue_depth', 'Packets waiting in per-client outbound queues',
+               lambda: sum(client.queue.qsize() for client in list(socketio.server.eio.sockets.values())))
+REGISTRY.gauge('game_rooms', 'Live rooms', lambda: {
+    (grid_size,): count for grid_size, count in game_manager.get_room_counts().items()
+}, labels=['grid_size'])
+
+def state_cache_lookups():
+    stats = game_manager.get_state_cache_stats()
+    return {('hit',): stats['hits'], ('miss',): stats['misses']}
+
+REGISTRY.gauge('game_state_cache_lookups', 'get_state() lookups by cache result',
+               state_cache_lookups, labels=['result'])
+
+
+# Token buckets per connection and event (limits in rate_limit.RATE_LIMITS)
+rate_limiter = RateLimiter()
+RATE_LIMITED = REGISTRY.counter(
+    'socket_events_rate_limited_total', 'Socket events refused by the rate limiter', ['event'])
+
+# Silently dropped when over the limit; the rest get an error back
+QUIET_LIMITED_EVENTS = {'typing'}
+
+def instrumented(event: str):
+    """Register a socket handler that is rate limited, counted and timed in /metrics"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args):
+            if not rate_limiter.allow(request.sid, event):
+                RATE_LIMITED.inc(1, event)
+                if event not in QUIET_LIMITED_EVENTS:
+                    emit('error', {'message': 'Too many requests, slow down', 'event': event})
+                return
+            started = time.perf_counter()
+            try:
+                return handler(*args)
+            finally:
+                HANDLER_SECONDS.observe(time.perf_counter() - started, event)
+                SOCKET_EVENTS.inc(1, event)
+        return socketio.on(event)(wrapper)
+    return decorator
+
+@app.route('/rooms/<room_id>/moves')
+def export_room_moves(room_id):
+    # Recent matches in move_log's bulk binary format (decode with move_log.read_export)
+    data = game_manager.export_move_log(room_id.upper())
+    if data is None:
+        return {'error': 'Room not found'}, 404
+    return Response(data, mimetype='application/octet-stream', headers={
+        'Content-Disposition': f'attachment; filename="{room_id.upper()}-moves.bin"'
+    })
+
+@app.route('/players/<player_name>/stats')
+def player_stats(player_name):
+    if match_store is None:
+        return {'error': 'Match history is not enabled'}, 404
+    stats = match_store.player_stats(player_name)
+    if stats is None:
+        return {'error': 'Player not found'}, 404
+    return stats
+
+@app.route('/leaderboard')
+def leaderboard():
+    if match_store is None:
+        return {'error': 'Match history is not enabled'}, 404
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    return {'players': match_store.leaderboard(limit)}
+
+@app.route('/ratings')
+def rating_leaderboard():
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    return game_manager.get_rating_leaderboard(limit, offset) or {'players': [], 'total': 0}
+
+@app.route('/ratings/<player_name>')
+def player_rating(player_name):
+    rating = game_manager.get_player_rating(player_name, min(request.args.get('radius', 5, type=int), 50))
+    if rating is None:
+        return {'error': 'Player not rated'}, 404
+    return rating
+
+@app.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def encoded_game_state(room_id: str):
+    """The room's cached state snapshot, ready to embed in any emit"""
+    variants = game_manager.get_game_state_variants(room_id)
+    return RawJSON(*variants) if variants is not None else None
 
 @socketio.on('connect')
-def on_connect():
-    print(f'Client connected: {request.sid}')
-    emit('connected', {'client_id': request.sid})
+def on_connect(auth=None):
+    logger.debug('client connected sid=%s', request.sid)
+    # Clients pick a board encoding with io({auth: {board_encoding}}); only
+    # FanoutManager can send each client its own, so others fall back to JSON
+    encoding = auth.get('board_encoding') if isinstance(auth, dict) else None
+    manager = socketio.server.manager
+    if encoding not in BOARD_ENCODINGS or not hasattr(manager, 'set_board_encoding'):
+        encoding = 'json'
+    elif encoding != 'json':
+        manager.set_board_encoding(request.sid, encoding)
+    # server_time lets clients count down turn deadlines against our clock
+    emit('connected', {'client_id': request.sid, 'board_encoding': encoding,
+                       'server_time': time.time()})
 
 @socketio.on('disconnect')
 def on_disconnect():
-    print(f'Client disconnected: {request.sid}')
-    # Handle player leaving mid-game
-    room_id = game_manager.player_disconnect(request.sid)
+    logger.debug('client disconnected sid=%s', request.sid)
+    rate_limiter.forget(request.sid)
+    typing_tracker.forget(request.sid)
+    matchmaker.cancel(request.sid)
+    tournaments.player_offline(request.sid)
+    game_manager.remove_spectator(request.sid)
+    # Hold the seat so a dropped connection can resume; the reaper ends the
+    # session if the player isn't back within the grace window
+    room_id = game_manager.suspend_player(request.sid)
     if room_id:
-        # Notify remaining players that the game session has ended
-        emit('session_terminated', {
-            'message': 'Game session terminated - opponent left the game',
-            'reason': 'player_disconnect'
+        emit('player_status_update', {
+            'player_id': request.sid,
+            'status': 'offline',
+            'last_seen': 'just now',
+            'grace_seconds': RESUME_GRACE
         }, room=room_id)
 
-@socketio.on('create_room')
+@instrumented('find_match')
+def handle_find_match(data):
+    player_name = data.get('player_name', f'Player_{request.sid[:6]}')
+    try:
+        grid_size = int(data.get('grid_size', 3))
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Grid size must be a number'})
+        return
+    # Tickets are bucketed, and metrics labelled, by grid size
+    if not 3 <= grid_size <= 10:
+        emit('error', {'message': 'Grid size must be 3 to 10'})
+        return
+
+    if game_manager.get_player_room(request.sid):
+        emit('error', {'message': 'Leave your current room first'})
+        return
+
+    rated = game_manager.get_player_rating(player_name, 0)
+    rating = rated['rating'] if rated else INITIAL_RATING
+    if not matchmaker.enqueue(request.sid, player_name, grid_size, rating):
+        emit('error', {'message': 'Already looking for a match'})
+        return
+    emit('matchmaking_queued', {
+        'grid_size': grid_size,
+        'rating': round(rating),
+        'waiting': matchmaker.depth().get(grid_size, 0)
+    })
+
+@instrumented('cancel_matchmaking')
+def handle_cancel_matchmaking(data=None):
+    cancel_matchmaking_ticket()
+
+def cancel_matchmaking_ticket():
+    # Also when a queued player creates or joins a room by hand, so the
+    # matchmaker never seats them twice
+    if matchmaker.cancel(request.sid):
+        emit('matchmaking_cancelled', {})
+
+@instrumented('create_room')
 def handle_create_room(data):
     player_name = data.get('player_name', f'Player_{request.sid[:6]}')
     grid_size = data.get('grid_size', 3)
+    # opponent='bot' seats a server-side bot as the second player right away
+    against_bot = data.get('opponent') == 'bot'
+    try:
+        time_control = parse_time_control(data.get('time_control'))
+    except (TypeError, ValueError) as error:
+        emit('error', {'message': str(error)})
+        return
     room_id = str(uuid.uuid4())[:8].upper()
     
-    success = game_manager.create_room(room_id, request.sid, player_name, grid_size)
+    success = game_manager.create_room(room_id, request.sid, player_name, grid_size, time_control)
     if success:
+        cancel_matchmaking_ticket()
         join_room(room_id)
-        game_state = game_manager.get_game_state(room_id)
+        if against_bot:
+            game_manager.join_room(room_id, bot_id(room_id), BOT_NAME)
+        game_state = encoded_game_state(room_id)
         emit('room_created', {
             'room_id': room_id,
             'player_id': request.sid,
             'player_name': player_name,
             'symbol': 'X',
+            'resume_token': game_manager.get_resume_token(room_id, request.sid),
             'game_state': game_state
         })
+        if against_bot:
+            emit_game_event('game_start', game_state, room_id)
     else:
         emit('error', {'message': 'Failed to create room'})
 
-@socketio.on('join_room')
+@instrumented('join_room')
 def handle_join_room(data):
     room_id = data.get('room_id')
     player_name = data.get('player_name', f'Player_{request.sid[:6]}')
@@ -81,16 +727,18 @@ def handle_join_room(data):
         emit('error', {'message': 'Room ID required'})
         return
     
-    print(f"Player {player_name} ({request.sid}) trying to join room {room_id}")
+    logger.debug('join requested room=%s sid=%s', room_id, request.sid)
     
     result = game_manager.join_room(room_id, request.sid, player_name)
     if result['success']:
+        cancel_matchmaking_ticket()
         join_room(room_id)
         
-        # Get the current game state after joining
-        current_game_state = game_manager.get_game_state(room_id)
+        # Get the current game state after joining, encoded once for all emits
+        current_game_state = encoded_game_state(room_id)
         
-        print(f"Game state after join: {current_game_state}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('state after join room=%s state=%s', room_id, current_game_state.text)
         
         # Notify the joining player with updated game state
         emit('room_joined', {
@@ -99,6 +747,7 @@ def handle_join_room(data):
             'player_name': player_name,
             'symbol': result['symbol'],
             'opponent': result['opponent'],
+            'resume_token': result['resume_token'],
             'game_state': current_game_state
         })
         
@@ -111,18 +760,90 @@ def handle_join_room(data):
         }, room=room_id, include_self=False)
         
         # Start the game with the most current state
-        emit('game_start', current_game_state, room=room_id)
+        emit_game_event('game_start', current_game_state, room_id)
         
-        print(f"Successfully processed join for {player_name}")
+        logger.info('player joined room=%s sid=%s', room_id, request.sid)
     else:
         emit('error', {'message': result['message']})
         
-@socketio.on('room_joined')
+@instrumented('resume_session')
+def handle_resume_session(data):
+    room_id = data.get('room_id')
+    resume_token = data.get('resume_token')
+
+    if not room_id or not resume_token:
+        emit('resume_failed', {'message': 'Room ID and resume token required'})
+        return
+
+    result = game_manager.resume_session(room_id, resume_token, request.sid)
+    if not result['success']:
+        emit('resume_failed', {'room_id': room_id, 'message': result['message']})
+        return
+
+    join_room(room_id)
+    current_game_state = encoded_game_state(room_id)
+
+    # Same seat, symbol and scores under the new connection id
+    emit('session_resumed', {
+        'room_id': room_id,
+        'player_id': request.sid,
+        'player_name': result['player_name'],
+        'symbol': result['symbol'],
+        'resume_token': result['resume_token'],
+        'game_state': current_game_state
+    })
+
+    # The opponent's copy of the state is keyed by the old id
+    emit('player_status_update', {
+        'player_id': request.sid,
+        'previous_id': result['previous_id'],
+        'status': 'online'
+    }, room=room_id, include_self=False)
+    emit_game_event('state_sync', current_game_state, room_id, skip_sid=request.sid)
+    tournaments.player_resumed(result['previous_id'], request.sid)
+    # A room restored after a restart may be waiting on the bot's move;
+    # play_bot_turn does nothing otherwise
+    socketio.start_background_task(play_bot_turn, room_id)
+
+    logger.info('session resumed room=%s sid=%s previous=%s',
+                room_id, request.sid, result['previous_id'])
+
+@instrumented('spectate_room')
+def handle_spectate_room(data):
+    room_id = data.get('room_id')
+    name = data.get('player_name') or f'Spectator_{request.sid[:6]}'
+    
+    if not room_id:
+        emit('error', {'message': 'Room ID required'})
+        return
+    
+    result = game_manager.add_spectator(room_id, request.sid, name)
+    if not result['success']:
+        emit('error', {'message': result['message']})
+        return
+    
+    join_room(spectator_room(room_id))
+    emit('spectating', {
+        'room_id': room_id,
+        'player_name': name,
+        'spectators': result['spectators'],
+        'live': not SPECTATOR_COALESCE,
+        'game_state': encoded_game_state(room_id)
+    })
+
+@instrumented('stop_spectating')
+def handle_stop_spectating(data=None):
+    room_id = game_manager.remove_spectator(request.sid)
+    if room_id:
+        leave_room(spectator_room(room_id))
+    emit('left_room', {'room_id': room_id})
+
+@instrumented('room_joined')
 def handle_room_joined_update():
     # After a player joins, send updated player info to both players
     pass
 
-@socketio.on('get_player_info')
+@instrumented('get_player_info')
 def handle_get_player_info(data):
     room_id = data.get('room_id')
     
@@ -130,16 +851,16 @@ def handle_get_player_info(data):
         emit('error', {'message': 'Room ID required'})
         return
     
-    game = game_manager.games.get(room_id)
-    if not game:
+    players = game_manager.get_players_info(room_id)
+    if players is None:
         emit('error', {'message': 'Room not found'})
         return
     
     # Send current player info
     players_info = []
-    for player_id, player_data in game.players.items():
+    for player_data in players:
         players_info.append({
-            'id': player_id,
+            'id': player_data['id'],
             'name': player_data['name'],
             'symbol': player_data['symbol'],
             'online': True  # For now, assume online, I'll handle it later.
@@ -150,7 +871,7 @@ def handle_get_player_info(data):
         'requesting_player': request.sid
     })
 
-@socketio.on('make_move')
+@instrumented('make_move')
 def handle_make_move(data):
     room_id = data.get('room_id')
     position = data.get('position')
@@ -161,50 +882,114 @@ def handle_make_move(data):
     
     result = game_manager.make_move(room_id, request.sid, position)
     if result['success']:
-        # Get the updated game state after the move
-        updated_game_state = game_manager.get_game_state(room_id)
-        
-        # Broadcast the move to all players in the room
-        emit('move_made', {
-            'position': position,
-            'symbol': result['symbol'],
-            'player_name': result['player_name'],
-            'board': result['board'],
-            'current_turn': result['current_turn'],
-            'game_state': updated_game_state
-        }, room=room_id)
-        
-        # Check for game end
-        if result.get('game_over'):
-            emit('game_over', {
-                'winner': result.get('winner'),
-                'winner_name': result.get('winner_name'),
-                'winning_line': result.get('winning_line'),
-                'is_draw': result.get('is_draw', False),
-                'final_board': result['board']
-            }, room=room_id)
+        broadcast_move(room_id, result)
     else:
         emit('error', {'message': result['message']})
 
-@socketio.on('restart_game')
+def can_view(room_id: str) -> bool:
+    return bool(game_manager.get_player(room_id, request.sid)
+                or game_manager.get_spectator(room_id, request.sid))
+
+@instrumented('request_state')
+def handle_request_state(data):
+    room_id = data.get('room_id')
+    
+    if not room_id:
+        emit('error', {'message': 'Room ID required'})
+        return
+    
+    if not can_view(room_id):
+        emit('error', {'message': 'Not in this room'})
+        return
+    
+    # Full snapshot for a client that reported a version gap
+    emit('state_sync', encoded_game_state(room_id))
+
+@instrumented('get_replay')
+def handle_get_replay(data):
+    room_id = data.get('room_id')
+    
+    if not room_id:
+        emit('error', {'message': 'Room ID required'})
+        return
+    
+    if not can_view(room_id):
+        emit('error', {'message': 'Not in this room'})
+        return
+    
+    replay = game_manager.get_replay(room_id, data.get('match_number'), data.get('move_index'))
+    if replay is None:
+        emit('error', {'message': 'Match not found'})
+        return
+    emit('match_replay', replay)
+
+@instrumented('catch_up')
+def handle_catch_up(data):
+    room_id = data.get('room_id')
+    
+    if not room_id:
+        emit('error', {'message': 'Room ID required'})
+        return
+    
+    if not can_view(room_id):
+        emit('error', {'message': 'Not in this room'})
+        return
+    
+    # Snapshot plus tail is smaller than a full state_sync late in a big game
+    emit('catch_up', game_manager.get_catch_up(room_id))
+
+@instrumented('get_ratings')
+def handle_get_ratings(data=None):
+    # Top players from rank offset + 1, plus the neighbourhood of player_name if given
+    data = data or {}
+    try:
+        offset = max(int(data.get('offset', 0)), 0)
+        count = min(max(int(data.get('count', 10)), 1), 100)
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Offset and count must be numbers'})
+        return
+    ratings = dict(game_manager.get_rating_leaderboard(count, offset) or {'players': [], 'total': 0})
+    if data.get('player_name'):
+        ratings['player'] = game_manager.get_player_rating(data['player_name'])
+    emit('ratings', ratings)
+
+@instrumented('restart_game')
 def handle_restart_game(data):
     room_id = data.get('room_id')
     
     if not room_id:
         emit('error', {'message': 'Room ID required'})
         return
+
+    # Tournament rooms replay drawn games by themselves and close after the result
+    if tournaments.is_match_room(room_id):
+        emit('error', {'message': 'Tournament games cannot be restarted'})
+        return
     
     result = game_manager.restart_game(room_id, request.sid)
     if result['success']:
         # Send the game_restarted event with symbol changes
-        emit('game_restarted', {
-            'game_state': result['game_state'],
+        emit_game_event('game_restarted', {
+            'game_state': encoded_game_state(room_id),
             'symbol_changes': result.get('symbol_changes', {})
-        }, room=room_id)
+        }, room_id)
+        # Symbols swap on restart, so the bot may open the next match
+        if any(is_bot(pid) for pid in result.get('symbol_changes', {})):
+            socketio.start_background_task(play_bot_turn, room_id)
     else:
         emit('error', {'message': result['message']})
 
-@socketio.on('chat_message')
+MAX_CHAT_LENGTH = int(os.environ.get('MAX_CHAT_LENGTH', 500))
+
+# Chat message ids only need to be unique, not random: a per-process prefix
+# and a counter are far cheaper than a uuid4 per message
+MESSAGE_ID_PREFIX = uuid.uuid4().hex[:8]
+message_ids = itertools.count(1)
+
+# Typing indicators are relayed only when a player starts or stops typing
+typing_tracker = TypingTracker()
+
+@instrumented('chat_message')
 def handle_chat_message(data):
     room_id = data.get('room_id')
     message = data.get('message', '').strip()
@@ -213,33 +998,41 @@ def handle_chat_message(data):
     if not room_id or not message:
         emit('error', {'message': 'Invalid chat message'})
         return
+
+    if len(message) > MAX_CHAT_LENGTH:
+        emit('error', {'message': f'Messages are limited to {MAX_CHAT_LENGTH} characters'})
+        return
     
     # Get player info from game state
-    game = game_manager.games.get(room_id)
-    if not game or request.sid not in game.players:
+    player = game_manager.get_player(room_id, request.sid)
+    spectator = None if player else game_manager.get_spectator(room_id, request.sid)
+    if not player and not spectator:
         emit('error', {'message': 'Not in this room'})
         return
     
-    player = game.players[request.sid]
-    
     # Create message data
     message_data = {
-        'message_id': str(uuid.uuid4()),
+        'message_id': f'{MESSAGE_ID_PREFIX}-{next(message_ids)}',
         'player_id': request.sid,
-        'player_name': player['name'],
+        'player_name': (player or spectator)['name'],
         'message': message,
         'timestamp': time.time(),
-        'type': data.get('type', 'text')
+        'type': data.get('type', 'text'),
+        'spectator': spectator is not None
     }
     
     # Add reply data if present
     if reply_to:
         message_data['reply_to'] = reply_to
     
-    # Broadcast the message to all players in the room
-    emit('chat_message', message_data, room=room_id)
+    if player:
+        # Players' chat is part of the show for spectators too
+        emit('chat_message', message_data, room=[room_id, spectator_room(room_id)])
+    else:
+        # Spectator chatter stays among spectators
+        emit('chat_message', message_data, room=spectator_room(room_id))
 
-@socketio.on('typing')
+@instrumented('typing')
 def handle_typing(data):
     room_id = data.get('room_id')
     
@@ -247,11 +1040,13 @@ def handle_typing(data):
         return
     
     # Get player info from game state
-    game = game_manager.games.get(room_id)
-    if not game or request.sid not in game.players:
+    player = game_manager.get_player(room_id, request.sid)
+    if not player:
+        return
+
+    # Keystrokes after the first carry no news
+    if not typing_tracker.start(room_id, request.sid):
         return
-    
-    player = game.players[request.sid]
     
     # Notify other players that this player is typing
     emit('player_typing', {
@@ -259,42 +1054,216 @@ def handle_typing(data):
         'player_name': player['name']
     }, room=room_id, include_self=False)
 
-@socketio.on('stop_typing')
+@instrumented('stop_typing')
 def handle_stop_typing(data):
     room_id = data.get('room_id')
     
     if not room_id:
         return
     
+    # Only players' typing is relayed; spectators' would flood the room
+    if not game_manager.get_player(room_id, request.sid):
+        return
+
+    if not typing_tracker.stop(room_id, request.sid):
+        return
+    
     # Notify other players that this player stopped typing
     emit('player_stopped_typing', {
         'player_id': request.sid
     }, room=room_id, include_self=False)
 
-@socketio.on('get_rooms')
-def handle_get_rooms():
-    rooms_list = game_manager.get_available_rooms()
-    emit('rooms_list', {'rooms': rooms_list})
+def emit_rooms_page(data):
+    data = data or {}
+    try:
+        grid_size = int(data['grid_size']) if data.get('grid_size') is not None else None
+        offset = max(int(data.get('offset', 0)), 0)
+        limit = min(max(int(data.get('limit', LOBBY_PAGE_SIZE)), 1), LOBBY_PAGE_SIZE)
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Grid size, offset and limit must be numbers'})
+        return
+    
+    rooms_list = game_manager.get_available_rooms(
+        grid_size=grid_size,
+        offset=offset,
+        limit=limit,
+        newest_first=bool(data.get('newest_first', False))
+    )
+    emit('rooms_list', {
+        'rooms': rooms_list,
+        'total': game_manager.count_available_rooms(grid_size),
+        'offset': offset,
+        'limit': limit
+    })
+
+@instrumented('get_rooms')
+def handle_get_rooms(data=None):
+    emit_rooms_page(data)
 
-@socketio.on('leave_room')
+@instrumented('subscribe_lobby')
+def handle_subscribe_lobby(data=None):
+    # Send the first page, then lobby_update events as rooms open and close
+    join_room(LOBBY_ROOM)
+    emit_rooms_page(data)
+
+@instrumented('unsubscribe_lobby')
+def handle_unsubscribe_lobby(data=None):
+    leave_room(LOBBY_ROOM)
+
+@instrumented('leave_room')
 def handle_leave_room(data):
     room_id = data.get('room_id')
     if room_id:
         leave_room(room_id)
+        typing_tracker.stop(room_id, request.sid)
+        
+        # Spectators just stop watching
+        if game_manager.remove_spectator(request.sid):
+            leave_room(spectator_room(room_id))
+            emit('left_room', {'room_id': room_id})
+            return
         
         # Terminate the game session
         terminated_room = game_manager.player_disconnect(request.sid)
+        if terminated_room and tournaments.is_match_room(terminated_room):
+            tournaments.room_closed(terminated_room, [request.sid])
         if terminated_room:
             # Notify any remaining players that the session is terminated
             emit('session_terminated', {
                 'message': 'Game session terminated - opponent left the game',
                 'reason': 'player_leave'
-            }, room=room_id)
+            }, room=[room_id, spectator_room(room_id)])
         
         # Confirm to the leaving player that they've left successfully
         emit('left_room', {'room_id': room_id})
 
+def entered_tournament(result: dict, event: str):
+    if not result['success']:
+        emit('error', {'message': result['message']})
+        return
+    join_room(tournament_room(result['tournament']['tournament_id']))
+    emit(event, result)
+
+def tournaments_available() -> bool:
+    if ROOM_SHARDS:
+        emit('error', {'message': 'Tournaments are not available on this server'})
+        return False
+    return True
+
+@instrumented('create_tournament')
+def handle_create_tournament(data):
+    if not tournaments_available():
+        return
+    player_name = data.get('player_name', f'Player_{request.sid[:6]}')
+    try:
+        time_control = parse_time_control(data.get('time_control'))
+    except (TypeError, ValueError) as error:
+        emit('error', {'message': str(error)})
+        return
+    try:
+        grid_size = int(data.get('grid_size', 3))
+        max_players = int(data['max_players']) if data.get('max_players') else None
+        rounds = int(data['rounds']) if data.get('rounds') else None
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Grid size, player limit and rounds must be numbers'})
+        return
+    tournament_id = str(uuid.uuid4())[:8].upper()
+
+    result = tournaments.create(tournament_id, request.sid, player_name, data.get('name', ''),
+                                grid_size, data.get('format', 'single_elimination'),
+                                max_players, rounds, time_control)
+    entered_tournament(result, 'tournament_created')
+
+@instrumented('join_tournament')
+def handle_join_tournament(data):
+    tournament_id = data.get('tournament_id')
+    player_name = data.get('player_name', f'Player_{request.sid[:6]}')
+    if not tournament_id:
+        emit('error', {'message': 'Tournament ID required'})
+        return
+    if not tournaments_available():
+        return
+    entered_tournament(tournaments.register(tournament_id, request.sid, player_name),
+                       'tournament_joined')
+
+@instrumented('rejoin_tournament')
+def handle_rejoin_tournament(data):
+    # After a reconnect, with the token from tournament_created/tournament_joined
+    tournament_id = data.get('tournament_id')
+    token = data.get('token')
+    if not tournament_id or not token:
+        emit('error', {'message': 'Tournament ID and token required'})
+        return
+    entered_tournament(tournaments.rejoin(tournament_id, token, request.sid), 'tournament_rejoined')
+
+@instrumented('start_tournament')
+def handle_start_tournament(data):
+    tournament_id = data.get('tournament_id')
+    tournament = tournaments.get_tournament(tournament_id) if tournament_id else None
+    if tournament is None:
+        emit('error', {'message': 'Tournament not found'})
+        return
+
+    # Seeded by rating; unrated players count as new ones
+    ratings = {}
+    for name in tournament.get('entrants', ()):
+        rated = game_manager.get_player_rating(name, 0)
+        ratings[name] = rated['rating'] if rated else INITIAL_RATING
+    result = tournaments.start(tournament_id, request.sid, ratings)
+    if not result['success']:
+        emit('error', {'message': result['message']})
+        return
+    logger.info('tournament started id=%s format=%s players=%d', tournament_id,
+                result['tournament']['format'], result['tournament']['players'])
+
+@instrumented('leave_tournament')
+def handle_leave_tournament(data=None):
+    tournament_id = tournaments.get_player_tournament(request.sid)
+    if not tournament_id:
+        return
+    leave_room(tournament_room(tournament_id))
+    # Leaving mid-match forfeits it
+    room_id = tournaments.withdraw(request.sid)
+    if room_id and game_manager.close_room(room_id) is not None:
+        emit('session_terminated', {
+            'message': 'Game session terminated - opponent left the game',
+            'reason': 'player_leave'
+        }, room=[room_id, spectator_room(room_id)])
+        socketio.close_room(room_id)
+        socketio.close_room(spectator_room(room_id))
+    emit('left_tournament', {'tournament_id': tournament_id})
+
+@instrumented('watch_tournament')
+def handle_watch_tournament(data):
+    # The bracket as it stands, then tournament_update events as it changes
+    tournament = tournaments.get_tournament(data.get('tournament_id') or '')
+    if tournament is None:
+        emit('error', {'message': 'Tournament not found'})
+        return
+    join_room(tournament_room(tournament['tournament_id']))
+    emit('tournament_state', tournament)
+
+@instrumented('unwatch_tournament')
+def handle_unwatch_tournament(data):
+    if data.get('tournament_id'):
+        leave_room(tournament_room(data['tournament_id']))
+
+@instrumented('get_tournament')
+def handle_get_tournament(data):
+    # Any one round of the bracket, the current one by default
+    try:
+        round_number = int(data['round']) if data.get('round') else None
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Round must be a number'})
+        return
+    tournament = tournaments.get_tournament(data.get('tournament_id') or '', round_number)
+    if tournament is None:
+        emit('error', {'message': 'Tournament not found'})
+        return
+    emit('tournament_state', tournament)
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') != 'production'
+    start_pool()
     socketio.run(app, host='0.0.0.0', port=port, debug=debug, allow_unsafe_werkzeug=True)
\ No newline at end of file
@@ -0,0 +1,682 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Micro-benchmarks for the game logic.
+
+Usage:
+    python benchmark.py              # run every scenario
+    python benchmark.py win_check    # run selected scenarios
+"""
+
+import base64
+import gc
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from game_logic import Game, GameManager, pack_board, parse_time_control, unpack_board
+from snapshot import RoomSnapshotter
+
+
+def _new_game(grid_size: int) -> Game:
+    game = Game(grid_size)
+    game.add_player('p1', 'Player 1', 'X')
+    game.add_player('p2', 'Player 2', 'O')
+    return game
+
+
+def bench_win_check(games_per_size: int = 200, seed: int = 42):
+    """Per-move cost of make_move, and of a full-board win scan for reference."""
+    print('== win_check: per-move cost of win detection ==')
+    print(f'{"grid":>6} {"win":>4} {"moves":>8} {"make_move us":>13} {"full scan us":>13}')
+
+    for grid_size in range(3, 11):
+        rng = random.Random(seed)
+        move_time = 0.0
+        full_scan = 0.0
+        moves = 0
+
+        for _ in range(games_per_size):
+            game = _new_game(grid_size)
+            empty = list(range(grid_size * grid_size))
+            rng.shuffle(empty)
+
+            for position in empty:
+                player_id = 'p1' if game.current_turn == 'X' else 'p2'
+
+                start = time.perf_counter()
+                game.make_move(position, player_id)
+                move_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                game.check_winner()
+                full_scan += time.perf_counter() - start
+
+                moves += 1
+                if game.game_over:
+                    break
+
+        win = game.room_settings['win_condition']
+        label = f'{grid_size}x{grid_size}'
+        print(f'{label:>6} {win:>4} {moves:>8} '
+              f'{move_time / moves * 1e6:>13.2f} {full_scan / moves * 1e6:>13.2f}')
+    print()
+
+
+def bench_memory(rooms: int = 10000, seed: int = 42):
+    """Traced heap bytes per live two-player room, mid-game."""
+    print('== memory: per-room footprint ==')
+    print(f'{"grid":>6} {"rooms":>8} {"bytes/room":>11}')
+
+    for grid_size in (3, 5, 10):
+        rng = random.Random(seed)
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        manager = GameManager()
+        for i in range(rooms):
+            room_id = f'R{i:07d}'
+            manager.create_room(room_id, f'a{i}', 'Alice', grid_size)
+            manager.join_room(room_id, f'b{i}', 'Bob')
+            for position in rng.sample(range(grid_size * grid_size), 2):
+                game = manager.games[room_id]
+                player_id = f'a{i}' if game.current_turn == 'X' else f'b{i}'
+                game.make_move(position, player_id)
+
+        used = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        label = f'{grid_size}x{grid_size}'
+        print(f'{label:>6} {rooms:>8} {used / rooms:>11.0f}')
+        del manager
+    print()
+
+
+def bench_disconnect(players: int = 100000):
+    """Cost of player_disconnect as the number of connected players grows."""
+    print('== disconnect: player_disconnect cost vs. server population ==')
+    print(f'{"players":>8} {"total s":>9} {"per disconnect us":>18}')
+
+    for population in (players // 100, players // 10, players):
+        manager = GameManager()
+        for i in range(population // 2):
+            room_id = f'R{i:07d}'
+            manager.create_room(room_id, f'a{i}', 'Alice')
+            manager.join_room(room_id, f'b{i}', 'Bob')
+
+        player_ids = list(manager.player_rooms)
+        start = time.perf_counter()
+        for player_id in player_ids:
+            manager.player_disconnect(player_id)
+        elapsed = time.perf_counter() - start
+
+        assert not manager.games and not manager.player_rooms
+        print(f'{population:>8} {elapsed:>9.3f} {elapsed / population * 1e6:>18.2f}')
+    print()
+
+
+def _run_threads(target, count: int):
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def bench_concurrency(rooms: int = 500, threads: int = 16, moves_per_thread: int = 20000,
+                      seed: int = 42):
+    """Concurrent joins and moves from many threads, then check room invariants."""
+    print('== concurrency: racing joins and moves across threads ==')
+
+    # Switch threads as often as possible to provoke interleavings
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        manager = GameManager()
+        room_ids = [f'R{i:05d}' for i in range(rooms)]
+        for i, room_id in enumerate(room_ids):
+            manager.create_room(room_id, f'host{i}', 'Host', 3 + i % 8)
+
+        # Every thread tries to take the second seat of every room
+        joins = [0] * threads
+
+        def join_all(index: int):
+            order = list(room_ids)
+            random.Random(seed + index).shuffle(order)
+            for room_id in order:
+                if manager.join_room(room_id, f'guest{index}-{room_id}', 'Guest')['success']:
+                    joins[index] += 1
+
+        start = time.perf_counter()
+        _run_threads(join_all, threads)
+        join_time = time.perf_counter() - start
+
+        # Every thread plays random cells as both players of random rooms
+        players = {room_id: list(manager.games[room_id].players) for room_id in room_ids}
+        accepted = [0] * threads
+
+        def play(index: int):
+            rng = random.Random(seed + index)
+            for _ in range(moves_per_thread):
+                room_id = rng.choice(room_ids)
+                game = manager.games[room_id]
+                position = rng.randrange(game.grid_size * game.grid_size)
+                if manager.make_move(room_id, rng.choice(players[room_id]), position)['success']:
+                    accepted[index] += 1
+
+        start = time.perf_counter()
+        _run_threads(play, threads)
+        move_time = time.perf_counter() - start
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    # Exactly one guest per room, and all the indexes agree with the rooms
+    assert sum(joins) == rooms, f'{sum(joins)} joins succeeded for {rooms} rooms'
+    assert not manager.open_rooms and not manager.open_rooms_by_size
+    total_moves = 0
+    for room_id, game in manager.games.items():
+        assert len(game.players) == 2
+        assert manager.room_members[room_id] == set(game.players)
+        assert all(manager.player_rooms[pid] == room_id for pid in game.players)
+
+        x_count = bin(game._x_mask).count('1')
+        o_count = bin(game._o_mask).count('1')
+        assert game._x_mask & game._o_mask == 0
+        assert x_count - o_count in (0, 1)
+        assert game.version == 2 + x_count + o_count
+        assert game.game_over == bool(game.check_winner() or game.is_board_full())
+        total_moves += x_count + o_count
+    assert sum(accepted) == total_moves
+
+    print(f'{threads} threads, {rooms} rooms: {sum(joins)} joins in {join_time:.2f}s, '
+          f'{sum(accepted)} of {threads * moves_per_thread} moves accepted in {move_time:.2f}s')
+    print('invariants hold')
+    print()
+
+
+def bench_reaper(rooms: int = 100000, expired_share: float = 0.01, seed: int = 42):
+    """Cost of a reaper sweep when only a few rooms out of many have expired."""
+    print('== reaper: idle room sweep vs. scanning every room ==')
+    print(f'{"rooms":>8} {"expired":>8} {"sweep ms":>9} {"full scan ms":>13}')
+
+    for population in (rooms // 100, rooms // 10, rooms):
+        rng = random.Random(seed)
+        manager = GameManager(room_ttls={'waiting': 600})
+        now = time.time()
+        for i in range(population):
+            manager.create_room(f'R{i:07d}', f'a{i}', 'Alice')
+
+        # Backdate a sample of rooms so they're past their TTL at sweep time
+        stale = rng.sample(sorted(manager.games), int(population * expired_share))
+        for room_id in stale:
+            game = manager.games[room_id]
+            game.created_at = game.last_move_at = now - 700
+            manager.room_expiry.schedule(room_id, game.created_at + 600)
+
+        start = time.perf_counter()
+        expired = [room_id for room_id, game in list(manager.games.items())
+                   if now - game.last_move_at > manager.room_ttls[manager.room_phase(game)]]
+        full_scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        evicted = manager.reap_expired(now)
+        sweep = time.perf_counter() - start
+
+        assert sorted(e['room_id'] for e in evicted) == sorted(expired) == sorted(stale)
+        assert len(manager.games) == population - len(stale)
+        print(f'{population:>8} {len(evicted):>8} {sweep * 1e3:>9.2f} {full_scan * 1e3:>13.2f}')
+    print()
+
+
+def bench_turn_clocks(rooms: int = 100000, timeout_share: float = 0.01, moves: int = 20000,
+                      seed: int = 42):
+    """Turn clock sweeps with many timed rooms, and what a clock adds to a move."""
+    print('== turn_clocks: one shared deadline queue for every timed room ==')
+    print(f'{"rooms":>8} {"idle tick ms":>13} {"timeouts":>9} {"sweep ms":>9}')
+
+    time_control = parse_time_control({'mode': 'clock', 'seconds': 180, 'increment': 2})
+    for population in (rooms // 100, rooms // 10, rooms):
+        rng = random.Random(seed)
+        manager = GameManager()
+        for i in range(population):
+            room_id = f'R{i:07d}'
+            manager.create_room(room_id, f'a{i}', 'Alice', 3, time_control)
+            manager.join_room(room_id, f'b{i}', 'Bob')
+        now = time.time()
+
+        # A tick with no clock run out is what almost every tick looks like
+        start = time.perf_counter()
+        assert manager.expire_turns(now) == []
+        idle = time.perf_counter() - start
+
+        # Flag a sample of rooms as having spent their whole clock
+        stale = rng.sample(sorted(manager.games), int(population * timeout_share))
+        for room_id in stale:
+            game = manager.games[room_id]
+            game.turn_started_at -= 181
+            manager.turn_deadlines.schedule(room_id, game.turn_deadline)
+
+        start = time.perf_counter()
+        timeouts = manager.expire_turns(now)
+        sweep = time.perf_counter() - start
+
+        assert sorted(timeout['room_id'] for timeout in timeouts) == sorted(stale)
+        print(f'{population:>8} {idle * 1e3:>13.3f} {len(timeouts):>9} {sweep * 1e3:>9.2f}')
+
+    print(f'{"clock":>8} {"us/move":>8}')
+    for label, control in (('none', None), ('clock', time_control)):
+        manager = GameManager()
+        room_ids = [f'M{i:05d}' for i in range(moves // 8)]
+        for room_id in room_ids:
+            manager.create_room(room_id, f'{room_id}a', 'Alice', 3, control)
+            manager.join_room(room_id, f'{room_id}b', 'Bob')
+        start = time.perf_counter()
+        # Eight moves on a 3x3 board never finish a match: X takes 0, 2, 5, 7
+        for room_id in room_ids:
+            for position in (0, 1, 2, 4, 5, 3, 7, 6):
+                player = 'a' if position in (0, 2, 5, 7) else 'b'
+                assert manager.make_move(room_id, f'{room_id}{player}', position)['success']
+        elapsed = time.perf_counter() - start
+        print(f'{label:>8} {elapsed / (len(room_ids) * 8) * 1e6:>8.2f}')
+    print()
+
+
+def bench_snapshot(rooms: int = 100000, changed_share: float = 0.01, seed: int = 42):
+    """Writing live rooms out, and startup time when loading them back."""
+    print('== snapshot: dirty rooms only, written off the event loop ==')
+    print(f'{"rooms":>8} {"capture ms":>11} {"write ms":>9} {"MB":>6} {"1% capture ms":>14} '
+          f'{"restore s":>10}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        for population in (rooms // 100, rooms // 10, rooms):
+            rng = random.Random(seed)
+            path = os.path.join(directory, f'rooms-{population}.db')
+            manager = GameManager()
+            snapshots = RoomSnapshotter(manager, path)
+            # Rooms a few matches in, the last one part played
+            for i in range(population):
+                room_id = f'R{i:07d}'
+                manager.create_room(room_id, f'a{i}', 'Alice', 3)
+                manager.join_room(room_id, f'b{i}', 'Bob')
+                for _ in range(rng.randint(0, 3)):
+                    for position in (0, 3, 1, 4, 2):
+                        manager.make_move(room_id, manager.games[room_id].player_to_move(), position)
+                    manager.restart_game(room_id, f'a{i}')
+                manager.make_move(room_id, manager.games[room_id].player_to_move(), rng.randrange(9))
+
+            # First snapshot: every room is dirty
+            start = time.perf_counter()
+            snapshots.capture()
+            capture = time.perf_counter() - start
+            start = time.perf_counter()
+            snapshots.flush()
+            write = time.perf_counter() - start
+            size = os.path.getsize(path) + os.path.getsize(path + '-wal')
+
+            # A steady state interval, where a small share of rooms moved
+            for room_id in rng.sample(sorted(manager.games), int(population * changed_share)):
+                game = manager.games[room_id]
+                if not game.game_over:
+                    manager.make_move(room_id, game.player_to_move(), game.board.index(''))
+                manager.dirty_rooms.add(room_id)
+            start = time.perf_counter()
+            snapshots.capture()
+            changed = time.perf_counter() - start
+            snapshots.flush()
+
+            # Startup: a fresh process loading everything back
+            restored_manager = GameManager()
+            start = time.perf_counter()
+            restored = RoomSnapshotter(restored_manager, path).restore()
+            restore = time.perf_counter() - start
+            assert restored == population
+            print(f'{population:>8} {capture * 1e3:>11.1f} {write * 1e3:>9.1f} {size / 2**20:>6.1f} '
+                  f'{changed * 1e3:>14.2f} {restore:>10.2f}')
+    print()
+
+
+def bench_move_log(rooms: int = 200, matches: int = 30, seed: int = 42):
+    """Move log size as matches pile up, and catch-up payload vs. a full state."""
+    print('== move_log: log size under compaction, catch-up payload ==')
+    print(f'{"grid":>6} {"matches":>8} {"log bytes/room":>15} {"export bytes":>13} '
+          f'{"catch-up bytes":>15} {"state bytes":>12}')
+
+    for grid_size in (3, 5, 10):
+        rng = random.Random(seed)
+        log_bytes = export_bytes = catch_up_bytes = state_bytes = 0
+        for _ in range(rooms):
+            game = _new_game(grid_size)
+            for match in range(matches):
+                if match:
+                    game.reset()
+                cells = list(range(grid_size * grid_size))
+                rng.shuffle(cells)
+                for position in cells:
+                    player_id = next(pid for pid, player in game.players.items()
+                                     if player['symbol'] == game.current_turn)
+                    game.make_move(position, player_id)
+                    if game.game_over:
+                        break
+
+            log_bytes += game.move_log.nbytes
+            export_bytes += len(game.move_log.export())
+            catch_up_bytes += len(json.dumps(game.move_log.catch_up(), separators=(',', ':')))
+            state_bytes += len(game.get_state_json())
+
+        label = f'{grid_size}x{grid_size}'
+        print(f'{label:>6} {matches:>8} {log_bytes / rooms:>15.0f} {export_bytes / rooms:>13.0f} '
+              f'{catch_up_bytes / rooms:>15.0f} {state_bytes / rooms:>12.0f}')
+    print()
+
+
+def bench_fanout(watchers: int = 10000, updates: int = 20):
+    """Cost of one broadcast to a room of many sockets, stock manager vs. FanoutManager."""
+    import socketio
+    from wire import FanoutManager, PacketJSON, RawJSON
+
+    print('== fanout: one state broadcast to a crowded room ==')
+    print(f'{"manager":>24} {"watchers":>9} {"ms/update":>10} {"encodes":>8}')
+
+    game = _new_game(10)
+    for position in range(40):
+        game.make_move(position, 'p1' if game.current_turn == 'X' else 'p2')
+    state = RawJSON(game.get_state_json())
+
+    for manager in (socketio.BaseManager(), FanoutManager(),
+                    FanoutManager(shed_after=64, drop_after=1000)):
+        server = socketio.Server(client_manager=manager, json=PacketJSON)
+        sent = []
+        server.eio.send = lambda eio_sid, data: sent.append(data)
+        for i in range(watchers):
+            sid = manager.connect(f'eio{i}', '/')
+            manager.enter_room(sid, '/', 'room:spectators')
+            # Empty outbound queues, for the bounded manager to check
+            server.eio.sockets[f'eio{i}'] = SimpleNamespace(queue=queue.Queue(), closed=False)
+
+        start = time.perf_counter()
+        for _ in range(updates):
+            server.emit('state_sync', state, room='room:spectators')
+        elapsed = time.perf_counter() - start
+
+        assert len(sent) == watchers * updates
+        encodes = len({id(data) for data in sent[:watchers]})
+        name = type(manager).__name__ + (' bounded' if getattr(manager, 'drop_after', 0) else '')
+        print(f'{name:>24} {watchers:>9} {elapsed / updates * 1e3:>10.2f} {encodes:>8}')
+    print()
+
+
+def bench_board_encoding(repeats: int = 20000, seed: int = 42):
+    """Board payload size and encode/decode time, JSON list vs. packed 2 bits per cell."""
+    print('== board_encoding: JSON board list vs. packed board ==')
+    print(f'{"grid":>5} {"encoding":>9} {"board B":>8} {"state B":>8} {"encode us":>10} {"decode us":>10}')
+
+    rng = random.Random(seed)
+    for grid_size in (3, 10):
+        game = _new_game(grid_size)
+        cells = grid_size * grid_size
+        positions = list(range(cells))
+        rng.shuffle(positions)
+        for position in positions[:cells // 2]:
+            if game.game_over:
+                break
+            game.make_move(position, 'p1' if game.current_turn == 'X' else 'p2')
+        x_mask, o_mask = game._x_mask, game._o_mask
+
+        def encode_json():
+            return json.dumps(game.board, separators=(',', ':'))
+
+        def encode_packed():
+            return base64.b64encode(pack_board(x_mask, o_mask, cells)).decode('ascii')
+
+        board_json, board_packed = encode_json(), encode_packed()
+        rows = (
+            ('json', board_json, game.get_state_json(), encode_json, lambda: json.loads(board_json)),
+            ('packed', board_packed, game.get_state_packed_json(), encode_packed,
+             lambda: unpack_board(base64.b64decode(board_packed), cells)),
+        )
+        assert rows[0][4]() == rows[1][4]()
+        for name, board, state, encode, decode in rows:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                encode()
+            encode_us = (time.perf_counter() - start) / repeats * 1e6
+            start = time.perf_counter()
+            for _ in range(repeats):
+                decode()
+            decode_us = (time.perf_counter() - start) / repeats * 1e6
+            label = f'{grid_size}x{grid_size}'
+            print(f'{label:>5} {name:>9} {len(board):>8} {len(state):>8} {encode_us:>10.2f} {decode_us:>10.2f}')
+    print()
+
+
+def bench_bot(budget: float = 0.2, moves_per_size: int = 12, seed: int = 42):
+    """Bot move latency, search speed and depth reached per board size, in self-play."""
+    from bot import choose_move, perfect_play_table
+
+    print('== bot: self-play move search ==')
+    start = time.perf_counter()
+    table = perfect_play_table()
+    print(f'3x3 perfect-play table: {len(table)} positions in {(time.perf_counter() - start) * 1e3:.1f} ms')
+    print(f'{"grid":>5} {"win":>4} {"moves":>6} {"avg ms":>8} {"max ms":>8} {"nodes/s":>9} {"avg depth":>10}')
+
+    rng = random.Random(seed)
+    for size in range(3, 11):
+        game = _new_game(size)
+        win_length = game.room_settings['win_condition']
+        # A random opening so successive sizes don't all start from the centre
+        game.make_move(rng.randrange(size * size), 'p1')
+
+        latencies, nodes, search_seconds, depths = [], 0, 0.0, []
+        while not game.game_over and len(latencies) < moves_per_size:
+            start = time.perf_counter()
+            choice = choose_move(size, win_length, game._x_mask, game._o_mask,
+                                 game.current_turn, budget)
+            latencies.append(time.perf_counter() - start)
+            nodes += choice['nodes']
+            search_seconds += choice['seconds']
+            if choice['depth'] is not None:
+                depths.append(choice['depth'])
+            game.make_move(choice['position'], 'p1' if game.current_turn == 'X' else 'p2')
+
+        rate = f'{nodes / search_seconds:>9.0f}' if search_seconds else f'{"table":>9}'
+        depth = f'{sum(depths) / len(depths):>10.1f}' if depths else f'{"-":>10}'
+        print(f'{size:>5} {win_length:>4} {len(latencies):>6} '
+              f'{sum(latencies) / len(latencies) * 1e3:>8.2f} {max(latencies) * 1e3:>8.2f} {rate} {depth}')
+    print()
+
+
+def bench_simulation(games: int = 20000, baseline_games: int = 1000, seed: int = 42):
+    """Random self-play throughput, batch engine vs. one Game.make_move at a time."""
+    try:
+        from simulation import simulate
+    except ImportError:
+        print('== simulation: skipped, needs NumPy (pip install numpy) ==\n')
+        return
+
+    print('== simulation: random self-play, games per second ==')
+    print(f'{"grid":>5} {"Game":>9} {"batch":>9} {"pool":>9} {"X wins":>7} {"O wins":>7} {"draws":>7}')
+    rng = random.Random(seed)
+    for grid_size in range(3, 11):
+        start = time.perf_counter()
+        for _ in range(baseline_games):
+            game = _new_game(grid_size)
+            cells = list(range(grid_size * grid_size))
+            rng.shuffle(cells)
+            for position in cells:
+                game.make_move(position, 'p1' if game.current_turn == 'X' else 'p2')
+                if game.game_over:
+                    break
+        baseline = baseline_games / (time.perf_counter() - start)
+
+        batch = simulate(grid_size, games, seed=seed, workers=1)
+        pool = simulate(grid_size, games, seed=seed)
+        label = f'{grid_size}x{grid_size}'
+        print(f'{label:>5} {baseline:>9.0f} {games / batch["seconds"]:>9.0f} '
+              f'{games / pool["seconds"]:>9.0f} {pool["x_wins"] / games:>7.1%} '
+              f'{pool["o_wins"] / games:>7.1%} {pool["draws"] / games:>7.1%}')
+    print()
+
+
+def bench_ratings(players: int = 1000000, lookups: int = 10000, seed: int = 42):
+    """Rating updates and rank queries with millions of rated players, vs. sorting."""
+    from rating import INITIAL_RATING, RatingService
+
+    print('== ratings: incremental ranking ==')
+    rng = random.Random(seed)
+    service = RatingService()
+    start = time.perf_counter()
+    service.ratings = {f'player{i}': (rng.gauss(INITIAL_RATING, 200), 10) for i in range(players)}
+    service.ranking = service.ranking.from_sorted(
+        sorted((-rating, name) for name, (rating, _) in service.ratings.items()))
+    print(f'{players} players loaded in {time.perf_counter() - start:.2f}s')
+
+    names = [f'player{rng.randrange(players)}' for _ in range(lookups)]
+
+    def timed(label, operation):
+        start = time.perf_counter()
+        for i, name in enumerate(names):
+            operation(i, name)
+        print(f'{label:>22}: {(time.perf_counter() - start) / lookups * 1e6:>8.1f} us')
+
+    timed('record result', lambda i, name: service.record_result(name, names[i - 1], 'X'))
+    timed('player rank + around', lambda i, name: service.player(name, 5))
+    timed('top 10 at offset', lambda i, name: service.top(10, i * 97 % players))
+
+    start = time.perf_counter()
+    ranked = sorted(service.ratings, key=lambda name: -service.ratings[name][0])
+    ranked.index(names[0])
+    print(f'{"sort + index (old way)":>22}: {(time.perf_counter() - start) * 1e6:>8.0f} us')
+    print()
+
+
+def bench_matchmaking(waiting: int = 10000, seed: int = 42):
+    """Cost of a matchmaking tick by queue size, and how the window lets pairs form over time."""
+    from matchmaking import Matchmaker
+
+    print('== matchmaking: batched pairing ticks ==')
+    print(f'{"waiting":>8} {"queue ms":>9} {"tick ms":>8} {"paired":>7} {"left":>6}')
+    rng = random.Random(seed)
+    for count in (waiting // 10, waiting, waiting * 5):
+        matchmaker = Matchmaker()
+        start = time.perf_counter()
+        for i in range(count):
+            matchmaker.enqueue(f'p{i}', f'p{i}', rng.randint(3, 10), rng.gauss(1500, 300), now=0)
+        queued = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pairs = matchmaker.tick(now=0)
+        elapsed = time.perf_counter() - start
+        print(f'{count:>8} {queued * 1e3:>9.1f} {elapsed * 1e3:>8.2f} {2 * len(pairs):>7} {len(matchmaker.tickets):>6}')
+
+    # A sparse queue: the widening window pairs the stragglers over time
+    matchmaker = Matchmaker()
+    for i in range(200):
+        matchmaker.enqueue(f'p{i}', f'p{i}', rng.randint(3, 10), rng.gauss(1500, 300), now=0)
+    for second in (0, 5, 10, 20, 40):
+        matchmaker.tick(now=second)
+        print(f'sparse queue after {second:>2}s: {len(matchmaker.tickets)} of 200 still waiting')
+    print()
+
+
+def bench_tournament(players: int = 4096, batch: int = 500, seed: int = 42):
+    """A whole tournament played out: rooms opened in batches, results fed back by room."""
+    from tournament import TournamentManager
+
+    print(f'== tournament: {players} players, rooms opened {batch} at a time ==')
+    print(f'{"format":>18} {"start ms":>9} {"games":>6} {"open us":>8} {"result us":>10} '
+          f'{"drain ms":>9} {"max tick ms":>12}')
+    rng = random.Random(seed)
+    for fmt in ('single_elimination', 'swiss'):
+        tournaments = TournamentManager(max_players=players)
+        manager = GameManager()
+        tournaments.create('T', 'p0', 'P0', 'Cup', 3, fmt)
+        for i in range(1, players):
+            tournaments.register('T', f'p{i}', f'P{i}')
+        ratings = {f'P{i}': rng.gauss(1500, 300) for i in range(players)}
+
+        start = time.perf_counter()
+        tournaments.start('T', 'p0', ratings)
+        started = time.perf_counter() - start
+
+        games = opening = settling = draining = worst_tick = 0.0
+        while True:
+            tick = time.perf_counter()
+            ready = tournaments.take_ready(batch)
+            if not ready:
+                break
+            manager.create_match_rooms(3, [(match['room_id'], match['players']) for match in ready])
+            opened = time.perf_counter()
+            opening += opened - tick
+
+            for match in ready:
+                (_, x_name), (_, o_name) = match['players']
+                while True:
+                    games += 1
+                    draw = rng.random() < 0.2
+                    if tournaments.record_result(match['room_id'], None if draw else rng.choice((x_name, o_name)),
+                                                 draw) != 'replay':
+                        break
+                manager.close_room(match['room_id'])
+            settled = time.perf_counter()
+            settling += settled - opened
+
+            tournaments.drain_updates()
+            draining += time.perf_counter() - settled
+            worst_tick = max(worst_tick, time.perf_counter() - tick)
+
+        assert tournaments.tournaments['T'].status == 'finished' and not manager.games
+        print(f'{fmt:>18} {started * 1e3:>9.1f} {games:>6.0f} {opening / games * 1e6:>8.1f} '
+              f'{settling / games * 1e6:>10.1f} {draining * 1e3:>9.1f} {worst_tick * 1e3:>12.1f}')
+
+    # A batch against what matchmaking does per pair: create, join, then
+    # encode the state both players are sent. Lobby listeners stand in for
+    # the broadcasts every lobby entry costs.
+    pairs = [(f'R{i}', [(f'x{i}', 'X'), (f'o{i}', 'O')]) for i in range(batch)]
+    manager = GameManager()
+    manager.lobby_listeners.append(lambda change, entry: json.dumps(entry))
+    start = time.perf_counter()
+    for room_id, ((x_id, x_name), (o_id, o_name)) in pairs:
+        manager.create_room(room_id, x_id, x_name)
+        manager.join_room(room_id, o_id, o_name)
+        manager.get_game_state_variants(room_id)
+    one_by_one = time.perf_counter() - start
+    manager = GameManager()
+    start = time.perf_counter()
+    manager.create_match_rooms(3, pairs)
+    batched = time.perf_counter() - start
+    print(f'opening {batch} rooms: {one_by_one * 1e3:.1f} ms one by one, {batched * 1e3:.1f} ms batched')
+    print()
+
+
+SCENARIOS = {
+    'win_check': bench_win_check,
+    'memory': bench_memory,
+    'disconnect': bench_disconnect,
+    'concurrency': bench_concurrency,
+    'reaper': bench_reaper,
+    'turn_clocks': bench_turn_clocks,
+    'snapshot': bench_snapshot,
+    'move_log': bench_move_log,
+    'fanout': bench_fanout,
+    'board_encoding': bench_board_encoding,
+    'bot': bench_bot,
+    'simulation': bench_simulation,
+    'ratings': bench_ratings,
+    'matchmaking': bench_matchmaking,
+    'tournament': bench_tournament,
+}
+
+
+if __name__ == '__main__':
+    selected = sys.argv[1:] or list(SCENARIOS)
+    for name in selected:
+        if name not in SCENARIOS:
+            print(f'Unknown scenario: {name} (choose from {", ".join(SCENARIOS)})')
+            sys.exit(1)
+        SCENARIOS[name]()
@@ -0,0 +1,369 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Server-side bot player.
+
+On 3x3 the bot looks moves up in a perfect-play table built once from a full
+minimax of every reachable position. Bigger boards use iterative deepening
+alpha-beta with a Zobrist-hashed transposition table, cut off by a per-move
+time budget. Searches run in a process pool so they never hold up the socket
+event loop.
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import random
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from game_logic import winning_lines
+
+# Bot player ids can't collide with Socket.IO sids, which never contain ':'
+BOT_PREFIX = 'bot:'
+BOT_NAME = 'Bot'
+
+MOVE_BUDGET = float(os.environ.get('BOT_MOVE_BUDGET_MS', 500)) / 1000
+BOT_WORKERS = int(os.environ.get('BOT_WORKERS', 2))
+
+WIN_SCORE = 1_000_000
+TABLE_LIMIT = 500_000  # transposition table entries kept per board shape
+TIME_CHECK_EVERY = 128  # nodes between deadline checks
+
+# Line scores by stones in an otherwise empty line, indexed by count
+LINE_WEIGHTS = (0, 1, 8, 64, 512, 4096)
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def is_bot(player_id: str) -> bool:
+    return player_id.startswith(BOT_PREFIX)
+
+
+def bot_id(room_id: str) -> str:
+    return f'{BOT_PREFIX}{room_id}'
+
+
+@lru_cache(maxsize=None)
+def perfect_play_table() -> Dict[Tuple[int, int], int]:
+    """{(mover's mask, opponent's mask): best cell} for every reachable 3x3 position"""
+    lines = [mask for _, mask in winning_lines(3, 3)[0]]
+    full = (1 << 9) - 1
+    table = {}
+    scores = {}
+
+    def solve(mine: int, theirs: int) -> int:
+        # Score for the side to move: a quicker win (or slower loss) is better
+        key = (mine, theirs)
+        if key in scores:
+            return scores[key]
+        occupied = mine | theirs
+        empties = 9 - bin(occupied).count('1')
+        if any(theirs & line == line for line in lines):
+            score = -(1 + empties)
+        elif occupied == full:
+            score = 0
+        else:
+            score = -WIN_SCORE
+            for position in range(9):
+                if not occupied >> position & 1:
+                    reply = -solve(theirs, mine | 1 << position)
+                    if reply > score:
+                        score = reply
+                        table[key] = position
+        scores[key] = score
+        return score
+
+    solve(0, 0)
+    return table
+
+
+@lru_cache(maxsize=None)
+def _zobrist_keys(grid_size: int) -> Tuple[Tuple[int, int], ...]:
+    rng = random.Random(grid_size)
+    return tuple((rng.getrandbits(64), rng.getrandbits(64)) for _ in range(grid_size * grid_size))
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Search:
+    """Alpha-beta searcher for one board shape, keeping its table across moves"""
+
+    def __init__(self, grid_size: int, win_length: int):
+        self.grid_size = grid_size
+        all_lines, lines_by_cell = winning_lines(grid_size, win_length)
+        self.line_masks = [mask for _, mask in all_lines]
+        self.cell_lines = [[mask for _, mask in lines] for lines in lines_by_cell]
+        self.keys = _zobrist_keys(grid_size)
+        self.full = (1 << (grid_size * grid_size)) - 1
+
+        # For growing a mask by one cell sideways without wrapping rows
+        self.not_first_column = self.not_last_column = 0
+        for position in range(grid_size * grid_size):
+            if position % grid_size:
+                self.not_first_column |= 1 << position
+            if position % grid_size != grid_size - 1:
+                self.not_last_column |= 1 << position
+
+        self.table: Dict[int, Tuple[int, int, int, Optional[int]]] = {}
+        self.nodes = 0
+        self.deadline = 0.0
+
+    def choose(self, x_mask: int, o_mask: int, symbol: str, budget: float) -> Dict:
+        started = time.perf_counter()
+        self.deadline = started + budget
+        self.nodes = 0
+        if len(self.table) > TABLE_LIMIT:
+            self.table.clear()
+
+        mine, theirs = (x_mask, o_mask) if symbol == 'X' else (o_mask, x_mask)
+        turn = 0 if symbol == 'X' else 1
+        position_hash = self._hash(x_mask, o_mask)
+        moves = self._ordered_moves(mine, theirs, None)
+
+        # Play a win, or else block a loss, on the spot, wherever move
+        # ordering ranked it; otherwise keep the best move of the deepest
+        # search that finished in time
+        forced = next((move for move in moves if self._wins(mine, move)), None)
+        if forced is None:
+            forced = next((move for move in moves if self._wins(theirs, move)), None)
+        best, depth_reached = moves[0] if forced is None else forced, 0
+        if forced is None:
+            empties = bin(self.full & ~(mine | theirs)).count('1')
+            for depth in range(1, empties + 1):
+                try:
+                    score, move = self._root(mine, theirs, position_hash, turn, depth, moves)
+                except SearchTimeout:
+                    break
+                best, depth_reached = move, depth
+                moves.remove(move)
+                moves.insert(0, move)
+                if abs(score) >= WIN_SCORE:
+                    break
+
+        return {
+            'position': best,
+            'depth': depth_reached,
+            'nodes': self.nodes,
+            'seconds': time.perf_counter() - started,
+        }
+
+    def _root(self, mine: int, theirs: int, position_hash: int, turn: int, depth: int,
+              moves: List[int]) -> Tuple[int, int]:
+        alpha, beta = -WIN_SCORE * 2, WIN_SCORE * 2
+        best_move = moves[0]
+        for position in moves:
+            score = -self._negamax(theirs, mine | 1 << position,
+                                   position_hash ^ self.keys[position][turn], 1 - turn,
+                                   depth - 1, -beta, -alpha, position)
+            if score > alpha:
+                alpha, best_move = score, position
+        return alpha, best_move
+
+    def _negamax(self, mine: int, theirs: int, position_hash: int, turn: int, depth: int,
+                 alpha: int, beta: int, last_move: int) -> int:
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        # The opponent just moved; did that complete a line?
+        if self._wins(theirs, last_move, placed=True):
+            return -WIN_SCORE - depth
+        occupied = mine | theirs
+        if occupied == self.full:
+            return 0
+        if depth == 0:
+            return self._evaluate(mine, theirs)
+
+        original_alpha = alpha
+        entry = self.table.get(position_hash)
+        hint = None
+        if entry is not None:
+            entry_depth, entry_score, flag, hint = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER and entry_score > alpha:
+                    alpha = entry_score
+                elif flag == UPPER and entry_score < beta:
+                    beta = entry_score
+                if alpha >= beta:
+                    return entry_score
+
+        best_score, best_move = -WIN_SCORE * 2, None
+        for position in self._ordered_moves(mine, theirs, hint):
+            score = -self._negamax(theirs, mine | 1 << position,
+                                   position_hash ^ self.keys[position][turn], 1 - turn,
+                                   depth - 1, -beta, -alpha, position)
+            if score > best_score:
+                best_score, best_move = score, position
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[position_hash] = (depth, best_score, flag, best_move)
+        return best_score
+
+    def _wins(self, mask: int, position: int, placed: bool = False) -> bool:
+        """Whether mask has (placed) or would have a full line through position"""
+        if not placed:
+            mask |= 1 << position
+        for line in self.cell_lines[position]:
+            if mask & line == line:
+                return True
+        return False
+
+    def _evaluate(self, mine: int, theirs: int) -> int:
+        score = 0
+        for line in self.line_masks:
+            own = mine & line
+            other = theirs & line
+            if own and not other:
+                score += LINE_WEIGHTS[bin(own).count('1')]
+            elif other and not own:
+                score -= LINE_WEIGHTS[bin(other).count('1')]
+        return score
+
+    def _ordered_moves(self, mine: int, theirs: int, hint: Optional[int]) -> List[int]:
+        occupied = mine | theirs
+        if not occupied:
+            center = self.grid_size // 2
+            return [center * self.grid_size + center]
+
+        # Only cells touching a stone are worth considering
+        near = (occupied | (occupied << 1) & self.not_first_column
+                | (occupied >> 1) & self.not_last_column)
+        near = (near | near << self.grid_size | near >> self.grid_size) & self.full & ~occupied
+        candidates = [position for position in range(self.full.bit_length()) if near >> position & 1]
+
+        def priority(position: int) -> int:
+            # Stones this move would add to or block in lines still open
+            total = 0
+            for line in self.cell_lines[position]:
+                own = mine & line
+                other = theirs & line
+                if not other:
+                    total += LINE_WEIGHTS[bin(own).count('1')] * 2
+                if not own:
+                    total += LINE_WEIGHTS[bin(other).count('1')]
+            return total
+
+        candidates.sort(key=priority, reverse=True)
+        if hint in candidates:
+            candidates.remove(hint)
+            candidates.insert(0, hint)
+        return candidates
+
+    def _hash(self, x_mask: int, o_mask: int) -> int:
+        position_hash = 0
+        for position, (x_key, o_key) in enumerate(self.keys):
+            if x_mask >> position & 1:
+                position_hash ^= x_key
+            elif o_mask >> position & 1:
+                position_hash ^= o_key
+        return position_hash
+
+
+# One searcher per board shape in each worker process
+_searchers: Dict[Tuple[int, int], Search] = {}
+
+
+def choose_move(grid_size: int, win_length: int, x_mask: int, o_mask: int, symbol: str,
+                budget: float = MOVE_BUDGET) -> Dict:
+    """Pick the bot's move; runs in a pool worker for searched boards"""
+    if grid_size == 3 and win_length == 3:
+        mine, theirs = (x_mask, o_mask) if symbol == 'X' else (o_mask, x_mask)
+        position = perfect_play_table().get((mine, theirs))
+        if position is not None:
+            return {'position': position, 'depth': None, 'nodes': 0, 'seconds': 0.0}
+
+    searcher = _searchers.get((grid_size, win_length))
+    if searcher is None:
+        searcher = _searchers[(grid_size, win_length)] = Search(grid_size, win_length)
+    return searcher.choose(x_mask, o_mask, symbol, budget)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _exit_with_parent():
+    """Worker initializer: exit when the server does, even if it was killed outright"""
+    sentinel = multiprocessing.parent_process().sentinel
+    threading.Thread(target=lambda: (multiprocessing.connection.wait([sentinel]), os._exit(0)),
+                     daemon=True).start()
+
+
+def start_pool() -> ProcessPoolExecutor:
+    """Start the search workers, or replace a broken pool; app.py calls this at startup
+
+    Workers are spawned, not forked, so they never inherit the server's
+    threads or gevent/eventlet patching. Spawning re-imports the parent's
+    __main__ in every child, which for the server is app.py, so __main__ is
+    swapped for a bare module while the workers launch: they import only bot.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = ProcessPoolExecutor(BOT_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_exit_with_parent)
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = types.ModuleType('__main__')
+            try:
+                # The executor launches a worker per submit until all are busy
+                warmups = [pool.submit(os.getpid) for _ in range(BOT_WORKERS)]
+            finally:
+                sys.modules['__main__'] = main
+            for future in warmups:
+                future.result()
+            _pool = pool
+    return _pool
+
+
+def submit_move(grid_size: int, win_length: int, x_mask: int, o_mask: int, symbol: str,
+                budget: float = MOVE_BUDGET) -> Future:
+    """choose_move() in the worker pool, or inline for table lookups"""
+    if grid_size == 3 and win_length == 3:
+        future = Future()
+        future.set_result(choose_move(grid_size, win_length, x_mask, o_mask, symbol, budget))
+        return future
+    args = (grid_size, win_length, x_mask, o_mask, symbol, budget)
+    pool = start_pool()
+    try:
+        future = pool.submit(choose_move, *args)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        pool = start_pool()
+        future = pool.submit(choose_move, *args)
+    future.add_done_callback(lambda done: _discard_if_broken(pool, done))
+    return future
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next start_pool() replaces it"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _discard_if_broken(pool: ProcessPoolExecutor, future: Future):
+    # A worker that dies mid-search (killed, out of memory) breaks the
+    # whole pool, and it refuses every later submit
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _discard_pool(pool)
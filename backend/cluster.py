@@ -0,0 +1,505 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Run several app.py workers that share rooms and broadcasts.
+
+Two pieces make rooms independent of the worker a client is connected to:
+
+* Room state lives in shard processes, each owning a GameManager. Room ids
+  are routed to their owning shard by hash, so every worker sees the same
+  room no matter which worker created it.
+* Broadcasts go through a message queue, so ``emit(..., room=room_id)``
+  reaches clients connected to any worker.
+
+This module provides local implementations of both over Unix sockets, so a
+cluster runs on one machine with no external services:
+
+    python cluster.py --workers 4 --shards 2 --port 5000
+
+Workers listen on consecutive ports and need a load balancer with sticky
+sessions in front of them (e.g. nginx ``ip_hash``), as Socket.IO long
+polling requires. app.py picks the backends from the environment:
+
+* ``MESSAGE_QUEUE``: ``unix:///path/broker.sock`` for the local broker,
+  or any URL Flask-SocketIO supports natively (``redis://``, ``amqp://``...)
+* ``ROOM_SHARDS``: comma separated shard socket paths. A shared store such
+  as Redis can replace the shards by implementing the GameManager methods
+  listed in ``SHARD_METHODS``.
+"""
+
+import argparse
+import heapq
+import logging
+import os
+import pickle
+import queue
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional
+
+import socketio
+
+from wire import FanoutManager
+
+logger = logging.getLogger('tictactoe')
+
+_HEADER = struct.Struct('!I')
+
+# GameManager methods served by shards. Those taking a room id first are
+# routed to the room's owning shard; the rest are answered by every shard.
+ROOM_METHODS = (
+    'create_room', 'join_room', 'make_move', 'restart_game', 'get_game_state',
+    'get_game_state_json', 'get_game_state_variants', 'get_player', 'get_players_info',
+    'get_resume_token', 'resume_session', 'get_replay', 'get_catch_up', 'export_move_log',
+    'add_spectator', 'get_spectator', 'count_spectators', 'get_turn_snapshot',
+)
+SHARD_METHODS = ROOM_METHODS + (
+    'get_player_room', 'player_disconnect', 'suspend_player', 'remove_spectator',
+    'get_available_rooms', 'count_available_rooms',
+    'get_state_cache_stats', 'get_room_counts', 'reap_expired', 'expire_turns',
+    'get_rating_leaderboard', 'get_player_rating', 'record_ratings',
+)
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError('socket closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return _recv_exact(sock, size)
+
+
+def _connect(path: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    return sock
+
+
+def _listen(path: str) -> socket.socket:
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(128)
+    return server
+
+
+def _unix_path(url: str) -> str:
+    return url[len('unix://'):] if url.startswith('unix://') else url
+
+
+class MessageBroker:
+    """Relays every published frame to every subscriber.
+
+    Each connection starts with a b'pub' or b'sub' frame. Frames are
+    forwarded without being decoded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.subscribers: List[socket.socket] = []
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        server = _listen(self.path)
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        try:
+            role = _recv_frame(conn)
+            if role == b'sub':
+                with self._lock:
+                    self.subscribers.append(conn)
+                return
+            while True:
+                self._relay(_recv_frame(conn))
+        except (ConnectionError, OSError):
+            conn.close()
+
+    def _relay(self, payload: bytes):
+        with self._lock:
+            for subscriber in list(self.subscribers):
+                try:
+                    _send_frame(subscriber, payload)
+                except OSError:
+                    self.subscribers.remove(subscriber)
+                    subscriber.close()
+
+
+class UnixSocketManager(socketio.PubSubManager, FanoutManager):
+    """Socket.IO client manager backed by a local MessageBroker.
+
+    Plays the same role as socketio.RedisManager: every worker publishes its
+    emits to the broker and delivers the ones addressed to its own clients.
+    """
+
+    name = 'unix'
+
+    def __init__(self, url: str, channel: str = 'socketio', write_only: bool = False,
+                 logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = _unix_path(url)
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+    def _publish(self, data):
+        payload = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        with self._publish_lock:
+            for retry in (False, True):
+                try:
+                    if self._publisher is None:
+                        self._publisher = _connect(self.path)
+                        _send_frame(self._publisher, b'pub')
+                    _send_frame(self._publisher, payload)
+                    return
+                except OSError:
+                    self._publisher = None
+                    if retry:
+                        raise
+
+    def _listen(self):
+        while True:
+            try:
+                sock = _connect(self.path)
+                _send_frame(sock, b'sub')
+                while True:
+                    yield pickle.loads(_recv_frame(sock))
+            except (ConnectionError, OSError):
+                self._get_logger().error('Cannot reach message broker at %s, retrying', self.path)
+                time.sleep(1)
+
+
+class ShardServer:
+    """Serves one GameManager to the workers over a Unix socket"""
+
+    def __init__(self, path: str, game_manager, message_queue: Optional[str] = None,
+                 lobby_room: str = 'lobby'):
+        self.path = path
+        self.game_manager = game_manager
+
+        # Lobby changes happen here, so push them to lobby subscribers on
+        # every worker through the message queue (lobby_room must match
+        # app.LOBBY_ROOM)
+        if message_queue:
+            external = UnixSocketManager(message_queue, write_only=True)
+            game_manager.lobby_listeners.append(
+                lambda change, entry: external.emit(
+                    'lobby_update', {'type': change, 'room': entry},
+                    namespace='/', room=lobby_room))
+
+    def serve_forever(self):
+        server = _listen(self.path)
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        try:
+            while True:
+                method, args, kwargs = pickle.loads(_recv_frame(conn))
+                try:
+                    if method not in SHARD_METHODS:
+                        raise AttributeError(f'{method} is not served by shards')
+                    reply = ('ok', getattr(self.game_manager, method)(*args, **kwargs))
+                except Exception as e:
+                    reply = ('error', f'{type(e).__name__}: {e}')
+                _send_frame(conn, pickle.dumps(reply, pickle.HIGHEST_PROTOCOL))
+        except (ConnectionError, OSError):
+            conn.close()
+
+
+class ShardClient:
+    """Pooled connections to one ShardServer"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+
+    def call(self, method: str, *args, **kwargs):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = _connect(self.path)
+
+        try:
+            _send_frame(conn, pickle.dumps((method, args, kwargs), pickle.HIGHEST_PROTOCOL))
+            status, result = pickle.loads(_recv_frame(conn))
+        except Exception:
+            conn.close()
+            raise
+        self._pool.put(conn)
+
+        if status == 'error':
+            raise RuntimeError(f'Shard {self.path} failed {method}: {result}')
+        return result
+
+
+class ShardedGameManager:
+    """GameManager stand-in that routes each room to its owning shard.
+
+    Room methods are forwarded to the shard picked by a stable hash of the
+    room id. Players are tracked locally, since a player's sid only exists on
+    the worker they are connected to.
+    """
+
+    def __init__(self, shard_paths: List[str]):
+        self.shards = [ShardClient(path) for path in shard_paths]
+        self.player_rooms: Dict[str, str] = {}  # {player_id: room_id}, this worker only
+        self.spectator_rooms: Dict[str, str] = {}  # {spectator_id: room_id}, this worker only
+        # Shards push lobby updates themselves
+        self.lobby_listeners = []
+
+    def shard_for(self, room_id: str) -> ShardClient:
+        # crc32 rather than hash(), which is salted differently per process
+        return self.shards[zlib.crc32(room_id.encode()) % len(self.shards)]
+
+    def __getattr__(self, name: str):
+        if name not in ROOM_METHODS:
+            raise AttributeError(name)
+
+        def call(room_id: str, *args, **kwargs):
+            return self.shard_for(room_id).call(name, room_id, *args, **kwargs)
+        return call
+
+    def create_room(self, room_id: str, player_id: str, player_name: str, grid_size: int = 3,
+                    time_control: Optional[Dict] = None) -> bool:
+        created = self.shard_for(room_id).call('create_room', room_id, player_id, player_name,
+                                               grid_size, time_control)
+        if created:
+            self.player_rooms[player_id] = room_id
+        return created
+
+    def join_room(self, room_id: str, player_id: str, player_name: str) -> Dict:
+        result = self.shard_for(room_id).call('join_room', room_id, player_id, player_name)
+        if result['success']:
+            self.player_rooms[player_id] = room_id
+        return result
+
+    def resume_session(self, room_id: str, resume_token: str, player_id: str) -> Dict:
+        result = self.shard_for(room_id).call('resume_session', room_id, resume_token, player_id)
+        if result['success']:
+            self.player_rooms[player_id] = room_id
+        return result
+
+    def add_spectator(self, room_id: str, spectator_id: str, name: str) -> Dict:
+        result = self.shard_for(room_id).call('add_spectator', room_id, spectator_id, name)
+        if result['success']:
+            self.spectator_rooms[spectator_id] = room_id
+        return result
+
+    def remove_spectator(self, spectator_id: str) -> Optional[str]:
+        room_id = self.spectator_rooms.pop(spectator_id, None)
+        if not room_id:
+            return None
+        return self.shard_for(room_id).call('remove_spectator', spectator_id)
+
+    def get_player_room(self, player_id: str) -> Optional[str]:
+        # A room can close from another worker (the opponent left, that
+        # worker's reaper evicted it) without this map hearing of it, so a
+        # hit is confirmed with the room's shard. A miss needs no check:
+        # this player's rooms are only ever entered through this worker.
+        room_id = self.player_rooms.get(player_id)
+        if room_id is None:
+            return None
+        if self.shard_for(room_id).call('get_player_room', player_id) != room_id:
+            if self.player_rooms.get(player_id) == room_id:
+                del self.player_rooms[player_id]
+            return None
+        return room_id
+
+    def suspend_player(self, player_id: str) -> Optional[str]:
+        room_id = self.player_rooms.pop(player_id, None)
+        if not room_id:
+            return None
+        return self.shard_for(room_id).call('suspend_player', player_id)
+
+    def player_disconnect(self, player_id: str) -> Optional[str]:
+        room_id = self.player_rooms.pop(player_id, None)
+        if not room_id:
+            return None
+        return self.shard_for(room_id).call('player_disconnect', player_id)
+
+    def get_available_rooms(self, grid_size: Optional[int] = None, offset: int = 0,
+                            limit: Optional[int] = None, newest_first: bool = False) -> List[Dict]:
+        # Each shard returns its first offset + limit rooms in order; merging
+        # those gives the same page a single GameManager would
+        stop = offset + limit if limit is not None else None
+        pages = [shard.call('get_available_rooms', grid_size, 0, stop, newest_first)
+                 for shard in self.shards]
+        merged = heapq.merge(*pages, key=lambda entry: entry['created_at'], reverse=newest_first)
+        return list(islice(merged, offset, stop))
+
+    def count_available_rooms(self, grid_size: Optional[int] = None) -> int:
+        return sum(shard.call('count_available_rooms', grid_size) for shard in self.shards)
+
+    def get_state_cache_stats(self) -> Dict:
+        hits = misses = 0
+        for shard in self.shards:
+            stats = shard.call('get_state_cache_stats')
+            hits += stats['hits']
+            misses += stats['misses']
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+    def reap_expired(self, now: Optional[float] = None) -> List[Dict]:
+        evicted = []
+        for shard in self.shards:
+            evicted.extend(shard.call('reap_expired', now))
+        for eviction in evicted:
+            for player_id in eviction['player_ids']:
+                self.player_rooms.pop(player_id, None)
+            for spectator_id in eviction['spectator_ids']:
+                self.spectator_rooms.pop(spectator_id, None)
+        return evicted
+
+    def expire_turns(self, now: Optional[float] = None) -> List[Dict]:
+        timeouts = []
+        for shard in self.shards:
+            timeouts.extend(shard.call('expire_turns', now))
+        return timeouts
+
+    def get_rating_leaderboard(self, count: int = 10, offset: int = 0) -> Optional[Dict]:
+        return self.shards[0].call('get_rating_leaderboard', count, offset)
+
+    def get_player_rating(self, player_name: str, radius: int = 5) -> Optional[Dict]:
+        return self.shards[0].call('get_player_rating', player_name, radius)
+
+    def get_room_counts(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for shard in self.shards:
+            for grid_size, rooms in shard.call('get_room_counts').items():
+                counts[grid_size] = counts.get(grid_size, 0) + rooms
+        return counts
+
+
+def _run_broker(path: str):
+    MessageBroker(path).serve_forever()
+
+
+class RatingForwarder:
+    """Stands in for the RatingService on shards that don't own it.
+
+    Ratings are global, so one shard keeps them all. The others queue their
+    results and hand them over in batches, off the move path.
+    """
+
+    def __init__(self, rating_shard: str, interval: float = 0.2):
+        self.client = ShardClient(rating_shard)
+        self.interval = interval
+        self._pending = deque()
+        threading.Thread(target=self._forward_loop, daemon=True).start()
+
+    def record_result(self, x_name: str, o_name: str, winner: Optional[str]):
+        self._pending.append((x_name, o_name, winner))
+
+    def _forward_loop(self):
+        while True:
+            time.sleep(self.interval)
+            batch = []
+            while self._pending:
+                batch.append(self._pending.popleft())
+            if batch:
+                try:
+                    self.client.call('record_ratings', batch)
+                except Exception:
+                    logger.exception('forwarding %d rating results failed', len(batch))
+
+
+def _run_shard(path: str, message_queue: str, rating_shard: str):
+    from game_logic import GameManager
+    from rating import RatingService
+    from snapshot import open_room_snapshots
+    from storage import open_match_store
+    match_store = open_match_store()
+    ratings = RatingService(match_store) if path == rating_shard else RatingForwarder(rating_shard)
+    game_manager = GameManager(match_store=match_store, ratings=ratings)
+    # Each shard snapshots its own rooms. Room ids hash to shards by crc32,
+    # so they come back on the same shard as long as the shard count stays.
+    room_snapshots = open_room_snapshots(game_manager, os.path.splitext(os.path.basename(path))[0])
+    if room_snapshots:
+        room_snapshots.restore()
+        threading.Thread(target=room_snapshots.run_forever, daemon=True).start()
+    ShardServer(path, game_manager, message_queue).serve_forever()
+
+
+def _wait_for_socket(path: str, timeout: float = 10.0):
+    deadline = time.time() + timeout
+    while not os.path.exists(path):
+        if time.time() > deadline:
+            raise RuntimeError(f'{path} did not come up')
+        time.sleep(0.05)
+
+
+def main():
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=2, help='app.py worker processes')
+    parser.add_argument('--shards', type=int, default=2, help='room state shard processes')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)),
+                        help='port of the first worker; the others use the next ones')
+    parser.add_argument('--run-dir', default='/tmp/tictactoe-cluster',
+                        help='directory for the Unix sockets')
+    args = parser.parse_args()
+
+    os.makedirs(args.run_dir, mode=0o700, exist_ok=True)
+    broker_path = os.path.join(args.run_dir, 'broker.sock')
+    shard_paths = [os.path.join(args.run_dir, f'shard-{i}.sock') for i in range(args.shards)]
+    message_queue = f'unix://{broker_path}'
+
+    services = [multiprocessing.Process(target=_run_broker, args=(broker_path,), daemon=True)]
+    # The first shard owns the global ratings; the others forward results to it
+    services += [multiprocessing.Process(target=_run_shard, args=(path, message_queue, shard_paths[0]),
+                                         daemon=True)
+                 for path in shard_paths]
+    for service in services:
+        service.start()
+    for path in [broker_path] + shard_paths:
+        _wait_for_socket(path)
+
+    workers = []
+    for i in range(args.workers):
+        env = dict(os.environ, PORT=str(args.port + i), MESSAGE_QUEUE=message_queue,
+                   ROOM_SHARDS=','.join(shard_paths))
+        workers.append(subprocess.Popen([sys.executable, 'app.py'], env=env,
+                                        cwd=os.path.dirname(os.path.abspath(__file__))))
+        print(f'Worker {i} listening on port {args.port + i}')
+
+    def shutdown(*_):
+        for worker in workers:
+            worker.terminate()
+        for service in services:
+            service.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    while all(worker.poll() is None for worker in workers):
+        time.sleep(1)
+    shutdown()
+
+
+if __name__ == '__main__':
+    main()
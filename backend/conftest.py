@@ -0,0 +1,4 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+# test_server.py is a standalone Socket.IO connection check, run by hand
+collect_ignore = ['test_server.py']
@@ -1,14 +1,161 @@
 # (C) 2025 Bismaya Jyoti Dalei All rights reserved.
 
+import base64
+import bisect
+import json
+import os
+import secrets
+import threading
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import math
 
+from metrics import REGISTRY
+from move_log import MoveLog
+from timers import DeadlineQueue
+
+# (row step, column step) for horizontal, vertical and both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# How often Game.get_state() was served from the per-room snapshot cache
+state_cache_stats = {'hits': 0, 'misses': 0}
+
+# Seconds a room may go without activity before the reaper evicts it:
+# waiting for a second player, mid-game, or sitting on a finished game
+ROOM_TTLS = {
+    'waiting': float(os.environ.get('ROOM_TTL_WAITING', 600)),
+    'playing': float(os.environ.get('ROOM_TTL_PLAYING', 1800)),
+    'finished': float(os.environ.get('ROOM_TTL_FINISHED', 300)),
+}
+
+# Seconds a disconnected player has to resume their seat before the room closes
+RESUME_GRACE = float(os.environ.get('RESUME_GRACE', 30))
+
+# Bounds on the time controls a room can be created with, in seconds
+TIME_CONTROL_SECONDS = (5, 3600)
+MAX_INCREMENT = 60
+
+CHECK_WINNER_SECONDS = REGISTRY.histogram(
+    'game_check_winner_seconds', 'Time to check for a win after a move')
+GET_STATE_SECONDS = REGISTRY.histogram(
+    'game_get_state_seconds', 'Time to rebuild a state snapshot on a cache miss')
+
+
+def default_win_condition(grid_size: int) -> int:
+    """Marks in a row needed to win: the whole row up to 5x5, then 5"""
+    return min(grid_size, 5) if grid_size > 3 else 3
+
+
+def parse_time_control(value) -> Optional[Dict]:
+    """A room's time control from client input, or None for untimed play.
+
+    {'mode': 'move', 'seconds': s} gives every move s seconds.
+    {'mode': 'clock', 'seconds': s, 'increment': i} gives each side s seconds
+    for the whole match, plus i seconds back after each of their moves.
+    Raises ValueError for anything else.
+    """
+    if not value:
+        return None
+    if not isinstance(value, dict) or value.get('mode') not in ('move', 'clock'):
+        raise ValueError('Time control mode must be move or clock')
+    seconds = float(value.get('seconds', 0))
+    low, high = TIME_CONTROL_SECONDS
+    if not low <= seconds <= high:
+        raise ValueError(f'Time control must be {low} to {high} seconds')
+    if value['mode'] == 'move':
+        return {'mode': 'move', 'seconds': seconds}
+    increment = float(value.get('increment', 0))
+    if not 0 <= increment <= MAX_INCREMENT:
+        raise ValueError(f'Increment must be 0 to {MAX_INCREMENT} seconds')
+    return {'mode': 'clock', 'seconds': seconds, 'increment': increment}
+
+
+@lru_cache(maxsize=None)
+def winning_lines(grid_size: int, win_length: int) -> Tuple[tuple, tuple]:
+    """Precompute every winning line for a board shape as (positions, mask).
+
+    Returns all lines ordered the way a top-left to bottom-right scan finds
+    them, plus the same lines grouped by each cell they pass through.
+    Shared by every room with the same grid size and win condition.
+    """
+    all_lines = []
+    lines_by_cell = [[] for _ in range(grid_size * grid_size)]
+
+    for start in range(grid_size * grid_size):
+        row, col = divmod(start, grid_size)
+        for d_row, d_col in DIRECTIONS:
+            end_row = row + d_row * (win_length - 1)
+            end_col = col + d_col * (win_length - 1)
+            if not (0 <= end_row < grid_size and 0 <= end_col < grid_size):
+                continue
+
+            positions = tuple((row + d_row * i) * grid_size + col + d_col * i
+                              for i in range(win_length))
+            mask = 0
+            for pos in positions:
+                mask |= 1 << pos
+
+            line = (positions, mask)
+            all_lines.append(line)
+            for pos in positions:
+                lines_by_cell[pos].append(line)
+
+    return tuple(all_lines), tuple(tuple(lines) for lines in lines_by_cell)
+
+
+# Symbol of each 2-bit packed cell value
+PACKED_SYMBOLS = ('', 'X', 'O', '')
+# Each byte value with its 8 bits moved to the even bits of 16
+_SPREAD_BYTE = tuple(sum((byte >> bit & 1) << (2 * bit) for bit in range(8)) for byte in range(256))
+# The 4 cells held by each packed byte value
+_UNPACK_BYTE = tuple(tuple(PACKED_SYMBOLS[byte >> shift & 3] for shift in (0, 2, 4, 6))
+                     for byte in range(256))
+
+
+def pack_board(x_mask: int, o_mask: int, cells: int) -> bytes:
+    """The board at 2 bits per cell, cell i in bits 2i and 2i+1 (little endian).
+
+    Cells are 0 when empty, 1 for X and 2 for O, so a 10x10 board fits in
+    25 bytes.
+    """
+    packed = 0
+    shift = 0
+    while x_mask or o_mask:
+        packed |= (_SPREAD_BYTE[x_mask & 0xff] | _SPREAD_BYTE[o_mask & 0xff] << 1) << shift
+        x_mask >>= 8
+        o_mask >>= 8
+        shift += 16
+    return packed.to_bytes((cells + 3) // 4, 'little')
+
+
+def unpack_board(data: bytes, cells: int) -> List[str]:
+    """The wire format board list back from pack_board() bytes"""
+    board = [symbol for byte in data for symbol in _UNPACK_BYTE[byte]]
+    del board[cells:]
+    return board
+
+
 class Game:
+    # Compact per-room storage; there can be tens of thousands of live rooms
+    __slots__ = (
+        'grid_size', 'current_turn', 'players', 'game_over', 'winner',
+        'winning_line', 'is_draw', 'created_at', 'last_move_at', 'host_id',
+        'match_count', 'original_player_order', 'session_scores',
+        'match_history', 'room_settings', 'version', '_x_mask', '_o_mask',
+        '_full_mask', '_state_cache', '_state_cache_version', '_state_json',
+        '_state_packed_json',
+        'resume_tokens', 'disconnected', 'move_log', 'turn_started_at', 'clocks',
+    )
+
     def __init__(self, grid_size: int = 3):
         self.grid_size = grid_size
-        self.board = ['' for _ in range(grid_size * grid_size)]
+        # The board is two bitmasks, bit i set when cell i holds that symbol
+        self._x_mask = 0
+        self._o_mask = 0
+        self._full_mask = (1 << (grid_size * grid_size)) - 1
         self.current_turn = 'X'
         self.players = {}  # {player_id: {'name': str, 'symbol': str}}
         self.game_over = False
@@ -27,8 +174,46 @@ class Game:
         
         self.room_settings = {
             'grid_size': grid_size,
-            'win_condition': min(grid_size, 5) if grid_size > 3 else 3
+            'win_condition': default_win_condition(grid_size),
+            'time_control': None  # see parse_time_control
         }
+
+        # With a time control: when the current turn began, and each
+        # symbol's remaining clock time as of then
+        self.turn_started_at = None
+        self.clocks = {}  # {symbol: seconds}
+
+        # Bumped on every state change so clients can apply move deltas in
+        # order and detect when they missed one
+        self.version = 0
+
+        # Snapshot of get_state() for the version it was built at
+        self._state_cache = None
+        self._state_cache_version = -1
+        self._state_json = None
+        self._state_packed_json = None
+
+        # Secret per seat that lets a reconnecting client take it back, and
+        # the resume deadline of each seat whose connection dropped
+        self.resume_tokens = {}  # {player_id: token}
+        self.disconnected = {}  # {player_id: deadline}
+
+        # Every move of the recent matches, for replays and catching up
+        self.move_log = MoveLog(grid_size, self.created_at)
+
+    @property
+    def board(self) -> List[str]:
+        """The board in wire format: one of '', 'X' or 'O' per cell"""
+        x_mask, o_mask = self._x_mask, self._o_mask
+        return ['X' if x_mask >> i & 1 else 'O' if o_mask >> i & 1 else ''
+                for i in range(self.grid_size * self.grid_size)]
+
+    def cell(self, position: int) -> str:
+        if self._x_mask >> position & 1:
+            return 'X'
+        if self._o_mask >> position & 1:
+            return 'O'
+        return ''
         
     def add_player(self, player_id: str, name: str, symbol: str):
         self.players[player_id] = {'name': name, 'symbol': symbol}
@@ -47,13 +232,41 @@ class Game:
         # Store original player order for symbol swapping
         if len(self.original_player_order) < 2:
             self.original_player_order.append(player_id)
+
+        self.resume_tokens[player_id] = secrets.token_urlsafe(16)
+        self.version += 1
+
+    def replace_player_id(self, old_id: str, new_id: str):
+        """Hand a seat, with its symbol, scores and host role, to a new player id"""
+        def rekey(mapping: Dict) -> Dict:
+            return {new_id if pid == old_id else pid: value for pid, value in mapping.items()}
+
+        self.players = rekey(self.players)
+        self.session_scores = rekey(self.session_scores)
+        self.original_player_order = [new_id if pid == old_id else pid
+                                      for pid in self.original_player_order]
+        if self.host_id == old_id:
+            self.host_id = new_id
+
+        # A token is good for one resume
+        del self.resume_tokens[old_id]
+        self.resume_tokens[new_id] = secrets.token_urlsafe(16)
+        self.disconnected.pop(old_id, None)
+        self.version += 1
+
+    def remove_player(self, player_id: str):
+        if player_id in self.players:
+            del self.players[player_id]
+            self.resume_tokens.pop(player_id, None)
+            self.disconnected.pop(player_id, None)
+            self.version += 1
         
     def is_valid_move(self, position: int, player_id: str) -> bool:
         if self.game_over:
             return False
-        if position < 0 or position >= len(self.board):
+        if position < 0 or position >= self.grid_size * self.grid_size:
             return False
-        if self.board[position] != '':
+        if (self._x_mask | self._o_mask) >> position & 1:
             return False
         if player_id not in self.players:
             return False
@@ -66,91 +279,73 @@ class Game:
             return False
             
         symbol = self.players[player_id]['symbol']
-        self.board[position] = symbol
+        if symbol == 'X':
+            self._x_mask |= 1 << position
+        else:
+            self._o_mask |= 1 << position
         self.last_move_at = time.time()
+        if self.turn_started_at is not None:
+            if self.clocks:
+                self.clocks[symbol] += (self.room_settings['time_control']['increment']
+                                        - (self.last_move_at - self.turn_started_at))
+            self.turn_started_at = self.last_move_at
+        self.version += 1
+        self.move_log.record(position, symbol, self.last_move_at, self.version,
+                             self._x_mask, self._o_mask)
         
         # Check for winner
-        winner_result = self.check_winner()
+        started = time.perf_counter()
+        winner_result = self.check_winner(position)
+        CHECK_WINNER_SECONDS.observe(time.perf_counter() - started)
         if winner_result:
             self.game_over = True
             self.winner = winner_result['symbol']
             self.winning_line = winner_result['line']
             self.update_scores(winner_symbol=self.winner)
+            self.move_log.finish_match(self.winner)
         elif self.is_board_full():
             self.game_over = True
             self.is_draw = True
             self.update_scores(is_draw=True)
+            self.move_log.finish_match('draw')
         else:
             # Switch turns
             self.current_turn = 'O' if self.current_turn == 'X' else 'X'
             
         return True
     
-    def check_winner(self) -> Optional[Dict]:
-        win_length = self.room_settings['win_condition']
-        
-        # Check all possible winning lines
-        for start_pos in range(len(self.board)):
-            # Skip empty positions
-            if self.board[start_pos] == '':
-                continue
-                
-            symbol = self.board[start_pos]
-            row = start_pos // self.grid_size
-            col = start_pos % self.grid_size
-            
-            # Check horizontal
-            if col <= self.grid_size - win_length:
-                line = []
-                for i in range(win_length):
-                    pos = row * self.grid_size + col + i
-                    line.append(pos)
-                    if self.board[pos] != symbol:
-                        break
-                else:
-                    return {'symbol': symbol, 'line': line}
-            
-            # Check vertical
-            if row <= self.grid_size - win_length:
-                line = []
-                for i in range(win_length):
-                    pos = (row + i) * self.grid_size + col
-                    line.append(pos)
-                    if self.board[pos] != symbol:
-                        break
-                else:
-                    return {'symbol': symbol, 'line': line}
-            
-            # Check diagonal (top-left to bottom-right)
-            if row <= self.grid_size - win_length and col <= self.grid_size - win_length:
-                line = []
-                for i in range(win_length):
-                    pos = (row + i) * self.grid_size + col + i
-                    line.append(pos)
-                    if self.board[pos] != symbol:
-                        break
-                else:
-                    return {'symbol': symbol, 'line': line}
-            
-            # Check diagonal (top-right to bottom-left)
-            if row <= self.grid_size - win_length and col >= win_length - 1:
-                line = []
-                for i in range(win_length):
-                    pos = (row + i) * self.grid_size + col - i
-                    line.append(pos)
-                    if self.board[pos] != symbol:
-                        break
-                else:
-                    return {'symbol': symbol, 'line': line}
-        
+    def check_winner(self, position: Optional[int] = None) -> Optional[Dict]:
+        """Return the winning symbol and line, if any.
+
+        When ``position`` is given only the lines passing through that cell
+        are checked, which is all that can change after a single move.
+        """
+        all_lines, lines_by_cell = winning_lines(self.grid_size,
+                                                 self.room_settings['win_condition'])
+        if position is not None:
+            symbol = self.cell(position)
+            if symbol == '':
+                return None
+            mask = self._x_mask if symbol == 'X' else self._o_mask
+            for positions, line_mask in lines_by_cell[position]:
+                if mask & line_mask == line_mask:
+                    return {'symbol': symbol, 'line': list(positions)}
+            return None
+
+        for positions, line_mask in all_lines:
+            if self._x_mask & line_mask == line_mask:
+                return {'symbol': 'X', 'line': list(positions)}
+            if self._o_mask & line_mask == line_mask:
+                return {'symbol': 'O', 'line': list(positions)}
         return None
     
     def is_board_full(self) -> bool:
-        return '' not in self.board
+        return self._x_mask | self._o_mask == self._full_mask
     
     def reset(self):
         """Reset the game board and handle symbol swapping"""
-        self.board = ['' for _ in range(self.grid_size * self.grid_size)]
+        self._x_mask = 0
+        self._o_mask = 0
         self.game_over = False
         self.winner = None
         self.winning_line = None
@@ -164,7 +359,46 @@ class Game:
         
         # X always starts first
         self.current_turn = 'X'
+        self.start_turn_clock(self.last_move_at)
+        self.version += 1
+        self.move_log.start_match(self.match_count + 1, self.last_move_at, self.version)
         
+    def player_to_move(self) -> Optional[str]:
+        return next((pid for pid, player in self.players.items()
+                     if player['symbol'] == self.current_turn), None)
+
+    def start_turn_clock(self, now: float):
+        """Start timing a match from now, with full clocks; no-op for untimed rooms"""
+        time_control = self.room_settings['time_control']
+        if time_control is None:
+            return
+        self.turn_started_at = now
+        if time_control['mode'] == 'clock':
+            self.clocks = {'X': time_control['seconds'], 'O': time_control['seconds']}
+
+    @property
+    def turn_deadline(self) -> Optional[float]:
+        """When the player to move runs out of time, or None if nothing is ticking"""
+        if self.turn_started_at is None or self.game_over or len(self.players) < 2:
+            return None
+        if self.clocks:
+            return self.turn_started_at + self.clocks[self.current_turn]
+        return self.turn_started_at + self.room_settings['time_control']['seconds']
+
+    def time_out(self, now: float) -> Optional[str]:
+        """End the match as a loss for the player to move; returns their id"""
+        loser_id = self.player_to_move()
+        if self.clocks:
+            self.clocks[self.current_turn] = 0.0
+        self.game_over = True
+        self.winner = 'O' if self.current_turn == 'X' else 'X'
+        self.winning_line = None
+        self.last_move_at = now
+        self.update_scores(winner_symbol=self.winner, reason='timeout')
+        self.move_log.finish_match(self.winner)
+        self.version += 1
+        return loser_id
+
     def swap_player_symbols(self):
         """Swap X and O symbols between players"""
         player1_id = self.original_player_order[0]
@@ -178,8 +412,9 @@ class Game:
         self.players[player1_id]['symbol'] = player2_symbol
         self.players[player2_id]['symbol'] = player1_symbol
         
-    def update_scores(self, winner_symbol: str = None, is_draw: bool = False):
-        """Update session scores after a match"""
+    def update_scores(self, winner_symbol: str = None, is_draw: bool = False,
+                      reason: Optional[str] = None):
+        """Update session scores after a match; reason is set for matches not won on the board"""
         for player_id, player_data in self.players.items():
             self.session_scores[player_id]['total_matches'] += 1
             
@@ -198,6 +433,8 @@ class Game:
             'is_draw': is_draw,
             'timestamp': time.time()
         }
+        if reason:
+            match_result['reason'] = reason
         
         if winner_symbol and not is_draw:
             winner_player = next((pid for pid, data in self.players.items() 
@@ -235,6 +472,17 @@ class Game:
         }
     
     def get_state(self) -> Dict:
+        """Serialized room state, rebuilt only after the room has changed.
+
+        The snapshot is shared by every caller until the next state change,
+        so it must be treated as read-only.
+        """
+        if self._state_cache_version == self.version:
+            state_cache_stats['hits'] += 1
+            return self._state_cache
+        state_cache_stats['misses'] += 1
+        started = time.perf_counter()
+
         players_with_ids = {}
         for player_id, player_data in self.players.items():
             players_with_ids[player_id] = {
@@ -243,7 +491,7 @@ class Game:
                 'symbol': player_data['symbol']
             }
         
-        return {
+        self._state_cache = {
             'board': self.board,
             'current_turn': self.current_turn,
             'players': players_with_ids,
@@ -252,117 +500,553 @@ class Game:
             'winning_line': self.winning_line,
             'is_draw': self.is_draw,
             'grid_size': self.grid_size,
+            'version': self.version,
             'match_count': self.match_count,
-            'room_settings': self.room_settings,
+            'room_settings': dict(self.room_settings),
+            'session_scores': {pid: dict(scores) for pid, scores in self.session_scores.items()},
+            'match_history': list(self.match_history),
+            'session_leader': self.get_session_leader(),
+            'turn_deadline': self.turn_deadline,
+            'clocks': dict(self.clocks)
+        }
+        self._state_cache_version = self.version
+        self._state_json = None
+        self._state_packed_json = None
+        GET_STATE_SECONDS.observe(time.perf_counter() - started)
+        return self._state_cache
+
+    def get_state_json(self) -> str:
+        """get_state() encoded as JSON, cached alongside the snapshot"""
+        state = self.get_state()
+        if self._state_json is None:
+            self._state_json = json.dumps(state, separators=(',', ':'))
+        return self._state_json
+
+    def get_state_packed_json(self) -> str:
+        """get_state_json() with the board as 'board_packed', base64 of pack_board()"""
+        state = self.get_state()
+        if self._state_packed_json is None:
+            board = base64.b64encode(pack_board(self._x_mask, self._o_mask, self.grid_size * self.grid_size))
+            packed = {'board_packed': board.decode('ascii')}
+            packed.update((key, value) for key, value in state.items() if key != 'board')
+            self._state_packed_json = json.dumps(packed, separators=(',', ':'))
+        return self._state_packed_json
+
+    def to_snapshot(self) -> Dict:
+        """The room's lasting state as plain data, for snapshot.py to write to disk.
+
+        Connections, spectators and the move log are left out: after a
+        restart players come back under new ids through their resume tokens.
+        """
+        return {
+            'grid_size': self.grid_size,
+            'x_mask': self._x_mask,
+            'o_mask': self._o_mask,
+            'current_turn': self.current_turn,
+            'players': self.players,
+            'game_over': self.game_over,
+            'winner': self.winner,
+            'winning_line': self.winning_line,
+            'is_draw': self.is_draw,
+            'created_at': self.created_at,
+            'last_move_at': self.last_move_at,
+            'host_id': self.host_id,
+            'match_count': self.match_count,
+            'original_player_order': self.original_player_order,
             'session_scores': self.session_scores,
             'match_history': self.match_history,
-            'session_leader': self.get_session_leader()
+            'room_settings': self.room_settings,
+            'version': self.version,
+            'resume_tokens': self.resume_tokens,
+            'turn_started_at': self.turn_started_at,
+            'clocks': self.clocks,
         }
 
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> 'Game':
+        """Rebuild a room from to_snapshot() output"""
+        game = cls(snapshot['grid_size'])
+        game._x_mask = snapshot['x_mask']
+        game._o_mask = snapshot['o_mask']
+        for name in ('current_turn', 'players', 'game_over', 'winner', 'winning_line', 'is_draw',
+                     'created_at', 'last_move_at', 'host_id', 'match_count', 'original_player_order',
+                     'session_scores', 'match_history', 'room_settings', 'version',
+                     'resume_tokens', 'turn_started_at', 'clocks'):
+            setattr(game, name, snapshot[name])
+
+        # The log restarts at the restored position; catch-up works from
+        # there, replays of earlier moves are gone
+        match = game.move_log.current
+        match.match_number = game.match_count + 1
+        match.snapshots[0] = (0, game.version, game._x_mask, game._o_mask)
+        return game
+
+def _insert_by_created_at(index: Dict[str, Dict], room_id: str, entry: Dict):
+    """Add a lobby entry to an index kept in created_at order.
+
+    New rooms go on the end. A room listed again later (its host resumed,
+    or it was restored after a restart) is older than that, and the index
+    is rebuilt around it so paging and ShardedGameManager's merge of
+    shards still see created_at order.
+    """
+    if not index or next(reversed(index.values()))['created_at'] <= entry['created_at']:
+        index[room_id] = entry
+        return
+    items = list(index.items())
+    position = bisect.bisect_right([listed['created_at'] for _, listed in items],
+                                   entry['created_at'])
+    items.insert(position, (room_id, entry))
+    index.clear()
+    index.update(items)
+
+
 class GameManager:
-    def __init__(self):
+    # Rooms hash onto a fixed set of locks, so unrelated rooms rarely contend
+    LOCK_STRIPES = 64
+
+    def __init__(self, lock_stripes: int = LOCK_STRIPES, room_ttls: Optional[Dict[str, float]] = None,
+                 resume_grace: float = RESUME_GRACE, match_store=None, ratings=None):
         self.games: Dict[str, Game] = {}
         self.player_rooms: Dict[str, str] = {}  # {player_id: room_id}
+        self.room_members: Dict[str, Set[str]] = {}  # {room_id: {player_id}}
+        self.rooms_by_size: Dict[int, int] = {}  # {grid_size: live rooms}
+        self.spectators: Dict[str, Dict[str, str]] = {}  # {room_id: {spectator_id: name}}
+        self.spectator_rooms: Dict[str, str] = {}  # {spectator_id: room_id}
+
+        # Lobby index of rooms waiting for a second player, in created_at
+        # order (see _insert_by_created_at)
+        self.open_rooms: Dict[str, Dict] = {}  # {room_id: lobby entry}
+        self.open_rooms_by_size: Dict[int, Dict[str, Dict]] = {}
+
+        # Called with ('added', entry) or ('removed', entry) on lobby changes
+        self.lobby_listeners: List[Callable[[str, Dict], None]] = []
+
+        # A room's Game and its entries in the maps above are only changed
+        # while holding that room's lock. The lobby index and room counts are
+        # shared by all rooms and have their own lock, always taken after a
+        # room lock.
+        self._room_locks = [threading.RLock() for _ in range(lock_stripes)]
+        self._index_lock = threading.Lock()
+
+        # Rooms ordered by when the reaper should next look at them
+        self.room_ttls = dict(ROOM_TTLS, **(room_ttls or {}))
+        self.room_expiry = DeadlineQueue()
+        self.resume_grace = resume_grace
+
+        # Rooms with a time control, ordered by when the player to move runs
+        # out of time. One queue for every room: expire_turns() only touches
+        # rooms that are due, however many clocks are running.
+        self.turn_deadlines = DeadlineQueue()
+
+        # Optional storage.MatchStore that keeps finished matches past the room,
+        # and rating.RatingService that ranks players across rooms
+        self.match_store = match_store
+        self.ratings = ratings
+
+        # Rooms changed since snapshot.RoomSnapshotter last wrote them out.
+        # None until a snapshotter turns tracking on.
+        self.dirty_rooms: Optional[Set[str]] = None
+
+    def room_lock(self, room_id: str) -> threading.RLock:
+        return self._room_locks[hash(room_id) % len(self._room_locks)]
+
+    def _mark_dirty(self, room_id: str):
+        # set.add is atomic, so this needs no lock of its own
+        if self.dirty_rooms is not None:
+            self.dirty_rooms.add(room_id)
         
-    def create_room(self, room_id: str, player_id: str, player_name: str, grid_size: int = 3) -> bool:
-        if room_id in self.games:
-            return False
-        
-        # Validate grid size
-        if grid_size < 3 or grid_size > 10:
-            grid_size = 3
+    def create_room(self, room_id: str, player_id: str, player_name: str, grid_size: int = 3,
+                    time_control: Optional[Dict] = None) -> bool:
+        """Open a room; time_control comes from parse_time_control()"""
+        with self.room_lock(room_id):
+            if room_id in self.games:
+                return False
             
-        game = Game(grid_size)
-        game.add_player(player_id, player_name, 'X')
-        self.games[room_id] = game
-        self.player_rooms[player_id] = room_id
-        return True
+            # Validate grid size
+            if grid_size < 3 or grid_size > 10:
+                grid_size = 3
+                
+            game = Game(grid_size)
+            game.room_settings['time_control'] = time_control
+            game.add_player(player_id, player_name, 'X')
+            self.games[room_id] = game
+            self.player_rooms[player_id] = room_id
+            self.room_members[room_id] = {player_id}
+            with self._index_lock:
+                self.rooms_by_size[grid_size] = self.rooms_by_size.get(grid_size, 0) + 1
+            self._open_room(room_id, game, player_name)
+            self.room_expiry.schedule(room_id, game.created_at + self.room_ttls['waiting'])
+            self._mark_dirty(room_id)
+            return True
     
     def join_room(self, room_id: str, player_id: str, player_name: str) -> Dict:
-        if room_id not in self.games:
-            return {'success': False, 'message': 'Room not found'}
+        with self.room_lock(room_id):
+            if room_id not in self.games:
+                return {'success': False, 'message': 'Room not found'}
+                
+            game = self.games[room_id]
+            if len(game.players) >= 2:
+                return {'success': False, 'message': 'Room is full'}
+                
+            # Second player gets 'O'
+            game.add_player(player_id, player_name, 'O')
+            # The idle clock for a game starts when it starts, and so do turn clocks
+            game.last_move_at = time.time()
+            game.start_turn_clock(game.last_move_at)
+            self._schedule_turn(room_id, game)
+            self.player_rooms[player_id] = room_id
+            self.room_members[room_id].add(player_id)
+            self._close_room(room_id)
+            self._mark_dirty(room_id)
             
-        game = self.games[room_id]
-        if len(game.players) >= 2:
-            return {'success': False, 'message': 'Room is full'}
+            # Get opponent info
+            opponent_id = [pid for pid in game.players.keys() if pid != player_id][0]
+            opponent = dict(game.players[opponent_id])
             
-        # Second player gets 'O'
-        game.add_player(player_id, player_name, 'O')
-        self.player_rooms[player_id] = room_id
-        
-        # Get opponent info
-        opponent_id = [pid for pid in game.players.keys() if pid != player_id][0]
-        opponent = game.players[opponent_id]
-        
-        return {
-            'success': True,
-            'symbol': 'O',
-            'opponent': opponent,
-            'game_state': game.get_state()
-        }
-    
+            return {
+                'success': True,
+                'symbol': 'O',
+                'opponent': opponent,
+                'resume_token': game.resume_tokens[player_id],
+                'game_state': game.get_state()
+            }
+
+    def create_match_rooms(self, grid_size: int, matches: List[Tuple[str, List[Tuple[str, str]]]],
+                           time_control: Optional[Dict] = None) -> List[Dict]:
+        """Open a batch of rooms with both players seated and the game started,
+        as for tournament matches. They never appear in the lobby, and are
+        marked in room_settings so snapshot.py leaves them out: tournaments
+        live in memory only, so a room restored after a restart would have
+        no tournament to report its result to.
+
+        matches holds (room_id, [(player_id, name) for X, (player_id, name) for O]).
+        Returns one result per match, in order: 'resume_tokens' and the state
+        as get_game_state_variants() on success, 'busy_ids' of the players
+        seated elsewhere on failure.
+        """
+        if grid_size < 3 or grid_size > 10:
+            grid_size = 3
+        results = []
+        for room_id, players in matches:
+            with self.room_lock(room_id):
+                if room_id in self.games:
+                    results.append({'success': False, 'message': 'Room already exists',
+                                    'busy_ids': []})
+                    continue
+                busy = [pid for pid, _ in players if pid in self.player_rooms]
+                if busy:
+                    results.append({'success': False, 'message': 'Player already in a room',
+                                    'busy_ids': busy})
+                    continue
+
+                game = Game(grid_size)
+                game.room_settings['time_control'] = time_control
+                game.room_settings['tournament'] = True
+                for (player_id, name), symbol in zip(players, ('X', 'O')):
+                    game.add_player(player_id, name, symbol)
+                    self.player_rooms[player_id] = room_id
+                game.start_turn_clock(game.last_move_at)
+                self.games[room_id] = game
+                self.room_members[room_id] = {pid for pid, _ in players}
+                self.room_expiry.schedule(room_id, game.last_move_at + self.room_ttls['playing'])
+                self._schedule_turn(room_id, game)
+                self._mark_dirty(room_id)
+                results.append({
+                    'success': True,
+                    'resume_tokens': dict(game.resume_tokens),
+                    'game_state_variants': (game.get_state_json(), game.get_state_packed_json()),
+                })
+
+        # One pass over the shared counts for the whole batch
+        created = sum(result['success'] for result in results)
+        if created:
+            with self._index_lock:
+                self.rooms_by_size[grid_size] = self.rooms_by_size.get(grid_size, 0) + created
+        return results
+
+    def get_turn_snapshot(self, room_id: str) -> Optional[Dict]:
+        """The position and the player to move, for a bot to search on"""
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            if not game or game.game_over or len(game.players) < 2:
+                return None
+            player_id = next(pid for pid, player in game.players.items()
+                             if player['symbol'] == game.current_turn)
+            return {
+                'player_id': player_id,
+                'symbol': game.current_turn,
+                'grid_size': game.grid_size,
+                'win_condition': game.room_settings['win_condition'],
+                'x_mask': game._x_mask,
+                'o_mask': game._o_mask,
+                'version': game.version,
+            }
+
     def make_move(self, room_id: str, player_id: str, position: int) -> Dict:
-        if room_id not in self.games:
-            return {'success': False, 'message': 'Room not found'}
+        with self.room_lock(room_id):
+            if room_id not in self.games:
+                return {'success': False, 'message': 'Room not found'}
+                
+            game = self.games[room_id]
+            # Out of time is settled by expire_turns, even if it hasn't run yet
+            deadline = game.turn_deadline
+            if deadline is not None and time.time() >= deadline:
+                return {'success': False, 'message': 'Out of time'}
+            if not game.make_move(position, player_id):
+                return {'success': False, 'message': 'Invalid move'}
+            self._schedule_turn(room_id, game)
+            self._mark_dirty(room_id)
             
-        game = self.games[room_id]
-        if not game.make_move(position, player_id):
-            return {'success': False, 'message': 'Invalid move'}
-        
-        result = {
-            'success': True,
-            'symbol': game.players[player_id]['symbol'],
-            'player_name': game.players[player_id]['name'],
-            'board': game.board,
-            'current_turn': game.current_turn,
-            'game_over': game.game_over
-        }
-        
-        if game.game_over:
-            if game.winner:
-                winner_id = [pid for pid, player in game.players.items() 
-                           if player['symbol'] == game.winner][0]
+            # Only the changed cell, the turn and the outcome; clients apply this
+            # on top of their snapshot and resync when `version` skips ahead
+            result = {
+                'success': True,
+                'position': position,
+                'symbol': game.players[player_id]['symbol'],
+                'player_name': game.players[player_id]['name'],
+                'current_turn': game.current_turn,
+                'version': game.version,
+                'game_over': game.game_over,
+                'turn_deadline': game.turn_deadline,
+                'clocks': dict(game.clocks)
+            }
+
+            if not game.game_over:
+                # None while the host is still waiting for an opponent
+                result['next_player_id'] = next((pid for pid, player in game.players.items()
+                                                 if player['symbol'] == game.current_turn), None)
+            
+            if game.game_over:
+                if game.winner:
+                    winner_id = [pid for pid, player in game.players.items() 
+                               if player['symbol'] == game.winner][0]
+                    result.update({
+                        'winner': game.winner,
+                        'winner_name': game.players[winner_id]['name'],
+                        'winning_line': game.winning_line
+                    })
+                else:
+                    result['is_draw'] = True
+
+                # Scores only change when a match ends. Taken from the state
+                # snapshot, which stays valid after the lock is released.
+                state = game.get_state()
                 result.update({
-                    'winner': game.winner,
-                    'winner_name': game.players[winner_id]['name'],
-                    'winning_line': game.winning_line
+                    'session_scores': state['session_scores'],
+                    'match_history': state['match_history'],
+                    'session_leader': state['session_leader']
                 })
-            else:
-                result['is_draw'] = True
-                
-        return result
+                if self.match_store is not None or self.ratings is not None:
+                    self._record_match(room_id, game)
+                    
+            return result
+
+    def _record_match(self, room_id: str, game: Game):
+        names = {player['symbol']: player['name'] for player in game.players.values()}
+        x_name, o_name = names.get('X', ''), names.get('O', '')
+        if self.match_store is not None:
+            self.match_store.record_match((
+                room_id, game.match_history[-1]['match_number'], game.grid_size,
+                x_name, o_name, game.winner, len(game.move_log.current), game.last_move_at,
+            ))
+        if self.ratings is not None:
+            # Bot games are unrated: every bot shares one name, and beating it
+            # on a big board would be rating for free
+            from bot import is_bot  # bot.py imports this module
+            if not any(is_bot(player_id) for player_id in game.players):
+                self.ratings.record_result(x_name, o_name, game.winner)
+
+    def get_rating_leaderboard(self, count: int = 10, offset: int = 0) -> Optional[Dict]:
+        """Top rated players from rank offset + 1, or None without a rating service"""
+        return self.ratings.top(count, offset) if self.ratings is not None else None
+
+    def get_player_rating(self, player_name: str, radius: int = 5) -> Optional[Dict]:
+        if self.ratings is None:
+            return None
+        return self.ratings.player(player_name, radius)
+
+    def record_ratings(self, results: List[Tuple[str, str, Optional[str]]]):
+        """Apply results finished elsewhere, e.g. forwarded from other shards"""
+        if self.ratings is not None:
+            self.ratings.record_results(results)
     
     def restart_game(self, room_id: str, player_id: str) -> Dict:
-        if room_id not in self.games:
-            return {'success': False, 'message': 'Room not found'}
-        
-        game = self.games[room_id]
-        
-        # Only allow host or players in the game to restart
-        if player_id not in game.players:
-            return {'success': False, 'message': 'You are not in this game'}
-        
-        # Store symbol swap info before reset
-        old_symbols = {pid: pdata['symbol'] for pid, pdata in game.players.items()}
-        
-        game.reset()
-        
-        # Get new symbols after reset (which includes swapping)
-        new_symbols = {pid: pdata['symbol'] for pid, pdata in game.players.items()}
-        
-        return {
-            'success': True, 
-            'game_state': game.get_state(),
-            'symbol_changes': {
-                pid: {'old': old_symbols[pid], 'new': new_symbols[pid]} 
-                for pid in game.players.keys()
+        with self.room_lock(room_id):
+            if room_id not in self.games:
+                return {'success': False, 'message': 'Room not found'}
+            
+            game = self.games[room_id]
+            
+            # Only allow host or players in the game to restart
+            if player_id not in game.players:
+                return {'success': False, 'message': 'You are not in this game'}
+            
+            # Store symbol swap info before reset
+            old_symbols = {pid: pdata['symbol'] for pid, pdata in game.players.items()}
+            
+            game.reset()
+            self._schedule_turn(room_id, game)
+            self._mark_dirty(room_id)
+            
+            # Get new symbols after reset (which includes swapping)
+            new_symbols = {pid: pdata['symbol'] for pid, pdata in game.players.items()}
+            
+            return {
+                'success': True, 
+                'game_state': game.get_state(),
+                'symbol_changes': {
+                    pid: {'old': old_symbols[pid], 'new': new_symbols[pid]} 
+                    for pid in game.players.keys()
+                }
             }
-        }
     
     def get_game_state(self, room_id: str) -> Optional[Dict]:
-        if room_id not in self.games:
+        with self.room_lock(room_id):
+            if room_id not in self.games:
+                return None
+            return self.games[room_id].get_state()
+
+    def get_game_state_json(self, room_id: str) -> Optional[str]:
+        with self.room_lock(room_id):
+            if room_id not in self.games:
+                return None
+            return self.games[room_id].get_state_json()
+
+    def get_game_state_variants(self, room_id: str) -> Optional[Tuple[str, str]]:
+        """The state JSON both as get_game_state_json() and with the board packed"""
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            if game is None:
+                return None
+            return game.get_state_json(), game.get_state_packed_json()
+
+    def get_replay(self, room_id: str, match_number: Optional[int] = None,
+                   move_index: Optional[int] = None) -> Optional[Dict]:
+        """The moves of one of the room's recent matches (the current one by default)"""
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            return game.move_log.replay(match_number, move_index) if game else None
+
+    def get_catch_up(self, room_id: str) -> Optional[Dict]:
+        """Latest board snapshot plus the moves since, for a late joiner"""
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            if game is None:
+                return None
+            catch_up = game.move_log.catch_up()
+            catch_up['version'] = game.version
+            return catch_up
+
+    def export_move_log(self, room_id: str) -> Optional[bytes]:
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            return game.move_log.export() if game else None
+
+    def get_player(self, room_id: str, player_id: str) -> Optional[Dict]:
+        """A copy of a player's name and symbol, or None if not in the room"""
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            if not game or player_id not in game.players:
+                return None
+            return dict(game.players[player_id])
+
+    def get_players_info(self, room_id: str) -> Optional[List[Dict]]:
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            if not game:
+                return None
+            return [
+                {'id': player_id, 'name': player_data['name'], 'symbol': player_data['symbol']}
+                for player_id, player_data in game.players.items()
+            ]
+
+    def get_resume_token(self, room_id: str, player_id: str) -> Optional[str]:
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            return game.resume_tokens.get(player_id) if game else None
+
+    def resume_session(self, room_id: str, resume_token: str, player_id: str) -> Dict:
+        """Give a reconnected client (new player_id) back the seat its token belongs to"""
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            if game is None:
+                return {'success': False, 'message': 'Room not found'}
+
+            previous_id = next((pid for pid, token in game.resume_tokens.items()
+                                if secrets.compare_digest(token, resume_token)), None)
+            if previous_id is None:
+                return {'success': False, 'message': 'Session expired'}
+
+            # The old connection may not have been noticed as dropped yet;
+            # once it is, suspend_player finds it no longer mapped
+            game.replace_player_id(previous_id, player_id)
+            self.player_rooms.pop(previous_id, None)
+            self.player_rooms[player_id] = room_id
+            members = self.room_members[room_id]
+            members.discard(previous_id)
+            members.add(player_id)
+            self._mark_dirty(room_id)
+
+            player = game.players[player_id]
+            if len(game.players) == 1 and room_id not in self.open_rooms:
+                self._open_room(room_id, game, player['name'])
+            return {
+                'success': True,
+                'previous_id': previous_id,
+                'player_name': player['name'],
+                'symbol': player['symbol'],
+                'resume_token': game.resume_tokens[player_id],
+                'game_state': game.get_state()
+            }
+
+    def add_spectator(self, room_id: str, spectator_id: str, name: str) -> Dict:
+        """Watch a room; there's no limit on spectators"""
+        with self.room_lock(room_id):
+            game = self.games.get(room_id)
+            if game is None:
+                return {'success': False, 'message': 'Room not found'}
+            if spectator_id in game.players:
+                return {'success': False, 'message': 'Already playing in this room'}
+
+            watchers = self.spectators.setdefault(room_id, {})
+            watchers[spectator_id] = name
+            self.spectator_rooms[spectator_id] = room_id
+            return {'success': True, 'spectators': len(watchers)}
+
+    def remove_spectator(self, spectator_id: str) -> Optional[str]:
+        room_id = self.spectator_rooms.get(spectator_id)
+        if not room_id:
             return None
-        return self.games[room_id].get_state()
+
+        with self.room_lock(room_id):
+            if self.spectator_rooms.get(spectator_id) != room_id:
+                return None
+            del self.spectator_rooms[spectator_id]
+
+            watchers = self.spectators.get(room_id)
+            if watchers is not None:
+                watchers.pop(spectator_id, None)
+                if not watchers:
+                    del self.spectators[room_id]
+            return room_id
+
+    def get_spectator(self, room_id: str, spectator_id: str) -> Optional[Dict]:
+        with self.room_lock(room_id):
+            name = self.spectators.get(room_id, {}).get(spectator_id)
+            return {'name': name} if name is not None else None
+
+    def count_spectators(self, room_id: str) -> int:
+        return len(self.spectators.get(room_id, ()))
+
+    def get_state_cache_stats(self) -> Dict:
+        hits = state_cache_stats['hits']
+        misses = state_cache_stats['misses']
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0
+        }
     
     def get_player_room(self, player_id: str) -> Optional[str]:
         return self.player_rooms.get(player_id)
@@ -371,35 +1055,253 @@ class GameManager:
         room_id = self.player_rooms.get(player_id)
         if not room_id:
             return None
+
+        with self.room_lock(room_id):
+            # The room may have been torn down while we waited for the lock
+            if self.player_rooms.get(player_id) != room_id:
+                return None
+                
+            del self.player_rooms[player_id]
             
-        if player_id in self.player_rooms:
+            if room_id in self.games:
+                self.games[room_id].remove_player(player_id)
+                    
+                # clean up room when a player disconnects
+                self._remove_room(room_id)
+                    
+            return room_id
+
+    def close_room(self, room_id: str) -> Optional[List[str]]:
+        """Close a room whatever its state; returns who was playing in it"""
+        with self.room_lock(room_id):
+            if room_id not in self.games:
+                return None
+            players = list(self.games[room_id].players)
+            self._remove_room(room_id)
+            return players
+
+    def suspend_player(self, player_id: str) -> Optional[str]:
+        """Hold a dropped player's seat for resume_grace seconds instead of closing the room"""
+        room_id = self.player_rooms.get(player_id)
+        if not room_id:
+            return None
+
+        with self.room_lock(room_id):
+            if self.player_rooms.get(player_id) != room_id:
+                return None
             del self.player_rooms[player_id]
-        
-        if room_id in self.games:
+
             game = self.games[room_id]
-            if player_id in game.players:
-                del game.players[player_id]
-                
-            # clean up room when a player disconnects
-            del self.games[room_id]
-            
-            # Remove remaining player from room mapping
-            remaining_players = [pid for pid in self.player_rooms.keys() 
-                               if self.player_rooms[pid] == room_id]
-            for pid in remaining_players:
-                del self.player_rooms[pid]
-                
-        return room_id
-    
-    def get_available_rooms(self) -> List[Dict]:
-        available_rooms = []
-        for room_id, game in self.games.items():
-            if len(game.players) == 1:  # Room has space for one more player
-                player = list(game.players.values())[0]
-                available_rooms.append({
+            deadline = time.time() + self.resume_grace
+            game.disconnected[player_id] = deadline
+            # A waiting room whose host dropped has nobody to play against
+            if len(game.players) == 1:
+                self._close_room(room_id)
+
+            # The reaper closes the room if nobody resumes the seat in time
+            scheduled = self.room_expiry.deadline(room_id)
+            if scheduled is None or deadline < scheduled:
+                self.room_expiry.schedule(room_id, deadline)
+            return room_id
+
+    def restore_room(self, room_id: str, game: Game, absent_players: List[str],
+                     grace: Optional[float] = None, now: Optional[float] = None) -> bool:
+        """Bring back a room rebuilt by Game.from_snapshot() after a restart.
+
+        absent_players lost their connection with the old process and get
+        grace seconds (resume_grace by default) to take their seats back with
+        their resume tokens, as after any dropped connection. Idle and turn
+        clocks restart from now, so nobody is charged for the downtime.
+        """
+        now = time.time() if now is None else now
+        grace = self.resume_grace if grace is None else grace
+        with self.room_lock(room_id):
+            if room_id in self.games:
+                return False
+            game.last_move_at = now
+            if game.turn_started_at is not None:
+                game.turn_started_at = now
+            for player_id in absent_players:
+                game.disconnected[player_id] = now + grace
+
+            self.games[room_id] = game
+            self.room_members[room_id] = set(game.players)
+            # Players still here, such as the bot, keep their ids
+            for player_id in game.players:
+                if player_id not in game.disconnected:
+                    self.player_rooms[player_id] = room_id
+            with self._index_lock:
+                self.rooms_by_size[game.grid_size] = self.rooms_by_size.get(game.grid_size, 0) + 1
+            # A waiting room is listed again once its host resumes the seat
+            if len(game.players) == 1 and not game.disconnected:
+                self._open_room(room_id, game, next(iter(game.players.values()))['name'])
+
+            phase = self.room_phase(game)
+            if phase == 'abandoned':
+                self.room_expiry.schedule(room_id, now + grace)
+            else:
+                self.room_expiry.schedule(room_id, now + self.room_ttls[phase])
+            self._schedule_turn(room_id, game)
+            return True
+
+    def _remove_room(self, room_id: str):
+        """Drop a room and everyone's mapping to it; caller holds the room lock"""
+        game = self.games.pop(room_id)
+        self._close_room(room_id)
+        self.room_expiry.cancel(room_id)
+        self.turn_deadlines.cancel(room_id)
+        self._mark_dirty(room_id)
+
+        with self._index_lock:
+            remaining = self.rooms_by_size[game.grid_size] - 1
+            if remaining:
+                self.rooms_by_size[game.grid_size] = remaining
+            else:
+                del self.rooms_by_size[game.grid_size]
+
+        # Remove remaining players and spectators from room mapping
+        for pid in self.room_members.pop(room_id, ()):
+            self.player_rooms.pop(pid, None)
+        for spectator_id in self.spectators.pop(room_id, ()):
+            self.spectator_rooms.pop(spectator_id, None)
+
+    def room_phase(self, game: Game) -> str:
+        if game.disconnected:
+            return 'abandoned'
+        if len(game.players) < 2:
+            return 'waiting'
+        return 'finished' if game.game_over else 'playing'
+
+    def reap_expired(self, now: Optional[float] = None) -> List[Dict]:
+        """Evict rooms idle for longer than their phase's TTL, and rooms whose
+        disconnected player didn't resume within the grace window.
+
+        Moves don't touch the expiry queue. A room's entry only says when to
+        look at it next, and the real deadline is worked out from the room's
+        phase and last activity when the entry comes due, so a busy room is
+        pushed back at most once per TTL.
+        """
+        now = time.time() if now is None else now
+        evicted = []
+        for room_id in self.room_expiry.pop_due(now):
+            with self.room_lock(room_id):
+                game = self.games.get(room_id)
+                if game is None or room_id in self.room_expiry:
+                    continue
+
+                phase = self.room_phase(game)
+                if phase == 'abandoned':
+                    deadline = min(game.disconnected.values())
+                else:
+                    deadline = game.last_move_at + self.room_ttls[phase]
+                if deadline > now:
+                    self.room_expiry.schedule(room_id, deadline)
+                    continue
+
+                evicted.append({
+                    'room_id': room_id,
+                    'reason': phase,
+                    'player_ids': list(self.room_members.get(room_id, ())),
+                    'spectator_ids': list(self.spectators.get(room_id, ())),
+                    'disconnected_ids': list(game.disconnected),
+                    'idle_seconds': now - game.last_move_at,
+                })
+                self._remove_room(room_id)
+        return evicted
+
+    def _schedule_turn(self, room_id: str, game: Game):
+        """Queue the room's next turn deadline, if a clock is running; caller holds the room lock"""
+        deadline = game.turn_deadline
+        if deadline is None:
+            self.turn_deadlines.cancel(room_id)
+        else:
+            self.turn_deadlines.schedule(room_id, deadline)
+
+    def expire_turns(self, now: Optional[float] = None) -> List[Dict]:
+        """End every match whose player to move ran out of time, as a loss for them"""
+        now = time.time() if now is None else now
+        timeouts = []
+        for room_id in self.turn_deadlines.pop_due(now):
+            with self.room_lock(room_id):
+                game = self.games.get(room_id)
+                if game is None or room_id in self.turn_deadlines:
+                    continue
+                deadline = game.turn_deadline
+                if deadline is None:
+                    continue
+                if deadline > now:
+                    self.turn_deadlines.schedule(room_id, deadline)
+                    continue
+
+                symbol = game.current_turn
+                player_id = game.time_out(now)
+                self._mark_dirty(room_id)
+                winner_id = next(pid for pid, player in game.players.items()
+                                 if player['symbol'] == game.winner)
+                state = game.get_state()
+                timeouts.append({
                     'room_id': room_id,
-                    'host_name': player['name'],
-                    'grid_size': game.grid_size,
-                    'created_at': game.created_at
+                    'player_id': player_id,
+                    'symbol': symbol,
+                    'winner': game.winner,
+                    'winner_name': game.players[winner_id]['name'],
+                    'version': game.version,
+                    'clocks': state['clocks'],
+                    'session_scores': state['session_scores'],
+                    'match_history': state['match_history'],
+                    'session_leader': state['session_leader'],
                 })
-        return available_rooms
\ No newline at end of file
+                if self.match_store is not None or self.ratings is not None:
+                    self._record_match(room_id, game)
+        return timeouts
+
+    def get_room_counts(self) -> Dict[int, int]:
+        """Live rooms per grid size"""
+        with self._index_lock:
+            return dict(self.rooms_by_size)
+    
+    def _open_room(self, room_id: str, game: Game, host_name: str):
+        entry = {
+            'room_id': room_id,
+            'host_name': host_name,
+            'grid_size': game.grid_size,
+            'created_at': game.created_at
+        }
+        with self._index_lock:
+            _insert_by_created_at(self.open_rooms, room_id, entry)
+            _insert_by_created_at(self.open_rooms_by_size.setdefault(game.grid_size, {}),
+                                  room_id, entry)
+        self._notify_lobby('added', entry)
+
+    def _close_room(self, room_id: str):
+        with self._index_lock:
+            entry = self.open_rooms.pop(room_id, None)
+            if entry is None:
+                return
+            by_size = self.open_rooms_by_size[entry['grid_size']]
+            del by_size[room_id]
+            if not by_size:
+                del self.open_rooms_by_size[entry['grid_size']]
+        self._notify_lobby('removed', entry)
+
+    def _notify_lobby(self, change: str, entry: Dict):
+        for listener in self.lobby_listeners:
+            listener(change, entry)
+
+    def get_available_rooms(self, grid_size: Optional[int] = None, offset: int = 0,
+                            limit: Optional[int] = None, newest_first: bool = False) -> List[Dict]:
+        """One page of open rooms, ordered by created_at"""
+        with self._index_lock:
+            if grid_size is None:
+                index = self.open_rooms
+            else:
+                index = self.open_rooms_by_size.get(grid_size, {})
+
+            entries = reversed(index.values()) if newest_first else iter(index.values())
+            stop = offset + limit if limit is not None else None
+            return [dict(entry) for entry in islice(entries, offset, stop)]
+
+    def count_available_rooms(self, grid_size: Optional[int] = None) -> int:
+        if grid_size is None:
+            return len(self.open_rooms)
+        return len(self.open_rooms_by_size.get(grid_size, {}))
@@ -0,0 +1,331 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Load generator and latency benchmark for the socket API.
+
+Starts app.py locally (or targets --url) and drives pairs of simulated
+players through the real event flow: create_room, join_room, make_move until
+game_over, chat_message, restart_game for the next match, and leave_room.
+
+Latency is measured from an event being sent to the resulting broadcast
+arriving at the other player. Results are written as JSON so runs can be
+compared between commits:
+
+    python load_test.py --clients 2000 --output after.json --compare before.json
+
+Needs the asyncio client: pip install "python-socketio[asyncio_client]"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import socketio
+
+# Events the simulated players wait on
+WATCHED_EVENTS = (
+    'connected', 'room_created', 'room_joined', 'game_start', 'move_made',
+    'game_over', 'chat_message', 'game_restarted', 'left_room',
+    'session_terminated', 'error',
+)
+
+
+class SimulatedPlayer:
+    def __init__(self, url: str, rng: random.Random):
+        self.url = url
+        self.rng = rng
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.player_id = None
+        self.symbol = None
+        for event in WATCHED_EVENTS:
+            self.sio.on(event, self._receiver(event))
+
+    def _receiver(self, event: str):
+        async def receive(data=None):
+            self.inbox.put_nowait((event, data, time.perf_counter()))
+        return receive
+
+    async def connect(self):
+        await self.sio.connect(self.url, transports=['websocket'])
+        _, data, _ = await self.expect('connected')
+        self.player_id = data['client_id']
+
+    async def expect(self, event: str, predicate=None, timeout: float = 30.0):
+        """Wait for the next `event` matching predicate, skipping anything else"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError(f'no {event} within {timeout}s')
+            name, data, received_at = await asyncio.wait_for(self.inbox.get(), remaining)
+            if name == 'error':
+                raise RuntimeError(f'server error: {data}')
+            if name == event and (predicate is None or predicate(data)):
+                return name, data, received_at
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.sent = 0
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, event: str, sent_at: float, received_at: float):
+        self.latencies[event].append(received_at - sent_at)
+
+    def summary(self) -> Dict:
+        result = {}
+        for event, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            result[event] = {
+                'count': len(samples),
+                'p50_ms': _percentile(samples, 50) * 1000,
+                'p99_ms': _percentile(samples, 99) * 1000,
+                'max_ms': samples[-1] * 1000,
+            }
+        return result
+
+
+def _percentile(sorted_samples: List[float], percent: float) -> float:
+    index = min(len(sorted_samples) - 1, int(round(percent / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+async def _emit(player: SimulatedPlayer, stats: LoadStats, event: str, data: Dict) -> float:
+    stats.sent += 1
+    sent_at = time.perf_counter()
+    await player.sio.emit(event, data)
+    return sent_at
+
+
+async def play_session(host: SimulatedPlayer, guest: SimulatedPlayer, args, stats: LoadStats):
+    sent_at = await _emit(host, stats, 'create_room', {'player_name': 'Host', 'grid_size': args.grid_size})
+    _, created, received_at = await host.expect('room_created')
+    stats.record('create_room', sent_at, received_at)
+    room_id = created['room_id']
+    host.symbol = created['symbol']
+
+    sent_at = await _emit(guest, stats, 'join_room', {'room_id': room_id, 'player_name': 'Guest'})
+    _, joined, _ = await guest.expect('room_joined')
+    guest.symbol = joined['symbol']
+    _, state, received_at = await host.expect('game_start')
+    await guest.expect('game_start')
+    stats.record('join_room', sent_at, received_at)
+
+    players = {host.player_id: host, guest.player_id: guest}
+    version = state['version']
+
+    for match in range(args.matches):
+        cells = list(range(args.grid_size * args.grid_size))
+        host.rng.shuffle(cells)
+        turn = 'X'
+
+        for position in cells:
+            mover = host if host.symbol == turn else guest
+            watcher = guest if mover is host else host
+            if args.think_ms:
+                await asyncio.sleep(mover.rng.uniform(0, 2 * args.think_ms) / 1000)
+
+            sent_at = await _emit(mover, stats, 'make_move', {'room_id': room_id, 'position': position})
+            version += 1
+            _, move, received_at = await watcher.expect(
+                'move_made', lambda data, v=version: data['version'] == v)
+            stats.record('make_move', sent_at, received_at)
+            turn = move['current_turn']
+            if move['game_over']:
+                break
+
+        await host.expect('game_over')
+        await guest.expect('game_over')
+
+        sent_at = await _emit(host, stats, 'chat_message', {'room_id': room_id, 'message': 'gg'})
+        _, _, received_at = await guest.expect('chat_message')
+        stats.record('chat_message', sent_at, received_at)
+
+        if match + 1 < args.matches:
+            sent_at = await _emit(guest, stats, 'restart_game', {'room_id': room_id})
+            _, restarted, received_at = await host.expect('game_restarted')
+            await guest.expect('game_restarted')
+            stats.record('restart_game', sent_at, received_at)
+            version = restarted['game_state']['version']
+            for player_id, change in restarted['symbol_changes'].items():
+                players[player_id].symbol = change['new']
+
+    sent_at = await _emit(guest, stats, 'leave_room', {'room_id': room_id})
+    _, _, received_at = await host.expect('session_terminated')
+    stats.record('leave_room', sent_at, received_at)
+
+
+async def run_pair(index: int, args, stats: LoadStats, connect_limit: asyncio.Semaphore):
+    rng = random.Random(args.seed + index)
+    host = SimulatedPlayer(args.url, rng)
+    guest = SimulatedPlayer(args.url, rng)
+    try:
+        async with connect_limit:
+            await host.connect()
+            await guest.connect()
+        for _ in range(args.sessions):
+            await play_session(host, guest, args, stats)
+    except Exception as e:
+        stats.errors[type(e).__name__] += 1
+    finally:
+        await host.sio.disconnect()
+        await guest.sio.disconnect()
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def sample_rss(pid: Optional[int], samples: List[int], stop: asyncio.Event):
+    while pid and not stop.is_set():
+        rss = read_rss_kb(pid)
+        if rss:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_server(args) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(args.port), ASYNC_MODE=args.async_mode, FLASK_ENV='production')
+    server = subprocess.Popen([sys.executable, 'app.py'], env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            import urllib.request
+            urllib.request.urlopen(f'{args.url}/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError('app.py did not start')
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> Dict:
+    server = None if args.external else start_server(args)
+    stats = LoadStats()
+    rss_samples: List[int] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(server.pid if server else None, rss_samples, stop))
+    idle_rss = read_rss_kb(server.pid) if server else None
+
+    try:
+        connect_limit = asyncio.Semaphore(args.connect_concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(run_pair(i, args, stats, connect_limit)
+                               for i in range(args.clients // 2)))
+        elapsed = time.perf_counter() - started
+    finally:
+        stop.set()
+        await sampler
+        if server:
+            server.terminate()
+            server.wait()
+
+    return {
+        'commit': git_commit(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'config': {
+            'clients': args.clients,
+            'sessions': args.sessions,
+            'matches': args.matches,
+            'grid_size': args.grid_size,
+            'think_ms': args.think_ms,
+            'async_mode': None if args.external else args.async_mode,
+        },
+        'duration_s': elapsed,
+        'events_sent': stats.sent,
+        'events_per_s': stats.sent / elapsed if elapsed else 0.0,
+        'latency': stats.summary(),
+        'errors': dict(stats.errors),
+        'server_rss_mb': {
+            'idle': idle_rss / 1024 if idle_rss else None,
+            'peak': max(rss_samples) / 1024 if rss_samples else None,
+        },
+    }
+
+
+def print_report(result: Dict, baseline: Optional[Dict] = None):
+    def delta(new, old):
+        if old in (None, 0) or new is None:
+            return ''
+        return f' ({(new - old) / old * 100:+.1f}%)'
+
+    base_latency = (baseline or {}).get('latency', {})
+    print(f"{result['config']['clients']} clients, {result['duration_s']:.1f}s, "
+          f"{result['events_per_s']:.0f} events/s"
+          f"{delta(result['events_per_s'], (baseline or {}).get('events_per_s'))}")
+    print(f'{"event":>14} {"count":>8} {"p50 ms":>16} {"p99 ms":>16}')
+    for event, row in result['latency'].items():
+        old = base_latency.get(event, {})
+        print(f"{event:>14} {row['count']:>8} "
+              f"{row['p50_ms']:>8.2f}{delta(row['p50_ms'], old.get('p50_ms')):>8} "
+              f"{row['p99_ms']:>8.2f}{delta(row['p99_ms'], old.get('p99_ms')):>8}")
+    rss = result['server_rss_mb']
+    if rss['peak']:
+        print(f"server RSS: {rss['idle']:.1f} MB idle, {rss['peak']:.1f} MB peak")
+    if result['errors']:
+        print(f"errors: {result['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Socket API load test')
+    parser.add_argument('--clients', type=int, default=200, help='simulated players (paired up)')
+    parser.add_argument('--sessions', type=int, default=1, help='rooms each pair plays through')
+    parser.add_argument('--matches', type=int, default=3, help='matches per room, via restart_game')
+    parser.add_argument('--grid-size', type=int, default=3)
+    parser.add_argument('--think-ms', type=float, default=50, help='mean delay before each move')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--async-mode', default='gevent', help='ASYNC_MODE for the started server')
+    parser.add_argument('--url', help='target an already running server instead of starting one')
+    parser.add_argument('--connect-concurrency', type=int, default=50)
+    parser.add_argument('--output', default='load_test_results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    args.external = args.url is not None
+    args.url = args.url or f'http://127.0.0.1:{args.port}'
+
+    result = asyncio.run(run(args))
+    with open(args.output, 'w') as output:
+        json.dump(result, output, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as previous:
+            baseline = json.load(previous)
+    print_report(result, baseline)
+    print(f'Results saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Matchmaking queue that pairs waiting players by grid size and rating.
+
+Waiting players sit in one bucket per grid size, kept sorted by rating, so
+the closest opponents are always neighbours. Each tick walks every bucket
+once and pairs neighbours whose ratings are within the acceptable window.
+The window starts narrow and widens the longer a player waits, so nobody
+waits forever for a perfect match. Queueing and cancelling are O(log n)
+searches, and a tick is linear in the number of waiting players.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+# Rating difference accepted at first, how fast it grows per second of
+# waiting, and where it stops growing
+BASE_WINDOW = float(os.environ.get('MATCHMAKING_BASE_WINDOW', 100))
+WIDEN_PER_SECOND = float(os.environ.get('MATCHMAKING_WIDEN_PER_SECOND', 25))
+MAX_WINDOW = float(os.environ.get('MATCHMAKING_MAX_WINDOW', 1000))
+
+
+class Ticket:
+    __slots__ = ('player_id', 'name', 'grid_size', 'rating', 'queued_at')
+
+    def __init__(self, player_id: str, name: str, grid_size: int, rating: float, queued_at: float):
+        self.player_id = player_id
+        self.name = name
+        self.grid_size = grid_size
+        self.rating = rating
+        self.queued_at = queued_at
+
+    @property
+    def sort_key(self) -> Tuple[float, float, str]:
+        return (self.rating, self.queued_at, self.player_id)
+
+
+class Matchmaker:
+    def __init__(self, base_window: float = BASE_WINDOW, widen_per_second: float = WIDEN_PER_SECOND,
+                 max_window: float = MAX_WINDOW):
+        self.base_window = base_window
+        self.widen_per_second = widen_per_second
+        self.max_window = max_window
+        self.tickets: Dict[str, Ticket] = {}  # {player_id: ticket}
+        # {grid_size: [(rating, queued_at, player_id)]}, sorted
+        self.buckets: Dict[int, List[Tuple[float, float, str]]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.tickets
+
+    def enqueue(self, player_id: str, name: str, grid_size: int, rating: float,
+                now: Optional[float] = None) -> bool:
+        """Queue a player; False if they are already waiting"""
+        ticket = Ticket(player_id, name, grid_size, rating, time.time() if now is None else now)
+        with self._lock:
+            if player_id in self.tickets:
+                return False
+            self.tickets[player_id] = ticket
+            insort(self.buckets.setdefault(grid_size, []), ticket.sort_key)
+        return True
+
+    def cancel(self, player_id: str) -> Optional[Ticket]:
+        with self._lock:
+            ticket = self.tickets.pop(player_id, None)
+            if ticket is None:
+                return None
+            bucket = self.buckets[ticket.grid_size]
+            index = bisect_left(bucket, ticket.sort_key)
+            del bucket[index]
+            if not bucket:
+                del self.buckets[ticket.grid_size]
+            return ticket
+
+    def window(self, ticket: Ticket, now: float) -> float:
+        return min(self.base_window + self.widen_per_second * (now - ticket.queued_at), self.max_window)
+
+    def tick(self, now: Optional[float] = None) -> List[Tuple[Ticket, Ticket]]:
+        """Pair up every waiting player who has an acceptable neighbour.
+
+        Pairs are (first, second) with first the one who waited longer.
+        """
+        if now is None:
+            now = time.time()
+        pairs = []
+        base, widen, cap = self.base_window, self.widen_per_second, self.max_window
+        with self._lock:
+            for grid_size, bucket in list(self.buckets.items()):
+                remaining = []
+                index = 0
+                last = len(bucket) - 1
+                while index < last:
+                    rating, queued_at, player_id = bucket[index]
+                    next_rating, next_queued_at, next_player_id = bucket[index + 1]
+                    # The longer waiter's wider window decides
+                    window = min(base + widen * (now - min(queued_at, next_queued_at)), cap)
+                    if next_rating - rating <= window:
+                        ticket = self.tickets.pop(player_id)
+                        neighbour = self.tickets.pop(next_player_id)
+                        pairs.append((ticket, neighbour) if queued_at <= next_queued_at
+                                     else (neighbour, ticket))
+                        index += 2
+                    else:
+                        remaining.append(bucket[index])
+                        index += 1
+                if index == last:
+                    remaining.append(bucket[last])
+
+                if remaining:
+                    self.buckets[grid_size] = remaining
+                else:
+                    del self.buckets[grid_size]
+        return pairs
+
+    def depth(self) -> Dict[int, int]:
+        """Waiting players per grid size"""
+        with self._lock:
+            return {grid_size: len(bucket) for grid_size, bucket in self.buckets.items()}
@@ -0,0 +1,189 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Append-only, compactly encoded move log kept per room.
+
+Each move is 6 bytes: the cell index with the symbol in the top bit, and
+milliseconds since the match started. Every SNAPSHOT_EVERY moves the board
+is snapshotted, so any point of a match can be rebuilt from the nearest
+snapshot plus the moves after it. Only the last MAX_MATCHES matches are
+kept, and a finished match's buffer is shrunk to its exact size, so a
+room's log never grows past a few kilobytes.
+"""
+
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MOVE = struct.Struct('<HI')  # position | symbol bit, ms since match start
+SYMBOL_BIT = 1 << 15
+
+SNAPSHOT_EVERY = 16
+MAX_MATCHES = 10  # same depth as Game.match_history
+
+# Bulk export: file header, then a header and the raw moves for each match
+EXPORT_MAGIC = b'TTTLOG'
+EXPORT_VERSION = 1
+EXPORT_HEADER = struct.Struct('<6sBBH')  # magic, format version, grid size, matches
+MATCH_HEADER = struct.Struct('<IdBH')  # match number, started at, result, moves
+
+# Result byte in the export
+RESULTS = {None: 0, 'X': 1, 'O': 2, 'draw': 3}
+RESULT_NAMES = {code: name for name, code in RESULTS.items()}
+
+
+def board_from_masks(grid_size: int, x_mask: int, o_mask: int) -> List[str]:
+    return ['X' if x_mask >> i & 1 else 'O' if o_mask >> i & 1 else ''
+            for i in range(grid_size * grid_size)]
+
+
+class MatchLog:
+    """Moves of one match plus board snapshots taken along the way"""
+
+    __slots__ = ('match_number', 'started_at', 'moves', 'snapshots', 'result')
+
+    def __init__(self, match_number: int, started_at: float, version: int):
+        self.match_number = match_number
+        self.started_at = started_at
+        self.moves = bytearray()
+        # (move index, game version, x mask, o mask), oldest first
+        self.snapshots: List[Tuple[int, int, int, int]] = [(0, version, 0, 0)]
+        self.result: Optional[str] = None  # 'X', 'O' or 'draw' once finished
+
+    def __len__(self) -> int:
+        return len(self.moves) // MOVE.size
+
+    def iter_moves(self, start: int = 0) -> Iterator[Tuple[int, str, int]]:
+        """(position, symbol, ms since match start) from move index start on"""
+        for packed, elapsed_ms in MOVE.iter_unpack(memoryview(self.moves)[start * MOVE.size:]):
+            yield packed & ~SYMBOL_BIT, 'O' if packed & SYMBOL_BIT else 'X', elapsed_ms
+
+    def board_at(self, move_index: int) -> Tuple[int, int]:
+        """x and o masks after the first move_index moves"""
+        index, _, x_mask, o_mask = self._snapshot_before(move_index)
+        for position, symbol, _ in self.iter_moves(index):
+            if index == move_index:
+                break
+            if symbol == 'X':
+                x_mask |= 1 << position
+            else:
+                o_mask |= 1 << position
+            index += 1
+        return x_mask, o_mask
+
+    def _snapshot_before(self, move_index: int) -> Tuple[int, int, int, int]:
+        for snapshot in reversed(self.snapshots):
+            if snapshot[0] <= move_index:
+                return snapshot
+        return self.snapshots[0]
+
+
+class MoveLog:
+    __slots__ = ('grid_size', 'matches')
+
+    def __init__(self, grid_size: int, started_at: float, version: int = 0):
+        self.grid_size = grid_size
+        # A plain list: a deque's first block alone is over 600 bytes per room
+        self.matches = [MatchLog(1, started_at, version)]
+
+    @property
+    def current(self) -> MatchLog:
+        return self.matches[-1]
+
+    def record(self, position: int, symbol: str, now: float, version: int,
+               x_mask: int, o_mask: int):
+        """Append a move; version and masks are the game's state after it"""
+        match = self.current
+        elapsed_ms = min(int((now - match.started_at) * 1000), 0xFFFFFFFF)
+        match.moves += MOVE.pack(position | (SYMBOL_BIT if symbol == 'O' else 0), elapsed_ms)
+        if len(match) % SNAPSHOT_EVERY == 0:
+            match.snapshots.append((len(match), version, x_mask, o_mask))
+
+    def finish_match(self, result: str):
+        match = self.current
+        match.result = result
+        # Shrink the finished buffer to its exact size
+        match.moves = bytes(match.moves)
+
+    def start_match(self, match_number: int, now: float, version: int):
+        # A match restarted before it finished is kept as it stands
+        self.current.moves = bytes(self.current.moves)
+        self.matches.append(MatchLog(match_number, now, version))
+        if len(self.matches) > MAX_MATCHES:
+            del self.matches[0]
+
+    def find(self, match_number: Optional[int] = None) -> Optional[MatchLog]:
+        if match_number is None:
+            return self.current
+        for match in self.matches:
+            if match.match_number == match_number:
+                return match
+        return None
+
+    def replay(self, match_number: Optional[int] = None,
+               move_index: Optional[int] = None) -> Optional[Dict]:
+        """Every move of a kept match in order, and the board after move_index if given"""
+        match = self.find(match_number)
+        if match is None:
+            return None
+        replay = {
+            'match_number': match.match_number,
+            'grid_size': self.grid_size,
+            'started_at': match.started_at,
+            'result': match.result,
+            'moves': [{'position': position, 'symbol': symbol, 'elapsed_ms': elapsed_ms}
+                      for position, symbol, elapsed_ms in match.iter_moves()],
+        }
+        if move_index is not None:
+            move_index = max(0, min(move_index, len(match)))
+            replay['move_index'] = move_index
+            replay['board'] = board_from_masks(self.grid_size, *match.board_at(move_index))
+        return replay
+
+    def catch_up(self) -> Dict:
+        """Latest snapshot of the current match plus the moves made since"""
+        match = self.current
+        index, version, x_mask, o_mask = match.snapshots[-1]
+        return {
+            'match_number': match.match_number,
+            'snapshot': {
+                'move_index': index,
+                'version': version,
+                'board': board_from_masks(self.grid_size, x_mask, o_mask),
+            },
+            'moves': [{'position': position, 'symbol': symbol, 'elapsed_ms': elapsed_ms}
+                      for position, symbol, elapsed_ms in match.iter_moves(index)],
+        }
+
+    def export(self) -> bytes:
+        """All kept matches in the bulk binary format read by read_export()"""
+        parts = [EXPORT_HEADER.pack(EXPORT_MAGIC, EXPORT_VERSION, self.grid_size, len(self.matches))]
+        for match in self.matches:
+            parts.append(MATCH_HEADER.pack(match.match_number, match.started_at,
+                                           RESULTS[match.result], len(match)))
+            parts.append(bytes(match.moves))
+        return b''.join(parts)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(match.moves) for match in self.matches)
+
+
+def read_export(data: bytes) -> Dict:
+    """Decode MoveLog.export() output, e.g. for offline analysis"""
+    magic, version, grid_size, match_count = EXPORT_HEADER.unpack_from(data)
+    if magic != EXPORT_MAGIC or version != EXPORT_VERSION:
+        raise ValueError('Not a move log export')
+
+    offset = EXPORT_HEADER.size
+    matches = []
+    for _ in range(match_count):
+        match_number, started_at, result, move_count = MATCH_HEADER.unpack_from(data, offset)
+        offset += MATCH_HEADER.size
+        end = offset + move_count * MOVE.size
+        moves = [{'position': packed & ~SYMBOL_BIT,
+                  'symbol': 'O' if packed & SYMBOL_BIT else 'X',
+                  'elapsed_ms': elapsed_ms}
+                 for packed, elapsed_ms in MOVE.iter_unpack(data[offset:end])]
+        offset = end
+        matches.append({'match_number': match_number, 'started_at': started_at,
+                        'result': RESULT_NAMES[result], 'moves': moves})
+    return {'grid_size': grid_size, 'matches': matches}
@@ -0,0 +1,129 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Per-connection limits on how fast clients may send events.
+
+Each connection gets a token bucket per limited event: a bucket holds up to
+`burst` tokens, refills at `rate` tokens a second, and every event spends
+one. Buckets are refilled lazily when an event arrives, so idle connections
+cost nothing but their entry.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# {event: (tokens per second, burst)}
+DEFAULT_LIMITS = {
+    'chat_message': (2.0, 8),
+    # stop_typing isn't limited: it is only relayed after a relayed typing
+    'typing': (2.0, 4),
+    'make_move': (10.0, 20),
+    'request_state': (5.0, 10),
+    # A round of a big bracket is a large payload
+    'get_tournament': (2.0, 5),
+}
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Limits from 'event=rate:burst,...', on top of DEFAULT_LIMITS"""
+    limits = dict(DEFAULT_LIMITS)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        event, _, value = item.partition('=')
+        rate, _, burst = value.partition(':')
+        limits[event.strip()] = (float(rate), int(burst or max(1, float(rate))))
+    return limits
+
+
+RATE_LIMITS = parse_limits(os.environ.get('RATE_LIMITS', ''))
+# Seconds a typing indicator lasts without a keystroke; the bundled client
+# sends stop_typing after 1.5 s
+TYPING_TIMEOUT = 5.0
+
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated_at = now
+
+
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.buckets: Dict[str, Dict[str, TokenBucket]] = {}  # {sid: {event: bucket}}
+        self._lock = threading.Lock()
+
+    def allow(self, sid: str, event: str, now: Optional[float] = None) -> bool:
+        """Spend a token for this event if one is left"""
+        limit = self.limits.get(event)
+        if limit is None:
+            return True
+        rate, burst = limit
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            buckets = self.buckets.get(sid)
+            if buckets is None:
+                buckets = self.buckets[sid] = {}
+            bucket = buckets.get(event)
+            if bucket is None:
+                bucket = buckets[event] = TokenBucket(burst, now)
+            else:
+                bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated_at) * rate)
+                bucket.updated_at = now
+            if bucket.tokens < 1:
+                return False
+            bucket.tokens -= 1
+            return True
+
+    def forget(self, sid: str):
+        with self._lock:
+            self.buckets.pop(sid, None)
+
+
+class TypingTracker:
+    """Who is typing where, so only changes get broadcast.
+
+    Clients send typing on every keystroke; the room only needs to hear
+    when someone starts and when they stop. Each keystroke pushes back
+    when the entry expires, so one whose stop_typing got lost counts as
+    stopped and the next keystroke is news again.
+    """
+
+    def __init__(self, timeout: float = TYPING_TIMEOUT):
+        self.timeout = timeout
+        # Keyed by sid so a disconnect only touches that sid's entries
+        self.typing: Dict[str, Dict[str, float]] = {}  # {sid: {room_id: expires at}}
+        self._lock = threading.Lock()
+
+    def start(self, room_id: str, sid: str, now: Optional[float] = None) -> bool:
+        """True if sid wasn't typing in room_id already"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            rooms = self.typing.setdefault(sid, {})
+            for stale in [room for room, expires_at in rooms.items() if expires_at <= now]:
+                del rooms[stale]
+            started = room_id not in rooms
+            rooms[room_id] = now + self.timeout
+            return started
+
+    def stop(self, room_id: str, sid: str, now: Optional[float] = None) -> bool:
+        """True if sid was typing in room_id"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            rooms = self.typing.get(sid)
+            if not rooms or room_id not in rooms:
+                return False
+            expires_at = rooms.pop(room_id)
+            if not rooms:
+                del self.typing[sid]
+            return expires_at > now
+
+    def forget(self, sid: str):
+        with self._lock:
+            self.typing.pop(sid, None)
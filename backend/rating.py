@@ -0,0 +1,238 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Elo ratings across all rooms, ranked in an indexable skip list.
+
+Every finished match between two differently named players moves both
+ratings. Players are kept in a skip list ordered by rating whose links
+record how many players they jump over, so a player's rank, the top N and
+the players around someone are O(log n) lookups, not sorts, with millions
+of rated players.
+"""
+
+import gc
+import random
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32
+
+# Enough levels for O(log n) steps up to 2**MAX_LEVEL players
+MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next: List[Optional['_Node']] = [None] * level
+        # Positions skipped by each link; a link to None reaches one past the end
+        self.width = [1] * level
+
+
+class IndexableSkipList:
+    """A sorted collection of unique keys with O(log n) rank and index lookups"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self._head = _Node(None, MAX_LEVEL)
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_level(self) -> int:
+        # Level n with probability 2**-n: one more than the trailing 1 bits
+        bits = self._random.getrandbits(MAX_LEVEL - 1)
+        return ((bits ^ (bits + 1)) >> 1).bit_length() + 1
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable, seed: Optional[int] = None) -> 'IndexableSkipList':
+        """Build from keys already in ascending order in O(n)"""
+        skip_list = cls(seed)
+        tails = [skip_list._head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        random_level = skip_list._random_level
+        index = 0
+        # Millions of fresh nodes would otherwise set off a full collection
+        # over and over while the list is built
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for key in keys:
+                index += 1
+                node = _Node(key, random_level())
+                for level in range(len(node.next)):
+                    tail = tails[level]
+                    tail.next[level] = node
+                    tail.width[level] = index - positions[level]
+                    tails[level] = node
+                    positions[level] = index
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        for level in range(MAX_LEVEL):
+            tails[level].width[level] = index + 1 - positions[level]
+        skip_list._size = index
+        return skip_list
+
+    def insert(self, key):
+        chain = [self._head] * MAX_LEVEL
+        steps_at_level = [0] * MAX_LEVEL
+        node = self._head
+        for level in reversed(range(MAX_LEVEL)):
+            following = node.next[level]
+            while following is not None and following.key <= key:
+                steps_at_level[level] += node.width[level]
+                node = following
+                following = node.next[level]
+            chain[level] = node
+
+        new_node = _Node(key, self._random_level())
+        steps = 0
+        for level in range(len(new_node.next)):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(len(new_node.next), MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain = [self._head] * MAX_LEVEL
+        node = self._head
+        for level in reversed(range(MAX_LEVEL)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                node = following
+                following = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def rank(self, key) -> Optional[int]:
+        """0-based position of key, or None if absent"""
+        position = 0
+        node = self._head
+        for level in reversed(range(MAX_LEVEL)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+        following = node.next[0]
+        if following is None or following.key != key:
+            return None
+        return position
+
+    def iter_from(self, index: int) -> Iterator:
+        """Keys in order starting at position index"""
+        if index < 0:
+            index = 0
+        if index >= self._size:
+            return
+        node = self._head
+        remaining = index + 1
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+    def __getitem__(self, index: int):
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return next(self.iter_from(index))
+
+    def __iter__(self) -> Iterator:
+        return self.iter_from(0)
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+class RatingService:
+    """Ratings of every player by name, kept ranked as results come in.
+
+    With a storage.MatchStore, ratings are loaded from it on start and
+    every change is queued back to it.
+    """
+
+    def __init__(self, store=None, k_factor: float = K_FACTOR):
+        self.store = store
+        self.k_factor = k_factor
+        self.ratings: Dict[str, Tuple[float, int]] = {}  # {player_name: (rating, games)}
+        self._lock = threading.Lock()
+
+        rows = store.load_ratings() if store is not None else []
+        for name, rating, games in rows:
+            self.ratings[name] = (rating, games)
+        # Highest rating first; names break ties so every key is unique
+        self.ranking = IndexableSkipList.from_sorted(
+            sorted((-rating, name) for name, (rating, _) in self.ratings.items()))
+
+    def record_result(self, x_name: str, o_name: str, winner: Optional[str]):
+        """Apply one finished match; winner is 'X', 'O' or None for a draw"""
+        if x_name == o_name:
+            return
+        x_score = 0.5 if winner is None else 1.0 if winner == 'X' else 0.0
+        with self._lock:
+            x_rating, x_games = self.ratings.get(x_name, (INITIAL_RATING, 0))
+            o_rating, o_games = self.ratings.get(o_name, (INITIAL_RATING, 0))
+            change = self.k_factor * (x_score - expected_score(x_rating, o_rating))
+            self._set(x_name, x_rating + change, x_games + 1)
+            self._set(o_name, o_rating - change, o_games + 1)
+            changed = {name: self.ratings[name] for name in (x_name, o_name)}
+        if self.store is not None:
+            self.store.save_ratings(changed)
+
+    def record_results(self, results: List[Tuple[str, str, Optional[str]]]):
+        for x_name, o_name, winner in results:
+            self.record_result(x_name, o_name, winner)
+
+    def _set(self, name: str, rating: float, games: int):
+        previous = self.ratings.get(name)
+        if previous is not None:
+            self.ranking.remove((-previous[0], name))
+        self.ratings[name] = (rating, games)
+        self.ranking.insert((-rating, name))
+
+    def _entry(self, rank: int, key: Tuple[float, str]) -> Dict:
+        name = key[1]
+        rating, games = self.ratings[name]
+        return {'rank': rank + 1, 'player_name': name, 'rating': round(rating), 'games': games}
+
+    def top(self, count: int = 10, offset: int = 0) -> Dict:
+        with self._lock:
+            keys = self.ranking.iter_from(offset)
+            players = [self._entry(offset + i, key) for i, key in zip(range(count), keys)]
+            return {'players': players, 'total': len(self.ranking)}
+
+    def player(self, name: str, radius: int = 5) -> Optional[Dict]:
+        """A player's rank and rating plus the players just above and below them"""
+        with self._lock:
+            if name not in self.ratings:
+                return None
+            rank = self.ranking.rank((-self.ratings[name][0], name))
+            start = max(0, rank - radius)
+            keys = self.ranking.iter_from(start)
+            around = [self._entry(start + i, key) for i, key in zip(range(rank - start + radius + 1), keys)]
+            entry = self._entry(rank, (None, name))
+            entry.update({'total': len(self.ranking), 'around': around})
+            return entry
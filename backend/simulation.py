@@ -0,0 +1,273 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Headless batch simulation of many games at once.
+
+Thousands of boards advance together as NumPy arrays: each step picks a move
+on every unfinished board, places it and checks only the lines through that
+cell, with the same win condition rooms use. Batches are split over a process
+pool. Used for balance analysis (how much moving first is worth on each grid
+size), for fuzzing Game.check_winner against an independent implementation,
+and as a throughput benchmark:
+
+    python simulation.py balance --games 20000
+    python simulation.py balance --x-policy bot --o-policy random --opening 2 --sizes 3 4 5
+    python simulation.py fuzz --games 2000
+
+Needs NumPy: pip install numpy
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from game_logic import Game, default_win_condition
+
+EMPTY, X, O = 0, 1, 2
+SYMBOLS = {EMPTY: None, X: 'X', O: 'O'}
+
+POLICIES = ('random', 'bot')
+# Seconds the bot may think per move; self-play needs it far below a live game's
+BOT_BUDGET = 0.01
+
+
+@lru_cache(maxsize=None)
+def line_tables(grid_size: int, win_length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Every winning line as (line, k) cells, and (cell, i) ids of the lines through each cell.
+
+    Cells in fewer lines than the busiest are padded with the id len(lines),
+    a spare line that play_batch never lets fill up. Built from sliding
+    windows rather than game_logic.winning_lines, so fuzzing compares two
+    independent implementations.
+    """
+    cells = grid_size * grid_size
+    grid = np.arange(cells).reshape(grid_size, grid_size)
+    windows = sliding_window_view(grid, (win_length, win_length))
+    lines = np.concatenate([
+        sliding_window_view(grid, (1, win_length)).reshape(-1, win_length),
+        sliding_window_view(grid, (win_length, 1)).reshape(-1, win_length),
+        np.diagonal(windows, axis1=2, axis2=3).reshape(-1, win_length),
+        np.diagonal(windows[..., ::-1], axis1=2, axis2=3).reshape(-1, win_length),
+    ])
+
+    by_cell: List[List[int]] = [[] for _ in range(cells)]
+    for line_id, line in enumerate(lines):
+        for cell in line:
+            by_cell[cell].append(line_id)
+    width = max(len(line_ids) for line_ids in by_cell)
+    through = np.full((cells, width), len(lines), dtype=np.intp)
+    for cell, line_ids in enumerate(by_cell):
+        through[cell, :len(line_ids)] = line_ids
+    lines.setflags(write=False)
+    through.setflags(write=False)
+    return lines, through
+
+
+def _masks(row: np.ndarray) -> tuple:
+    """Bitmasks of X and O, as Game keeps them, for one board row"""
+    x_mask = int.from_bytes(np.packbits(row == X, bitorder='little').tobytes(), 'little')
+    o_mask = int.from_bytes(np.packbits(row == O, bitorder='little').tobytes(), 'little')
+    return x_mask, o_mask
+
+
+def play_batch(grid_size: int, games: int, x_policy: str = 'random', o_policy: str = 'random',
+               seed=None, opening: int = 0, record_moves: bool = False,
+               bot_budget: float = BOT_BUDGET) -> Dict:
+    """Play games to the end on grid_size boards, all at once.
+
+    The first `opening` moves of every game are random whatever the policy,
+    so deterministic bots don't replay one game over and over. Returns
+    per-game arrays: 'winners' (EMPTY for a draw), 'lengths' in moves and,
+    with record_moves, 'moves' (-1 past the end).
+    """
+    for policy in (x_policy, o_policy):
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown policy: {policy} (choose from {", ".join(POLICIES)})')
+    win_length = default_win_condition(grid_size)
+    cells = grid_size * grid_size
+    lines, through = line_tables(grid_size, win_length)
+    rng = np.random.default_rng(seed)
+
+    boards = np.zeros((games, cells), dtype=np.int8)
+    # Marks each side has in each line, so a move only bumps and checks the
+    # lines through its cell. The spare padding line starts far below zero:
+    # repeated ids in one fancy-indexed update only count once, but it must
+    # never reach win_length either way
+    counts = np.zeros((games, 2, len(lines) + 1), dtype=np.int8)
+    counts[:, :, -1] = np.iinfo(np.int8).min
+    # A random move is the empty cell with the highest priority; occupied
+    # cells drop to -1. Fixed priorities keep every pick uniform over the
+    # empty cells. With no bot in the game they fix the whole move order
+    # up front instead.
+    priorities = rng.random((games, cells))
+    all_random = x_policy == o_policy == 'random' or opening >= cells
+    order = np.argsort(priorities, axis=1) if all_random else None
+    winners = np.zeros(games, dtype=np.int8)
+    lengths = np.full(games, cells, dtype=np.int16)
+    moves = np.full((games, cells), -1, dtype=np.int16) if record_moves else None
+    active = np.arange(games)
+
+    if 'bot' in (x_policy, o_policy):
+        from bot import choose_move
+
+    for step in range(cells):
+        symbol = X if step % 2 == 0 else O
+        policy = x_policy if symbol == X else o_policy
+        if order is not None:
+            positions = order[active, step]
+        elif policy == 'random' or step < opening:
+            positions = priorities[active].argmax(axis=1)
+        else:
+            name = SYMBOLS[symbol]
+            positions = np.fromiter(
+                (choose_move(grid_size, win_length, *_masks(boards[game]), name,
+                             bot_budget)['position'] for game in active),
+                dtype=np.intp, count=active.size)
+
+        if order is None:
+            boards[active, positions] = symbol
+            priorities[active, positions] = -1
+        if moves is not None:
+            moves[active, step] = positions
+
+        rows = active[:, None]
+        line_ids = through[positions]
+        marks = counts[rows, symbol - 1, line_ids] + 1
+        counts[rows, symbol - 1, line_ids] = marks
+        # Nobody can have win_length in a row before their win_length-th move
+        if step >= 2 * (win_length - 1):
+            won = (marks == win_length).any(axis=1)
+            winners[active[won]] = symbol
+            lengths[active[won]] = step + 1
+            active = active[~won]
+            if not active.size:
+                break
+
+    result = {'grid_size': grid_size, 'win_length': win_length, 'winners': winners,
+              'lengths': lengths}
+    if moves is not None:
+        result['moves'] = moves
+    return result
+
+
+def summarize(result: Dict) -> Dict:
+    winners = result['winners']
+    return {
+        'grid_size': result['grid_size'],
+        'win_length': result['win_length'],
+        'games': int(winners.size),
+        'x_wins': int(np.count_nonzero(winners == X)),
+        'o_wins': int(np.count_nonzero(winners == O)),
+        'draws': int(np.count_nonzero(winners == EMPTY)),
+        'moves': int(result['lengths'].sum()),
+    }
+
+
+def _play_chunk(grid_size: int, games: int, x_policy: str, o_policy: str, seed, opening: int,
+                bot_budget: float) -> Dict:
+    return summarize(play_batch(grid_size, games, x_policy, o_policy, seed, opening,
+                                bot_budget=bot_budget))
+
+
+def simulate(grid_size: int, games: int, x_policy: str = 'random', o_policy: str = 'random',
+             seed: Optional[int] = None, opening: int = 0, workers: Optional[int] = None,
+             bot_budget: float = BOT_BUDGET) -> Dict:
+    """Totals of `games` games split over `workers` processes (every core by default)"""
+    workers = workers or os.cpu_count() or 1
+    chunks = [games // workers + (index < games % workers) for index in range(workers)]
+    chunks = [size for size in chunks if size]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    started = time.perf_counter()
+    if len(chunks) == 1:
+        parts = [_play_chunk(grid_size, chunks[0], x_policy, o_policy, seeds[0], opening, bot_budget)]
+    else:
+        # fork is safe here, unlike in the server (see bot.start_pool): this
+        # command-line run has no other threads, and workers inherit the imported modules
+        with ProcessPoolExecutor(len(chunks), mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = [pool.submit(_play_chunk, grid_size, size, x_policy, o_policy, chunk_seed,
+                                   opening, bot_budget)
+                       for size, chunk_seed in zip(chunks, seeds)]
+            parts = [future.result() for future in futures]
+
+    totals = dict(parts[0])
+    for part in parts[1:]:
+        for key in ('games', 'x_wins', 'o_wins', 'draws', 'moves'):
+            totals[key] += part[key]
+    totals['seconds'] = time.perf_counter() - started
+    return totals
+
+
+def fuzz_check_winner(grid_size: int, games: int, seed: Optional[int] = None) -> List[Dict]:
+    """Replay random batch games through Game and return every disagreement.
+
+    A game agrees when Game ends it on the same move with the same result,
+    and a full-board check_winner() names the same winner.
+    """
+    result = play_batch(grid_size, games, seed=seed, record_moves=True)
+    mismatches = []
+    for index in range(games):
+        game = Game(grid_size)
+        game.add_player('x', 'X', 'X')
+        game.add_player('o', 'O', 'O')
+        length = int(result['lengths'][index])
+        expected = SYMBOLS[int(result['winners'][index])]
+        moves = result['moves'][index, :length].tolist()
+
+        ended_at = None
+        for number, position in enumerate(moves, 1):
+            game.make_move(position, 'x' if game.current_turn == 'X' else 'o')
+            if game.game_over:
+                ended_at = number
+                break
+        full_scan = game.check_winner()
+        full_scan_winner = full_scan['symbol'] if full_scan else None
+        if ended_at != length or game.winner != expected or full_scan_winner != expected:
+            mismatches.append({'grid_size': grid_size, 'moves': moves, 'expected': expected,
+                               'winner': game.winner, 'full_scan_winner': full_scan_winner,
+                               'ended_at': ended_at})
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('mode', choices=('balance', 'fuzz'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(range(3, 11)))
+    parser.add_argument('--games', type=int, default=10000, help='games per grid size')
+    parser.add_argument('--x-policy', choices=POLICIES, default='random')
+    parser.add_argument('--o-policy', choices=POLICIES, default='random')
+    parser.add_argument('--opening', type=int, default=0, help='random moves before the policies take over')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: every core)')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.mode == 'fuzz':
+        failed = 0
+        for grid_size in args.sizes:
+            mismatches = fuzz_check_winner(grid_size, args.games, args.seed)
+            failed += len(mismatches)
+            print(f'{grid_size}x{grid_size}: {args.games} games, {len(mismatches)} mismatches')
+            for mismatch in mismatches[:5]:
+                print('  ', mismatch)
+        raise SystemExit(1 if failed else 0)
+
+    print(f'{args.x_policy} (X, moves first) vs {args.o_policy} (O), {args.games} games per size')
+    print(f'{"grid":>5} {"win":>4} {"X wins":>7} {"O wins":>7} {"draws":>7} {"avg moves":>10} {"games/s":>9}')
+    for grid_size in args.sizes:
+        totals = simulate(grid_size, args.games, args.x_policy, args.o_policy, args.seed,
+                          args.opening, args.workers)
+        games = totals['games']
+        label = f'{grid_size}x{grid_size}'
+        print(f'{label:>5} {totals["win_length"]:>4} {totals["x_wins"] / games:>7.1%} '
+              f'{totals["o_wins"] / games:>7.1%} {totals["draws"] / games:>7.1%} '
+              f'{totals["moves"] / games:>10.1f} {games / totals["seconds"]:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Live rooms snapshotted to SQLite, so a restart doesn't end every match.
+
+The GameManager marks rooms dirty as they change. Every interval the
+snapshotter encodes just those rooms, each under its own room lock and
+taking a few microseconds, and hands the encoded rows to a background
+thread that upserts them (and deletes closed rooms) in one transaction.
+Event handlers never wait on the disk, and a crash mid-write leaves the
+previous snapshot intact.
+
+On startup the rooms are loaded back. Connections didn't survive the
+restart, so every player gets a grace window to take their seat back with
+the resume token their client kept, as after any dropped connection.
+"""
+
+import atexit
+import gc
+import logging
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from bot import is_bot
+from game_logic import Game
+from metrics import REGISTRY
+from storage import os_sleep, start_os_thread
+
+logger = logging.getLogger('tictactoe')
+
+# Path of the snapshot database. Snapshots are opt-in: unset or empty, rooms
+# are neither restored nor written, as when importing app.py from tests or tools.
+ROOM_SNAPSHOT_DB = os.environ.get('ROOM_SNAPSHOT_DB', '')
+SNAPSHOT_INTERVAL = float(os.environ.get('ROOM_SNAPSHOT_MS', 1000)) / 1000
+# Seconds restored players have to reconnect, on top of the restart itself
+RESTORE_GRACE = float(os.environ.get('ROOM_RESTORE_GRACE', 120))
+# Rooms encoded between pauses, so a burst of changes doesn't hog the event loop
+PAUSE_EVERY = 500
+BATCH_SIZE = 5000
+
+ROOMS_WRITTEN = REGISTRY.counter(
+    'snapshot_rooms_written_total', 'Room snapshots written or deleted')
+CAPTURE_SECONDS = REGISTRY.histogram(
+    'snapshot_capture_seconds', 'Time to encode the rooms changed since the last snapshot')
+WRITE_SECONDS = REGISTRY.histogram(
+    'snapshot_write_seconds', 'Time to write one batch of room snapshots')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS rooms (
+    room_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL  -- Game.to_snapshot() as JSON
+);
+'''
+# json.dumps() would build an encoder per call for these options
+encode_snapshot = json.JSONEncoder(separators=(',', ':'), check_circular=False).encode
+UPSERT_ROOM = 'INSERT OR REPLACE INTO rooms (room_id, state) VALUES (?, ?)'
+DELETE_ROOM = 'DELETE FROM rooms WHERE room_id = ?'
+
+
+class RoomSnapshotter:
+    def __init__(self, game_manager, path: str, interval: float = SNAPSHOT_INTERVAL,
+                 restore_grace: float = RESTORE_GRACE):
+        self.game_manager = game_manager
+        self.path = path
+        self.interval = interval
+        self.restore_grace = restore_grace
+        # (rows to upsert, room ids to delete) batches waiting for the writer;
+        # deque append and popleft are atomic
+        self._pending: deque = deque()
+        self._writer_started = False
+        self._writer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._db = self._connect()
+
+        with self._db:
+            self._db.executescript(SCHEMA)
+        if game_manager.dirty_rooms is None:
+            game_manager.dirty_rooms = set()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def restore(self, now: Optional[float] = None) -> int:
+        """Load every snapshotted room into the GameManager; returns how many came back"""
+        now = time.time() if now is None else now
+        restored = 0
+        # Nothing loaded here is garbage, but every room allocates enough to
+        # set off cyclic collections that rescan all the rooms loaded so far
+        gc.disable()
+        try:
+            for room_id, state in self._db.execute('SELECT room_id, state FROM rooms'):
+                try:
+                    # JSON rather than pickle, so a tampered database can't run code here
+                    game = Game.from_snapshot(json.loads(state))
+                except (ValueError, KeyError, TypeError):
+                    logger.exception('unreadable room snapshot room=%s', room_id)
+                    continue
+                absent = [pid for pid in game.players if not is_bot(pid)]
+                restored += self.game_manager.restore_room(room_id, game, absent,
+                                                           self.restore_grace, now)
+        finally:
+            gc.enable()
+        return restored
+
+    def capture(self, pause: Optional[Callable[[], None]] = None) -> int:
+        """Encode the rooms changed since the last capture and queue them for the writer.
+
+        pause, if given, is called every PAUSE_EVERY rooms to let other work
+        run. Returns the number of rooms captured.
+        """
+        manager = self.game_manager
+        dirty = manager.dirty_rooms
+        started = time.perf_counter()
+        rows, removed = [], []
+        # Only the rooms dirty now; ones marked while this runs wait for the next capture
+        for count in range(1, len(dirty) + 1):
+            room_id = dirty.pop()
+            with manager.room_lock(room_id):
+                game = manager.games.get(room_id)
+                if game is None:
+                    removed.append((room_id,))
+                elif not game.room_settings.get('tournament'):
+                    rows.append((room_id, encode_snapshot(game.to_snapshot())))
+            if pause is not None and count % PAUSE_EVERY == 0:
+                pause()
+
+        if rows or removed:
+            self._pending.append((rows, removed))
+            CAPTURE_SECONDS.observe(time.perf_counter() - started)
+            if not self._writer_started:
+                self._start_writer()
+        return len(rows) + len(removed)
+
+    def run_forever(self, sleep: Callable[[float], None] = time.sleep,
+                    pause: Optional[Callable[[], None]] = None):
+        """Capture every interval; sleep and pause let a gevent server stay responsive"""
+        while True:
+            sleep(self.interval)
+            try:
+                self.capture(pause)
+            except Exception:
+                logger.exception('room snapshot failed')
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if not self._writer_started:
+                self._writer_started = True
+                start_os_thread(self._write_loop, ())
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            os_sleep(self.interval / 2)
+            try:
+                self.flush(db)
+            except Exception:
+                logger.exception('room snapshot write failed')
+
+    def flush(self, db: Optional[sqlite3.Connection] = None):
+        """Write every queued batch, oldest first, BATCH_SIZE rooms per transaction"""
+        db = self._db if db is None else db
+        with self._flush_lock:
+            while self._pending:
+                rows, removed = self._pending[0]
+                started = time.perf_counter()
+                # A room appears once per batch, so the chunks can commit
+                # separately; the WAL never grows past one chunk
+                for offset in range(0, len(rows), BATCH_SIZE):
+                    with db:
+                        db.executemany(UPSERT_ROOM, rows[offset:offset + BATCH_SIZE])
+                with db:
+                    db.executemany(DELETE_ROOM, removed)
+                # Dropped only once written, so a failed batch is retried in order
+                self._pending.popleft()
+                WRITE_SECONDS.observe(time.perf_counter() - started)
+                ROOMS_WRITTEN.inc(len(rows) + len(removed))
+
+    def close(self):
+        """Capture and write whatever changed since the last interval, e.g. on shutdown"""
+        self.capture()
+        self.flush()
+
+
+def open_room_snapshots(game_manager, name: str = '') -> Optional[RoomSnapshotter]:
+    """The RoomSnapshotter configured by ROOM_SNAPSHOT_DB, or None when snapshots are off.
+
+    name tells apart processes sharing the setting, such as cluster shards.
+    """
+    if not ROOM_SNAPSHOT_DB:
+        return None
+    path = ROOM_SNAPSHOT_DB
+    if name:
+        root, ext = os.path.splitext(path)
+        path = f'{root}-{name}{ext}'
+    return RoomSnapshotter(game_manager, path)
@@ -0,0 +1,248 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Durable match results and per-player totals in SQLite.
+
+Finished matches are queued in memory and written in batches by a
+background thread, so the move that ends a match never waits on disk.
+Players are identified by name, the only thing that outlives a connection.
+Player totals are kept up to date on write and indexed, so stats and
+leaderboard lookups read a handful of rows instead of the whole history.
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+try:
+    # The writer needs a real OS thread and a real sleep even when gevent
+    # has monkey patched the process, or a slow disk would stall the loop
+    from gevent import monkey
+    start_os_thread = monkey.get_original('_thread', 'start_new_thread')
+    os_sleep = monkey.get_original('time', 'sleep')
+except ImportError:
+    import _thread
+    start_os_thread = _thread.start_new_thread
+    os_sleep = time.sleep
+
+logger = logging.getLogger('tictactoe')
+
+# Path of the SQLite database. Persistence is opt-in: unset or empty, nothing
+# is written, so importing app.py from tests or tools leaves no files behind.
+MATCH_DB = os.environ.get('MATCH_DB', '')
+FLUSH_INTERVAL = float(os.environ.get('MATCH_DB_FLUSH_MS', 500)) / 1000
+BATCH_SIZE = 500
+
+MATCHES_WRITTEN = REGISTRY.counter(
+    'storage_matches_written_total', 'Finished matches written to the match database')
+BATCH_SECONDS = REGISTRY.histogram(
+    'storage_batch_seconds', 'Time to write one batch of matches')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    room_id TEXT NOT NULL,
+    match_number INTEGER NOT NULL,
+    grid_size INTEGER NOT NULL,
+    x_player TEXT NOT NULL,
+    o_player TEXT NOT NULL,
+    winner TEXT,  -- 'X', 'O' or NULL for a draw
+    moves INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS matches_by_x_player ON matches (x_player, finished_at);
+CREATE INDEX IF NOT EXISTS matches_by_o_player ON matches (o_player, finished_at);
+
+CREATE TABLE IF NOT EXISTS player_stats (
+    player_name TEXT PRIMARY KEY,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    matches INTEGER NOT NULL DEFAULT 0,
+    last_played REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_stats_by_wins ON player_stats (wins DESC, matches);
+
+-- Latest rating of each player (see rating.py); ranking is done in memory
+CREATE TABLE IF NOT EXISTS ratings (
+    player_name TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL
+);
+'''
+
+# (room_id, match_number, grid_size, x_player, o_player, winner, moves, finished_at)
+MatchRecord = Tuple[str, int, int, str, str, Optional[str], int, float]
+
+INSERT_MATCH = '''
+INSERT INTO matches (room_id, match_number, grid_size, x_player, o_player, winner, moves, finished_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+UPSERT_PLAYER = '''
+INSERT INTO player_stats (player_name, wins, losses, draws, matches, last_played)
+VALUES (?, ?, ?, ?, 1, ?)
+ON CONFLICT (player_name) DO UPDATE SET
+    wins = wins + excluded.wins,
+    losses = losses + excluded.losses,
+    draws = draws + excluded.draws,
+    matches = matches + 1,
+    last_played = MAX(last_played, excluded.last_played)
+'''
+UPSERT_RATING = '''
+INSERT INTO ratings (player_name, rating, games) VALUES (?, ?, ?)
+ON CONFLICT (player_name) DO UPDATE SET rating = excluded.rating, games = excluded.games
+'''
+
+
+class MatchStore:
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        # deque append and popleft are atomic, so recording takes no lock
+        self._pending: deque = deque()
+        # Only the latest rating of a player needs writing, so changes
+        # between flushes collapse into one row each
+        self._pending_ratings: Dict[str, Tuple[float, int]] = {}
+        self._ratings_lock = threading.Lock()
+        self._writer_started = False
+        self._writer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # One connection for lookups; they are single indexed reads
+        self._reader = self._connect()
+        self._read_lock = threading.Lock()
+
+        with self._reader:
+            self._reader.executescript(SCHEMA)
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # WAL lets readers in other workers query while a batch is written
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.row_factory = sqlite3.Row
+        return db
+
+    def record_match(self, record: MatchRecord):
+        """Queue a finished match; returns immediately"""
+        self._pending.append(record)
+        if not self._writer_started:
+            self._start_writer()
+
+    def save_ratings(self, ratings: Dict[str, Tuple[float, int]]):
+        """Queue {player_name: (rating, games)}; returns immediately"""
+        with self._ratings_lock:
+            self._pending_ratings.update(ratings)
+        if not self._writer_started:
+            self._start_writer()
+
+    def load_ratings(self) -> List[Tuple[str, float, int]]:
+        with self._read_lock:
+            return self._reader.execute('SELECT player_name, rating, games FROM ratings').fetchall()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + len(self._pending_ratings)
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if not self._writer_started:
+                self._writer_started = True
+                start_os_thread(self._write_loop, ())
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            os_sleep(self.flush_interval)
+            try:
+                self.flush(db)
+            except Exception:
+                # Keep the writer alive; a failed batch is dropped, not retried forever
+                logger.exception('match store write failed')
+
+    def flush(self, db: Optional[sqlite3.Connection] = None):
+        """Write everything queued so far, BATCH_SIZE matches per transaction"""
+        if db is None:
+            with self._read_lock:
+                return self.flush(self._reader)
+        with self._flush_lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < BATCH_SIZE:
+                    batch.append(self._pending.popleft())
+                started = time.perf_counter()
+                with db:
+                    db.executemany(INSERT_MATCH, batch)
+                    db.executemany(UPSERT_PLAYER, _player_rows(batch))
+                BATCH_SECONDS.observe(time.perf_counter() - started)
+                MATCHES_WRITTEN.inc(len(batch))
+
+            with self._ratings_lock:
+                ratings, self._pending_ratings = self._pending_ratings, {}
+            if ratings:
+                with db:
+                    db.executemany(UPSERT_RATING, [(name, rating, games)
+                                                   for name, (rating, games) in ratings.items()])
+
+    def player_stats(self, player_name: str, recent: int = 10) -> Optional[Dict]:
+        """A player's totals and their most recent matches, or None if never seen"""
+        with self._read_lock:
+            row = self._reader.execute(
+                'SELECT * FROM player_stats WHERE player_name = ?', (player_name,)).fetchone()
+            if row is None:
+                return None
+            # Two index range scans merged, rather than an OR that can't use either index
+            matches = self._reader.execute('''
+                SELECT * FROM (
+                    SELECT * FROM (SELECT * FROM matches WHERE x_player = ?
+                                   ORDER BY finished_at DESC LIMIT ?)
+                    UNION
+                    SELECT * FROM (SELECT * FROM matches WHERE o_player = ?
+                                   ORDER BY finished_at DESC LIMIT ?)
+                ) ORDER BY finished_at DESC LIMIT ?
+            ''', (player_name, recent, player_name, recent, recent)).fetchall()
+        stats = dict(row)
+        stats['recent_matches'] = [_match_dict(match, player_name) for match in matches]
+        return stats
+
+    def leaderboard(self, limit: int = 10) -> List[Dict]:
+        """Players with the most wins, fewest matches breaking ties"""
+        with self._read_lock:
+            rows = self._reader.execute(
+                'SELECT * FROM player_stats ORDER BY wins DESC, matches LIMIT ?', (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _player_rows(batch: List[MatchRecord]) -> List[Tuple]:
+    rows = []
+    for _, _, _, x_player, o_player, winner, _, finished_at in batch:
+        for name, symbol in ((x_player, 'X'), (o_player, 'O')):
+            rows.append((name, int(winner == symbol),
+                         int(winner is not None and winner != symbol),
+                         int(winner is None), finished_at))
+    return rows
+
+
+def _match_dict(row: sqlite3.Row, player_name: str) -> Dict:
+    symbol = 'X' if row['x_player'] == player_name else 'O'
+    return {
+        'room_id': row['room_id'],
+        'match_number': row['match_number'],
+        'grid_size': row['grid_size'],
+        'symbol': symbol,
+        'opponent': row['o_player'] if symbol == 'X' else row['x_player'],
+        'result': 'draw' if row['winner'] is None else 'win' if row['winner'] == symbol else 'loss',
+        'moves': row['moves'],
+        'finished_at': row['finished_at'],
+    }
+
+
+def open_match_store() -> Optional[MatchStore]:
+    """The MatchStore configured by MATCH_DB, or None when persistence is off"""
+    return MatchStore(MATCH_DB) if MATCH_DB else None
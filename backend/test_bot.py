@@ -0,0 +1,128 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for the bot player and how bot games are recorded."""
+
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import bot
+from bot import BOT_NAME, Search, bot_id, choose_move
+from game_logic import GameManager, winning_lines
+from rating import RatingService
+
+
+def masks(rows):
+    """(X mask, O mask) of a board drawn as rows of 'X', 'O' and '.'"""
+    cells = ''.join(rows)
+    x_mask = sum(1 << position for position, cell in enumerate(cells) if cell == 'X')
+    o_mask = sum(1 << position for position, cell in enumerate(cells) if cell == 'O')
+    return x_mask, o_mask
+
+
+def test_perfect_play_table_never_loses():
+    lines = [mask for _, mask in winning_lines(3, 3)[0]]
+    full = (1 << 9) - 1
+
+    def won(mask):
+        return any(mask & line == line for line in lines)
+
+    def play_out(x_mask, o_mask, symbol, bot_symbol):
+        """Walk every game from here, with the bot answering each opponent move"""
+        bot_mask, other_mask = (x_mask, o_mask) if bot_symbol == 'X' else (o_mask, x_mask)
+        assert not won(other_mask)
+        if won(bot_mask) or x_mask | o_mask == full:
+            return
+        following = 'O' if symbol == 'X' else 'X'
+        if symbol == bot_symbol:
+            position = choose_move(3, 3, x_mask, o_mask, symbol)['position']
+            assert not (x_mask | o_mask) >> position & 1
+            replies = [position]
+        else:
+            replies = [position for position in range(9) if not (x_mask | o_mask) >> position & 1]
+        for position in replies:
+            if symbol == 'X':
+                play_out(x_mask | 1 << position, o_mask, following, bot_symbol)
+            else:
+                play_out(x_mask, o_mask | 1 << position, following, bot_symbol)
+
+    play_out(0, 0, 'X', 'X')
+    play_out(0, 0, 'X', 'O')
+
+
+@pytest.mark.parametrize('rows, forced', [
+    # O threatens the second column; X has no four of its own to finish
+    (('....X', '.XO.X', '.O..O', '.XOX.', '...O.'), 5),
+    # O threatens the right column
+    (('..X..', '..XXO', '....O', 'OX.O.', '..X.O'), 19),
+    # X's win on the top row beats blocking O's bottom row
+    (('XXX..', '.....', '.....', '.....', 'OOO..'), 3),
+])
+def test_bot_plays_a_forced_move_without_searching(rows, forced):
+    search = Search(5, 4)
+    x_mask, o_mask = masks(rows)
+
+    choice = search.choose(x_mask, o_mask, 'X', budget=0.0)
+
+    assert choice['position'] == forced
+    assert choice['depth'] == 0
+
+
+def test_bot_games_are_unrated():
+    ratings = RatingService()
+    gm = GameManager(ratings=ratings)
+    gm.create_room('room', 'human', 'Human')
+    gm.join_room('room', bot_id('room'), BOT_NAME)
+
+    # X takes the top row while the bot's O plays the middle row
+    for human, bot in ((0, 3), (1, 4)):
+        gm.make_move('room', 'human', human)
+        gm.make_move('room', bot_id('room'), bot)
+    assert gm.make_move('room', 'human', 2)['winner'] == 'X'
+
+    assert ratings.ratings == {}
+
+
+def test_games_between_people_are_rated():
+    ratings = RatingService()
+    gm = GameManager(ratings=ratings)
+    gm.create_room('room', 'host', 'Host')
+    gm.join_room('room', 'guest', 'Guest')
+    for host, guest in ((0, 3), (1, 4)):
+        gm.make_move('room', 'host', host)
+        gm.make_move('room', 'guest', guest)
+    gm.make_move('room', 'host', 2)
+
+    assert ratings.ratings['Host'][0] > ratings.ratings['Guest'][0]
+
+
+def test_submit_move_replaces_a_broken_pool():
+    pool = bot.start_pool()
+    for process in list(pool._processes.values()):
+        process.kill()
+    # Wait for the executor to notice its workers are gone
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os.getpid).result(timeout=30)
+
+    x_mask, o_mask = masks(('XXX..', '.....', '.....', '.....', 'OOO..'))
+    choice = bot.submit_move(5, 4, x_mask, o_mask, 'X').result(timeout=30)
+
+    assert choice['position'] == 3
+    assert bot.start_pool() is not pool
+
+
+def test_a_worker_dying_mid_search_drops_the_pool():
+    pool = bot.start_pool()
+    future = bot.submit_move(7, 5, 1 << 24, 0, 'O', budget=30)
+    for process in list(pool._processes.values()):
+        process.kill()
+
+    assert isinstance(future.exception(timeout=30), BrokenProcessPool)
+    # Done-callbacks run just after waiters wake
+    for _ in range(100):
+        if bot._pool is not pool:
+            break
+        time.sleep(0.01)
+    assert bot.start_pool() is not pool
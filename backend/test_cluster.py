@@ -0,0 +1,55 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for ShardedGameManager against a shard served on a Unix socket."""
+
+import threading
+import time
+
+import pytest
+
+from cluster import ShardServer, ShardedGameManager
+from game_logic import GameManager
+
+
+def serve_shard(path: str) -> str:
+    """Start a ShardServer on path and wait until it accepts calls"""
+    server = ShardServer(path, GameManager())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(100):
+        try:
+            ShardedGameManager([path]).count_available_rooms()
+            return path
+        except OSError:
+            time.sleep(0.01)
+    raise RuntimeError(f'shard at {path} did not start')
+
+
+@pytest.fixture
+def shard_path(tmp_path):
+    return serve_shard(str(tmp_path / 'shard.sock'))
+
+
+def test_room_closed_from_another_worker_is_forgotten(shard_path):
+    first, second = ShardedGameManager([shard_path]), ShardedGameManager([shard_path])
+    assert first.create_room('room', 'host', 'Host')
+    assert second.join_room('room', 'guest', 'Guest')['success']
+    assert first.get_player_room('host') == 'room'
+
+    # The guest leaves through the other worker, which closes the room
+    assert second.player_disconnect('guest') == 'room'
+    assert first.get_player_room('host') is None
+    assert 'host' not in first.player_rooms
+    assert first.suspend_player('host') is None
+
+
+def test_rooms_merge_across_shards_in_created_order(tmp_path):
+    paths = [serve_shard(str(tmp_path / f'shard{index}.sock')) for index in range(2)]
+    manager = ShardedGameManager(paths)
+    room_ids = [f'room{index}' for index in range(12)]
+    for room_id in room_ids:
+        assert manager.create_room(room_id, f'host-{room_id}', 'Host')
+
+    assert [room['room_id'] for room in manager.get_available_rooms()] == room_ids
+    assert [room['room_id'] for room in manager.get_available_rooms(offset=3, limit=4)] == room_ids[3:7]
+    newest = manager.get_available_rooms(newest_first=True, limit=5)
+    assert [room['room_id'] for room in newest] == room_ids[::-1][:5]
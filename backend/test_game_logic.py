@@ -0,0 +1,277 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for GameManager and Game: locking, win detection, resume and turn clocks.
+
+Run with `python -m pytest` from backend/.
+"""
+
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+from game_logic import DIRECTIONS, Game, GameManager, parse_time_control
+
+
+def full_scan_winner(game: Game):
+    """Winning symbol found by walking every cell in every direction, or None"""
+    size, length = game.grid_size, game.room_settings['win_condition']
+    board = game.board
+    for start in range(size * size):
+        row, col = divmod(start, size)
+        for d_row, d_col in DIRECTIONS:
+            cells = [(row + d_row * i, col + d_col * i) for i in range(length)]
+            if not all(0 <= r < size and 0 <= c < size for r, c in cells):
+                continue
+            symbols = {board[r * size + c] for r, c in cells}
+            if len(symbols) == 1 and '' not in symbols:
+                return symbols.pop()
+    return None
+
+
+def to_move(game: Game):
+    """Id of the player whose symbol is up, or None"""
+    return next((pid for pid, player in game.players.items()
+                 if player['symbol'] == game.current_turn), None)
+
+
+def check_invariants(gm: GameManager):
+    """The room maps and lobby index agree with gm.games, and every board is legal"""
+    assert set(gm.room_members) == set(gm.games)
+    for room_id, game in gm.games.items():
+        assert gm.room_members[room_id] == set(game.players)
+        for player_id in game.players:
+            assert gm.player_rooms[player_id] == room_id
+        assert game._x_mask & game._o_mask == 0
+        x_count, o_count = bin(game._x_mask).count('1'), bin(game._o_mask).count('1')
+        assert x_count - o_count in (0, 1)
+    for player_id, room_id in gm.player_rooms.items():
+        assert player_id in gm.games[room_id].players
+
+    waiting = {room_id for room_id, game in gm.games.items() if len(game.players) == 1}
+    assert set(gm.open_rooms) == waiting
+    assert sum(len(rooms) for rooms in gm.open_rooms_by_size.values()) == len(waiting)
+
+
+def run_threads(target, count: int):
+    errors = []
+
+    def guarded(index: int):
+        try:
+            target(index)
+        except Exception as exc:  # surfaced below; a thread's exception is otherwise lost
+            errors.append(exc)
+
+    # Switch threads as often as possible to provoke interleavings
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=guarded, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert not errors
+
+
+def test_concurrent_joins_seat_exactly_one_guest_per_room():
+    gm = GameManager(lock_stripes=4)
+    room_ids = [f'room{i}' for i in range(500)]
+    for i, room_id in enumerate(room_ids):
+        gm.create_room(room_id, f'host{i}', 'Host', 3 + i % 8)
+    joins = [0] * 16
+
+    def join_all(index: int):
+        order = list(room_ids)
+        random.Random(index).shuffle(order)
+        for room_id in order:
+            if gm.join_room(room_id, f'guest{index}-{room_id}', 'Guest')['success']:
+                joins[index] += 1
+
+    run_threads(join_all, len(joins))
+
+    assert sum(joins) == len(room_ids)
+    assert not gm.open_rooms and not gm.open_rooms_by_size
+    check_invariants(gm)
+
+
+def test_concurrent_join_move_disconnect_keeps_maps_consistent():
+    # Few stripes, so unrelated rooms share locks and contend for them
+    gm = GameManager(lock_stripes=4)
+    rooms = [f'room{i}' for i in range(40)]
+
+    def player(worker: int):
+        rng = random.Random(worker)
+        for step in range(2000):
+            room_id = rng.choice(rooms)
+            player_id = f'p{worker}-{step}'
+            action = rng.random()
+            if action < 0.3:
+                gm.create_room(room_id, player_id, player_id, rng.choice((3, 4, 5)))
+            elif action < 0.6:
+                gm.join_room(room_id, player_id, player_id)
+            elif action < 0.9:
+                with gm.room_lock(room_id):
+                    game = gm.games.get(room_id)
+                    mover = to_move(game) if game else None
+                    cells = game.grid_size ** 2 if game else 0
+                if mover:
+                    gm.make_move(room_id, mover, rng.randrange(cells))
+            else:
+                with gm.room_lock(room_id):
+                    game = gm.games.get(room_id)
+                    members = list(game.players) if game else []
+                if members:
+                    gm.player_disconnect(rng.choice(members))
+
+    run_threads(player, 8)
+    check_invariants(gm)
+
+
+@pytest.mark.parametrize('grid_size', [3, 4, 5, 6, 7])
+def test_incremental_win_check_matches_full_scan(grid_size):
+    rng = random.Random(grid_size)
+    for _ in range(60):
+        game = Game(grid_size)
+        game.add_player('x', 'X player', 'X')
+        game.add_player('o', 'O player', 'O')
+        cells = list(range(grid_size * grid_size))
+        rng.shuffle(cells)
+        for position in cells:
+            assert game.make_move(position, to_move(game))
+            if game.game_over:
+                break
+            assert full_scan_winner(game) is None
+
+        assert game.winner == full_scan_winner(game)
+        if game.winner:
+            assert all(game.board[pos] == game.winner for pos in game.winning_line)
+        else:
+            assert game.is_draw
+
+
+def seated_room(gm: GameManager, room_id: str = 'room', time_control=None):
+    gm.create_room(room_id, 'host', 'Host', time_control=time_control)
+    gm.join_room(room_id, 'guest', 'Guest')
+    return gm.games[room_id]
+
+
+def test_resume_within_grace_keeps_the_seat():
+    gm = GameManager(resume_grace=30)
+    game = seated_room(gm)
+    token = game.resume_tokens['host']
+
+    gm.suspend_player('host')
+    assert gm.reap_expired(now=time.time() + 10) == []
+
+    result = gm.resume_session('room', token, 'host-again')
+    assert result['success']
+    assert result['previous_id'] == 'host'
+    assert result['symbol'] == 'X'
+    assert gm.get_player_room('host-again') == 'room'
+    assert not game.disconnected
+    check_invariants(gm)
+
+
+def test_resume_after_grace_finds_the_room_gone():
+    gm = GameManager(resume_grace=30)
+    game = seated_room(gm)
+    token = game.resume_tokens['host']
+
+    gm.suspend_player('host')
+    evicted = gm.reap_expired(now=time.time() + 31)
+    assert [room['room_id'] for room in evicted] == ['room']
+    assert evicted[0]['reason'] == 'abandoned'
+
+    assert gm.resume_session('room', token, 'host-again') == {
+        'success': False, 'message': 'Room not found'}
+    assert gm.get_player_room('guest') is None
+
+
+def test_resume_rejects_unknown_tokens():
+    gm = GameManager()
+    seated_room(gm)
+    assert gm.resume_session('room', 'not-a-token', 'intruder') == {
+        'success': False, 'message': 'Session expired'}
+
+
+def test_waiting_room_leaves_the_lobby_while_its_host_is_away():
+    gm = GameManager(resume_grace=30)
+    gm.create_room('room', 'host', 'Host')
+    token = gm.games['room'].resume_tokens['host']
+
+    gm.suspend_player('host')
+    assert gm.get_available_rooms() == []
+
+    assert gm.resume_session('room', token, 'host-again')['success']
+    assert [room['room_id'] for room in gm.get_available_rooms()] == ['room']
+
+
+def test_resumed_waiting_room_keeps_its_place_in_the_lobby():
+    gm = GameManager(resume_grace=30)
+    for room_id in ('first', 'second', 'third'):
+        gm.create_room(room_id, f'host-{room_id}', 'Host', grid_size=4)
+        time.sleep(0.001)
+    token = gm.games['first'].resume_tokens['host-first']
+
+    gm.suspend_player('host-first')
+    assert gm.resume_session('first', token, 'host-again')['success']
+
+    in_order = ['first', 'second', 'third']
+    assert [room['room_id'] for room in gm.get_available_rooms()] == in_order
+    assert [room['room_id'] for room in gm.get_available_rooms(grid_size=4)] == in_order
+    assert [room['room_id'] for room in gm.get_available_rooms(newest_first=True)] == in_order[::-1]
+    assert [room['room_id'] for room in gm.get_available_rooms(offset=1, limit=1)] == ['second']
+
+
+def test_move_timer_expiry_ends_the_match_for_the_player_to_move():
+    gm = GameManager()
+    game = seated_room(gm, time_control=parse_time_control({'mode': 'move', 'seconds': 10}))
+    deadline = game.turn_deadline
+    assert deadline is not None
+
+    assert gm.expire_turns(now=deadline - 1) == []
+    assert not game.game_over
+
+    timeouts = gm.expire_turns(now=deadline + 1)
+    assert len(timeouts) == 1
+    assert timeouts[0]['player_id'] == 'host'
+    assert timeouts[0]['winner'] == 'O'
+    assert timeouts[0]['winner_name'] == 'Guest'
+    assert game.game_over and game.winner == 'O'
+    assert gm.expire_turns(now=deadline + 100) == []
+
+
+def test_move_resets_the_move_timer():
+    gm = GameManager()
+    game = seated_room(gm, time_control=parse_time_control({'mode': 'move', 'seconds': 10}))
+    first_deadline = game.turn_deadline
+
+    time.sleep(0.01)
+    assert gm.make_move('room', 'host', 0)['success']
+    assert game.turn_deadline > first_deadline
+    assert gm.expire_turns(now=first_deadline + 0.005) == []
+    timeouts = gm.expire_turns(now=game.turn_deadline + 1)
+    assert [timeout['player_id'] for timeout in timeouts] == ['guest']
+
+
+def test_chess_clock_adds_the_increment_after_each_move():
+    gm = GameManager()
+    time_control = parse_time_control({'mode': 'clock', 'seconds': 60, 'increment': 5})
+    game = seated_room(gm, time_control=time_control)
+
+    assert gm.make_move('room', 'host', 0)['success']
+    assert 64 < game.clocks['X'] <= 65
+    assert game.clocks['O'] == 60
+
+
+def test_parse_time_control_rejects_out_of_range_values():
+    assert parse_time_control(None) is None
+    with pytest.raises(ValueError):
+        parse_time_control({'mode': 'move', 'seconds': 1})
+    with pytest.raises(ValueError):
+        parse_time_control({'mode': 'sudden death', 'seconds': 60})
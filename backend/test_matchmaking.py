@@ -0,0 +1,95 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for the rating and grid-size matchmaking queue."""
+
+import itertools
+import random
+
+from matchmaking import Matchmaker
+
+
+def names(pairs):
+    return [(first.player_id, second.player_id) for first, second in pairs]
+
+
+def test_window_widens_with_waiting_until_it_reaches_the_cap():
+    matchmaker = Matchmaker(base_window=100, widen_per_second=25, max_window=300)
+    matchmaker.enqueue('low', 'Low', 3, 1500, now=0)
+    matchmaker.enqueue('high', 'High', 3, 1750, now=0)
+
+    assert matchmaker.tick(now=5) == []
+    assert matchmaker.window(matchmaker.tickets['low'], now=5) == 225
+    assert matchmaker.window(matchmaker.tickets['low'], now=1000) == 300
+
+    assert names(matchmaker.tick(now=6)) == [('low', 'high')]
+    assert 'low' not in matchmaker and matchmaker.depth() == {}
+
+
+def test_players_too_far_apart_wait_however_long_it_takes():
+    matchmaker = Matchmaker(base_window=100, widen_per_second=25, max_window=300)
+    matchmaker.enqueue('low', 'Low', 3, 1000, now=0)
+    matchmaker.enqueue('high', 'High', 3, 2000, now=0)
+
+    assert matchmaker.tick(now=10_000) == []
+    assert matchmaker.depth() == {3: 2}
+
+
+def test_longer_waiters_window_decides_and_they_come_first():
+    matchmaker = Matchmaker(base_window=100, widen_per_second=25, max_window=1000)
+    matchmaker.enqueue('veteran', 'Veteran', 3, 1700, now=0)
+    matchmaker.enqueue('newcomer', 'Newcomer', 3, 1500, now=9)
+
+    assert names(matchmaker.tick(now=10)) == [('veteran', 'newcomer')]
+
+
+def test_players_only_meet_others_on_the_same_grid_size():
+    matchmaker = Matchmaker()
+    matchmaker.enqueue('a', 'A', 3, 1500, now=0)
+    matchmaker.enqueue('b', 'B', 4, 1500, now=0)
+    matchmaker.enqueue('c', 'C', 4, 1510, now=1)
+
+    assert names(matchmaker.tick(now=1)) == [('b', 'c')]
+    assert matchmaker.depth() == {3: 1}
+
+
+def test_closest_neighbours_are_paired():
+    matchmaker = Matchmaker(base_window=50, widen_per_second=0, max_window=50)
+    for player_id, rating in (('a', 1000), ('b', 1030), ('c', 1100), ('d', 1120), ('e', 1400)):
+        matchmaker.enqueue(player_id, player_id, 3, rating, now=0)
+
+    assert sorted(names(matchmaker.tick(now=0))) == [('a', 'b'), ('c', 'd')]
+    assert list(matchmaker.tickets) == ['e']
+
+
+def test_cancel_and_requeue():
+    matchmaker = Matchmaker()
+    assert matchmaker.enqueue('a', 'A', 3, 1500, now=0)
+    assert not matchmaker.enqueue('a', 'A', 3, 1500, now=1)
+    assert matchmaker.cancel('a').name == 'A'
+    assert matchmaker.cancel('a') is None
+    assert matchmaker.depth() == {}
+    assert matchmaker.enqueue('a', 'A', 5, 1500, now=2)
+
+
+def test_every_player_is_paired_at_most_once():
+    rng = random.Random(3)
+    matchmaker = Matchmaker(base_window=50, widen_per_second=10, max_window=400)
+    queued = set()
+    paired = []
+    player_ids = (f'p{index}' for index in itertools.count())
+    for now in range(200):
+        for _ in range(rng.randrange(4)):
+            player_id = next(player_ids)
+            queued.add(player_id)
+            matchmaker.enqueue(player_id, player_id, rng.choice((3, 4)),
+                               rng.gauss(1500, 200), now=now)
+        if rng.random() < 0.1 and matchmaker.tickets:
+            queued.discard(matchmaker.cancel(rng.choice(list(matchmaker.tickets))).player_id)
+        for first, second in matchmaker.tick(now=now):
+            assert first.grid_size == second.grid_size
+            assert first.queued_at <= second.queued_at
+            paired += [first.player_id, second.player_id]
+
+    assert len(paired) == len(set(paired))
+    assert set(paired) | set(matchmaker.tickets) == queued
+    assert sum(matchmaker.depth().values()) == len(matchmaker.tickets)
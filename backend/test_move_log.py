@@ -0,0 +1,102 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for the per-room move log: replays, catch-up and bulk export."""
+
+import random
+
+import pytest
+
+from move_log import MAX_MATCHES, SNAPSHOT_EVERY, MoveLog, board_from_masks, read_export
+
+
+def play(log: MoveLog, cells, started_at: float = 1000.0, version: int = 0):
+    """Record cells as alternating X and O moves, one a second; returns the boards after each"""
+    x_mask = o_mask = 0
+    boards = [board_from_masks(log.grid_size, 0, 0)]
+    for index, position in enumerate(cells):
+        symbol = 'X' if index % 2 == 0 else 'O'
+        if symbol == 'X':
+            x_mask |= 1 << position
+        else:
+            o_mask |= 1 << position
+        log.record(position, symbol, started_at + index + 1, version + index + 1, x_mask, o_mask)
+        boards.append(board_from_masks(log.grid_size, x_mask, o_mask))
+    return boards
+
+
+def shuffled_cells(grid_size: int, count: int, seed: int = 0):
+    cells = list(range(grid_size * grid_size))
+    random.Random(seed).shuffle(cells)
+    return cells[:count]
+
+
+def test_replay_rebuilds_the_board_after_any_move():
+    log = MoveLog(10, started_at=1000.0)
+    cells = shuffled_cells(10, SNAPSHOT_EVERY * 3 + 5)
+    boards = play(log, cells)
+    assert len(log.current.snapshots) == 4
+
+    for move_index, board in enumerate(boards):
+        assert log.replay(move_index=move_index)['board'] == board
+
+    replay = log.replay()
+    assert [move['position'] for move in replay['moves']] == cells
+    assert [move['symbol'] for move in replay['moves'][:2]] == ['X', 'O']
+    assert [move['elapsed_ms'] for move in replay['moves'][:3]] == [1000, 2000, 3000]
+    # Out-of-range indexes clamp to the ends of the match
+    assert log.replay(move_index=-5)['board'] == boards[0]
+    assert log.replay(move_index=10_000)['board'] == boards[-1]
+
+
+def test_catch_up_is_the_latest_snapshot_plus_later_moves():
+    log = MoveLog(10, started_at=1000.0)
+    cells = shuffled_cells(10, SNAPSHOT_EVERY * 2 + 3)
+    boards = play(log, cells)
+
+    catch_up = log.catch_up()
+    snapshot = catch_up['snapshot']
+    assert snapshot['move_index'] == SNAPSHOT_EVERY * 2
+    assert snapshot['version'] == SNAPSHOT_EVERY * 2
+    assert snapshot['board'] == boards[SNAPSHOT_EVERY * 2]
+
+    board = list(snapshot['board'])
+    for move in catch_up['moves']:
+        board[move['position']] = move['symbol']
+    assert board == boards[-1]
+
+
+def test_export_round_trips_every_kept_match():
+    log = MoveLog(5, started_at=1000.0)
+    play(log, shuffled_cells(5, 9, seed=1))
+    log.finish_match('X')
+    log.start_match(2, now=2000.0, version=20)
+    play(log, shuffled_cells(5, 25, seed=2), started_at=2000.0, version=20)
+    log.finish_match('draw')
+    log.start_match(3, now=3000.0, version=50)
+    play(log, shuffled_cells(5, 4, seed=3), started_at=3000.0, version=50)
+
+    exported = read_export(log.export())
+
+    assert exported['grid_size'] == 5
+    assert [match['result'] for match in exported['matches']] == ['X', 'draw', None]
+    for match in exported['matches']:
+        replay = log.replay(match['match_number'])
+        assert match['started_at'] == replay['started_at']
+        assert match['moves'] == replay['moves']
+
+
+def test_only_the_latest_matches_are_kept():
+    log = MoveLog(3, started_at=0.0)
+    for match_number in range(2, MAX_MATCHES + 5):
+        play(log, [4, 0, 8])
+        log.start_match(match_number, now=float(match_number), version=match_number * 10)
+
+    numbers = [match.match_number for match in log.matches]
+    assert numbers == list(range(5, MAX_MATCHES + 5))
+    assert log.replay(1) is None
+    assert isinstance(log.matches[0].moves, bytes)
+
+
+def test_read_export_rejects_other_data():
+    with pytest.raises(ValueError):
+        read_export(b'NOTLOG\x01\x03\x00\x00')
@@ -0,0 +1,68 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for the packed board wire format the client reads with unpackBoard."""
+
+import base64
+import json
+import random
+
+import pytest
+
+from game_logic import Game, pack_board, unpack_board
+
+
+def js_unpack_board(packed: str, cells: int):
+    """Line for line port of unpackBoard() in frontend/script.js"""
+    symbols = ['', 'X', 'O', '']
+    data = base64.b64decode(packed)
+    return [symbols[(data[i >> 2] >> ((i & 3) * 2)) & 3] for i in range(cells)]
+
+
+def random_masks(rng: random.Random, cells: int):
+    x_mask = o_mask = 0
+    for position in range(cells):
+        cell = rng.randrange(3)
+        if cell == 1:
+            x_mask |= 1 << position
+        elif cell == 2:
+            o_mask |= 1 << position
+    return x_mask, o_mask
+
+
+def board_list(x_mask: int, o_mask: int, cells: int):
+    return ['X' if x_mask >> i & 1 else 'O' if o_mask >> i & 1 else '' for i in range(cells)]
+
+
+def test_cells_take_two_bits_each_from_the_low_bits_up():
+    # X in cell 0, O in cell 1, X in cell 3, O in cell 4
+    packed = pack_board(0b01001, 0b10010, 9)
+    assert packed == bytes([0b01_00_10_01, 0b10, 0])
+
+
+@pytest.mark.parametrize('grid_size', range(3, 11))
+def test_round_trips_through_both_decoders(grid_size):
+    cells = grid_size * grid_size
+    rng = random.Random(grid_size)
+    for _ in range(50):
+        x_mask, o_mask = random_masks(rng, cells)
+        packed = pack_board(x_mask, o_mask, cells)
+        expected = board_list(x_mask, o_mask, cells)
+
+        assert len(packed) == (cells + 3) // 4
+        assert unpack_board(packed, cells) == expected
+        assert js_unpack_board(base64.b64encode(packed).decode('ascii'), cells) == expected
+
+
+def test_packed_state_matches_the_json_state():
+    game = Game(5)
+    game.add_player('x', 'X player', 'X')
+    game.add_player('o', 'O player', 'O')
+    for position, player_id in ((12, 'x'), (0, 'o'), (24, 'x'), (7, 'o')):
+        assert game.make_move(position, player_id)
+
+    plain = json.loads(game.get_state_json())
+    packed = json.loads(game.get_state_packed_json())
+
+    assert 'board' not in packed
+    assert js_unpack_board(packed.pop('board_packed'), 25) == plain.pop('board')
+    assert packed == plain
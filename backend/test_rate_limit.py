@@ -0,0 +1,72 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for the per-connection rate limiter and typing tracker."""
+
+from rate_limit import DEFAULT_LIMITS, RateLimiter, TypingTracker, parse_limits
+
+
+def test_a_full_bucket_allows_a_burst_then_refills_at_the_rate():
+    limiter = RateLimiter({'chat_message': (2.0, 4)})
+    assert [limiter.allow('sid', 'chat_message', now=0) for _ in range(5)] == [True] * 4 + [False]
+
+    # Half a second buys one token back at 2 a second
+    assert limiter.allow('sid', 'chat_message', now=0.5)
+    assert not limiter.allow('sid', 'chat_message', now=0.5)
+
+
+def test_refill_stops_at_the_burst():
+    limiter = RateLimiter({'chat_message': (2.0, 4)})
+    for _ in range(4):
+        limiter.allow('sid', 'chat_message', now=0)
+
+    allowed = [limiter.allow('sid', 'chat_message', now=100) for _ in range(6)]
+    assert allowed == [True] * 4 + [False] * 2
+
+
+def test_buckets_are_per_connection_and_event():
+    limiter = RateLimiter({'chat_message': (1.0, 1), 'typing': (1.0, 1)})
+    assert limiter.allow('first', 'chat_message', now=0)
+    assert not limiter.allow('first', 'chat_message', now=0)
+    assert limiter.allow('first', 'typing', now=0)
+    assert limiter.allow('second', 'chat_message', now=0)
+    # Events without a limit always go through
+    assert all(limiter.allow('first', 'join_room', now=0) for _ in range(100))
+
+    limiter.forget('first')
+    assert limiter.allow('first', 'chat_message', now=0)
+
+
+def test_parse_limits_overrides_the_defaults():
+    limits = parse_limits(' make_move=1:3 , chat_message=0.5 ,')
+    assert limits['make_move'] == (1.0, 3)
+    # Without a burst, a second's worth and at least 1
+    assert limits['chat_message'] == (0.5, 1)
+    assert limits['typing'] == DEFAULT_LIMITS['typing']
+
+
+def test_typing_is_news_only_when_it_starts_or_stops():
+    tracker = TypingTracker(timeout=5)
+    assert tracker.start('room', 'sid', now=0)
+    assert not tracker.start('room', 'sid', now=1)
+    assert tracker.stop('room', 'sid', now=2)
+    assert not tracker.stop('room', 'sid', now=3)
+    assert tracker.typing == {}
+
+
+def test_typing_expires_when_stop_never_comes():
+    tracker = TypingTracker(timeout=5)
+    assert tracker.start('room', 'sid', now=0)
+    # Each keystroke pushes the expiry back
+    assert not tracker.start('room', 'sid', now=4)
+    assert not tracker.start('room', 'sid', now=8)
+
+    assert tracker.start('room', 'sid', now=20)
+    assert not tracker.stop('room', 'sid', now=30)
+    assert tracker.typing == {}
+
+
+def test_stale_entries_are_dropped_on_the_next_keystroke():
+    tracker = TypingTracker(timeout=5)
+    tracker.start('first', 'sid', now=0)
+    tracker.start('second', 'sid', now=10)
+    assert tracker.typing == {'sid': {'second': 15}}
@@ -0,0 +1,104 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for Elo ratings and the indexable skip list that ranks them."""
+
+import bisect
+import random
+
+import pytest
+
+from rating import INITIAL_RATING, IndexableSkipList, RatingService
+from storage import MatchStore
+
+
+def check_against(skip_list: IndexableSkipList, expected: list):
+    """Every rank, index and range lookup agrees with a plain sorted list"""
+    assert len(skip_list) == len(expected)
+    assert list(skip_list) == expected
+    for index, key in enumerate(expected):
+        assert skip_list.rank(key) == index
+        assert skip_list[index] == key
+    for start in range(-1, len(expected) + 2, 7):
+        assert list(skip_list.iter_from(start)) == expected[max(start, 0):]
+
+
+def test_skip_list_matches_a_sorted_list_through_inserts_and_removes():
+    rng = random.Random(7)
+    skip_list, expected = IndexableSkipList(seed=1), []
+    for step in range(3000):
+        if expected and rng.random() < 0.4:
+            key = expected.pop(rng.randrange(len(expected)))
+            skip_list.remove(key)
+        else:
+            key = (rng.randrange(1000), step)
+            bisect.insort(expected, key)
+            skip_list.insert(key)
+        if step % 500 == 0:
+            check_against(skip_list, expected)
+    check_against(skip_list, expected)
+
+
+def test_skip_list_built_from_sorted_keys_keeps_working():
+    keys = list(range(0, 2000, 2))
+    skip_list = IndexableSkipList.from_sorted(keys, seed=3)
+    check_against(skip_list, keys)
+
+    skip_list.insert(501)
+    skip_list.remove(0)
+    check_against(skip_list, sorted(keys[1:] + [501]))
+
+
+def test_skip_list_lookups_of_missing_keys():
+    skip_list = IndexableSkipList.from_sorted([1, 3, 5], seed=0)
+    assert skip_list.rank(4) is None
+    assert list(skip_list.iter_from(3)) == []
+    with pytest.raises(KeyError):
+        skip_list.remove(4)
+    with pytest.raises(IndexError):
+        skip_list[3]
+
+
+def test_a_win_moves_ratings_by_the_same_amount_each_way():
+    ratings = RatingService()
+    ratings.record_result('Ann', 'Bob', 'X')
+    ann, bob = ratings.ratings['Ann'], ratings.ratings['Bob']
+    assert ann == (INITIAL_RATING + 16, 1)
+    assert bob == (INITIAL_RATING - 16, 1)
+
+    # An upset moves ratings further than the expected result did
+    ratings.record_result('Ann', 'Bob', 'O')
+    assert ratings.ratings['Bob'][0] - bob[0] > 16
+
+    ratings.record_result('Cid', 'Cid', 'X')
+    assert 'Cid' not in ratings.ratings
+
+
+def test_top_and_player_read_ranks_from_the_skip_list():
+    ratings = RatingService()
+    names = [f'player{index:02}' for index in range(20)]
+    # Each player beats everyone after them once, so names sort into rank order
+    for index, winner in enumerate(names):
+        for loser in names[index + 1:]:
+            ratings.record_result(winner, loser, 'X')
+
+    top = ratings.top(count=5, offset=2)
+    assert top['total'] == 20
+    assert [player['player_name'] for player in top['players']] == names[2:7]
+    assert [player['rank'] for player in top['players']] == [3, 4, 5, 6, 7]
+
+    entry = ratings.player('player10', radius=2)
+    assert entry['rank'] == 11
+    assert [player['player_name'] for player in entry['around']] == names[8:13]
+    assert [player['player_name'] for player in ratings.player('player00', radius=2)['around']] == names[:3]
+    assert ratings.player('nobody') is None
+
+
+def test_ratings_reload_from_the_store(tmp_path):
+    store = MatchStore(str(tmp_path / 'matches.db'), flush_interval=3600)
+    ratings = RatingService(store)
+    ratings.record_result('Ann', 'Bob', 'X')
+    store.flush()
+
+    reloaded = RatingService(store)
+    assert reloaded.ratings == ratings.ratings
+    assert [player['player_name'] for player in reloaded.top()['players']] == ['Ann', 'Bob']
@@ -0,0 +1,156 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for snapshotting rooms to SQLite and restoring them after a restart."""
+
+import json
+import pickle
+import sqlite3
+
+import pytest
+
+from bot import BOT_NAME, bot_id
+from game_logic import GameManager, parse_time_control
+from snapshot import RoomSnapshotter
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / 'rooms.db')
+
+
+@pytest.fixture
+def snapshotter(snapshot_path):
+    """Snapshots a fresh GameManager's rooms to snapshot_path"""
+    return RoomSnapshotter(GameManager(), snapshot_path)
+
+
+def save(snapshotter: RoomSnapshotter):
+    snapshotter.capture()
+    snapshotter.flush()
+
+
+def restart(path: str) -> GameManager:
+    """A fresh GameManager with the rooms snapshotted at path loaded back"""
+    gm = GameManager(resume_grace=30)
+    RoomSnapshotter(gm, path).restore()
+    return gm
+
+
+def test_restore_brings_back_the_room_as_snapshotted(snapshotter, snapshot_path):
+    gm = snapshotter.game_manager
+    time_control = parse_time_control({'mode': 'clock', 'seconds': 60, 'increment': 2})
+    gm.create_room('room', 'host', 'Host', grid_size=3, time_control=time_control)
+    gm.join_room('room', 'guest', 'Guest')
+    for player_id, position in (('host', 0), ('guest', 3), ('host', 1), ('guest', 4), ('host', 2)):
+        gm.make_move('room', player_id, position)
+    # A second match, so there are scores and history to keep
+    assert gm.restart_game('room', 'host')['success']
+    gm.make_move('room', next(pid for pid, player in gm.games['room'].players.items()
+                              if player['symbol'] == 'X'), 4)
+    save(snapshotter)
+
+    restored = restart(snapshot_path)
+
+    before, after = gm.games['room'].to_snapshot(), restored.games['room'].to_snapshot()
+    # Idle and turn clocks restart from the restore
+    for clock in ('last_move_at', 'turn_started_at'):
+        before.pop(clock), after.pop(clock)
+    assert after == before
+    assert restored.games['room'].board == gm.games['room'].board
+    assert set(restored.games['room'].disconnected) == {'host', 'guest'}
+
+
+def test_snapshots_are_stored_as_json(snapshotter, snapshot_path):
+    snapshotter.game_manager.create_room('room', 'host', 'Host')
+    save(snapshotter)
+
+    with sqlite3.connect(snapshot_path) as db:
+        (state,), = db.execute('SELECT state FROM rooms')
+    assert json.loads(state)['players'] == {'host': {'name': 'Host', 'symbol': 'X'}}
+
+
+calls = []
+
+
+def run_code():
+    calls.append('ran')
+
+
+class Exploit:
+    def __reduce__(self):
+        return run_code, ()
+
+
+def test_restore_never_unpickles(snapshotter, snapshot_path):
+    with sqlite3.connect(snapshot_path) as db:
+        db.execute('INSERT INTO rooms (room_id, state) VALUES (?, ?)',
+                   ('evil', pickle.dumps(Exploit())))
+
+    assert restart(snapshot_path).games == {}
+    assert calls == []
+
+
+def test_restored_bot_room_keeps_the_bot_seated(snapshotter, snapshot_path):
+    gm = snapshotter.game_manager
+    gm.create_room('room', 'human', 'Human', grid_size=4)
+    gm.join_room('room', bot_id('room'), BOT_NAME)
+    token = gm.games['room'].resume_tokens['human']
+    gm.make_move('room', 'human', 5)
+    save(snapshotter)
+
+    restored = restart(snapshot_path)
+
+    assert restored.get_player_room(bot_id('room')) == 'room'
+    assert restored.get_player_room('human') is None
+    assert restored.resume_session('room', token, 'human-again')['success']
+    assert restored.make_move('room', bot_id('room'), 6)['success']
+
+
+def test_tournament_rooms_are_not_snapshotted(snapshotter, snapshot_path):
+    gm = snapshotter.game_manager
+    gm.create_match_rooms(3, [('T1-1', [('alice', 'Alice'), ('bob', 'Bob')])])
+    gm.create_room('room', 'host', 'Host')
+    save(snapshotter)
+
+    restored = restart(snapshot_path)
+
+    assert set(restored.games) == {'room'}
+    assert restored.get_player_room('alice') is None
+
+
+def test_closed_rooms_are_deleted_from_the_snapshot(snapshotter, snapshot_path):
+    gm = snapshotter.game_manager
+    gm.create_room('kept', 'host', 'Host')
+    gm.create_room('closed', 'other', 'Other')
+    save(snapshotter)
+
+    gm.player_disconnect('other')
+    save(snapshotter)
+
+    assert set(restart(snapshot_path).games) == {'kept'}
+
+
+def test_restored_waiting_room_returns_to_the_lobby_once_its_host_resumes(snapshotter, snapshot_path):
+    gm = snapshotter.game_manager
+    gm.create_room('room', 'host', 'Host')
+    token = gm.games['room'].resume_tokens['host']
+    save(snapshotter)
+
+    restored = restart(snapshot_path)
+    assert restored.get_available_rooms() == []
+    assert restored.resume_session('room', token, 'host-again')['success']
+    assert [room['room_id'] for room in restored.get_available_rooms()] == ['room']
+
+
+def test_seats_nobody_reclaims_close_the_room_after_the_grace(snapshotter, snapshot_path):
+    gm = snapshotter.game_manager
+    gm.create_room('room', 'host', 'Host')
+    gm.join_room('room', 'guest', 'Guest')
+    save(snapshotter)
+
+    restored = GameManager()
+    RoomSnapshotter(restored, snapshot_path, restore_grace=60).restore(now=1000.0)
+
+    assert restored.reap_expired(now=1059.0) == []
+    assert [room['room_id'] for room in restored.reap_expired(now=1061.0)] == ['room']
+    assert restored.games == {}
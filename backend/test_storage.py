@@ -0,0 +1,83 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for the SQLite match history and player stats."""
+
+import pytest
+
+from game_logic import GameManager
+from storage import MatchStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Flushed by hand, so the background writer never runs mid-test
+    return MatchStore(str(tmp_path / 'matches.db'), flush_interval=3600)
+
+
+def match(room_id, number, x_player, o_player, winner, finished_at, grid_size=3, moves=7):
+    return (room_id, number, grid_size, x_player, o_player, winner, moves, finished_at)
+
+
+def test_matches_are_written_only_on_flush(store):
+    store.record_match(match('room', 1, 'Ann', 'Bob', 'X', 100.0))
+    assert store.pending == 1
+    assert store.player_stats('Ann') is None
+
+    store.flush()
+
+    assert store.pending == 0
+    assert store.player_stats('Ann')['wins'] == 1
+
+
+def test_player_stats_total_every_match_from_the_players_side(store):
+    store.record_match(match('room', 1, 'Ann', 'Bob', 'X', 100.0))
+    store.record_match(match('room', 2, 'Bob', 'Ann', 'X', 200.0, moves=9))
+    store.record_match(match('room', 3, 'Ann', 'Bob', None, 300.0, grid_size=4))
+    store.record_match(match('other', 1, 'Cid', 'Dee', 'O', 400.0))
+    store.flush()
+
+    stats = store.player_stats('Ann')
+    assert (stats['wins'], stats['losses'], stats['draws'], stats['matches']) == (1, 1, 1, 3)
+    assert stats['last_played'] == 300.0
+    assert [(recent['match_number'], recent['symbol'], recent['opponent'], recent['result'])
+            for recent in stats['recent_matches']] == [
+        (3, 'X', 'Bob', 'draw'), (2, 'O', 'Bob', 'loss'), (1, 'X', 'Bob', 'win')]
+    assert stats['recent_matches'][0]['grid_size'] == 4
+
+    assert [recent['match_number'] for recent in store.player_stats('Ann', recent=2)['recent_matches']] == [3, 2]
+    assert store.player_stats('Nobody') is None
+
+
+def test_leaderboard_ranks_by_wins_then_fewest_matches(store):
+    store.record_match(match('a', 1, 'Ann', 'Bob', 'X', 1.0))
+    store.record_match(match('a', 2, 'Ann', 'Bob', 'X', 2.0))
+    store.record_match(match('b', 1, 'Cid', 'Bob', 'X', 3.0))
+    store.record_match(match('c', 1, 'Dee', 'Eve', 'X', 4.0))
+    store.record_match(match('c', 2, 'Dee', 'Eve', None, 5.0))
+    store.flush()
+
+    assert [row['player_name'] for row in store.leaderboard()][:3] == ['Ann', 'Cid', 'Dee']
+    assert len(store.leaderboard(limit=2)) == 2
+
+
+def test_only_the_latest_rating_of_a_player_is_kept(store):
+    store.save_ratings({'Ann': (1516.0, 1), 'Bob': (1484.0, 1)})
+    store.save_ratings({'Ann': (1530.0, 2)})
+    store.flush()
+
+    assert sorted(tuple(row) for row in store.load_ratings()) == [('Ann', 1530.0, 2), ('Bob', 1484.0, 1)]
+
+
+def test_finished_games_are_recorded_by_the_game_manager(store):
+    gm = GameManager(match_store=store)
+    gm.create_room('room', 'host', 'Host')
+    gm.join_room('room', 'guest', 'Guest')
+    for host, guest in ((0, 3), (1, 4)):
+        gm.make_move('room', 'host', host)
+        gm.make_move('room', 'guest', guest)
+    gm.make_move('room', 'host', 2)
+    store.flush()
+
+    recent = store.player_stats('Guest')['recent_matches']
+    assert [(match['room_id'], match['opponent'], match['result'], match['moves'])
+            for match in recent] == [('room', 'Host', 'loss', 5)]
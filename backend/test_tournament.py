@@ -0,0 +1,160 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for single elimination and swiss pairing, results and tie-breaks."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from tournament import MAX_REPLAYS, TournamentManager, seed_order
+
+
+def signed_up(names, fmt='single_elimination', rounds=None):
+    """A manager with a tournament 'cup' hosted by names[0] and everyone signed up,
+    started with names seeded in the order given"""
+    manager = TournamentManager()
+    assert manager.create('cup', f'id-{names[0]}', names[0], 'Cup', fmt=fmt, rounds=rounds)['success']
+    for name in names[1:]:
+        assert manager.register('cup', f'id-{name}', name)['success']
+    ratings = {name: 3000 - index for index, name in enumerate(names)}
+    assert manager.start('cup', f'id-{names[0]}', ratings)['success']
+    return manager
+
+
+def play_out(manager: TournamentManager, decide, limit: int = 10_000):
+    """Play every match as decide(x_name, o_name) says (a name, or None for a
+    draw) until the tournament ends; returns the games as (x, o, winner)"""
+    games = []
+    for _ in range(limit):
+        if manager.tournaments['cup'].status == 'finished':
+            return games
+        ready = manager.take_ready(1000)
+        assert ready, 'the tournament is running but has no match to play'
+        for match in ready:
+            (_, x_name), (_, o_name) = match['players']
+            while True:
+                winner = decide(x_name, o_name)
+                games.append((x_name, o_name, winner))
+                if manager.record_result(match['room_id'], winner, winner is None) == 'finished':
+                    break
+    raise AssertionError('the tournament never finished')
+
+
+def higher_seed_wins(names):
+    return lambda x_name, o_name: min(x_name, o_name, key=names.index)
+
+
+def test_seed_order_keeps_top_seeds_apart():
+    assert seed_order(2) == [1, 2]
+    assert seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+    order = seed_order(64)
+    assert sorted(order) == list(range(1, 65))
+    # Seeds 1 and 2 are in different halves, so they can only meet in the final
+    assert order.index(1) < 32 <= order.index(2)
+
+
+def test_bracket_gives_top_seeds_the_byes_and_the_favourite_wins():
+    names = [f'P{index}' for index in range(1, 6)]
+    manager = signed_up(names)
+
+    games = play_out(manager, higher_seed_wins(names))
+
+    tournament = manager.tournaments['cup']
+    assert tournament.champion == 'P1'
+    assert len(tournament.rounds) == 3
+    # 8 slots for 5 players: seeds 1-3 skip the first round, so it is one game
+    assert sorted(games[0][:2]) == ['P4', 'P5']
+    assert len(tournament.rounds[0]) == 4
+    assert len(games) == len(names) - 1
+    assert manager.get_player_tournament('id-P1') is None
+
+
+def test_drawn_elimination_matches_are_replayed_then_go_to_the_higher_seed():
+    manager = signed_up(['Top', 'Bottom'])
+
+    games = play_out(manager, lambda x_name, o_name: None)
+
+    assert len(games) == MAX_REPLAYS + 1
+    assert manager.tournaments['cup'].champion == 'Top'
+
+
+@pytest.mark.parametrize('count', [2, 3, 7, 16, 33, 100])
+def test_random_brackets_finish_with_one_champion(count):
+    rng = random.Random(count)
+    names = [f'P{index}' for index in range(count)]
+    manager = signed_up(names)
+
+    games = play_out(manager, lambda x_name, o_name: rng.choice((x_name, o_name, None)))
+
+    tournament = manager.tournaments['cup']
+    losers = {x if winner == o else o for x, o, winner in games if winner is not None}
+    assert tournament.champion in names and tournament.champion not in losers
+    assert [p.name for p in tournament.participants.values() if p.active] == [tournament.champion]
+
+
+def test_swiss_avoids_rematches_and_gives_each_player_one_bye():
+    names = [f'P{index}' for index in range(7)]
+    manager = signed_up(names, fmt='swiss', rounds=3)
+
+    games = play_out(manager, higher_seed_wins(names))
+
+    tournament = manager.tournaments['cup']
+    assert tournament.current_round == 3
+    pairings = Counter(frozenset(game[:2]) for game in games)
+    assert max(pairings.values()) == 1
+    byes = [participant.name for participant in tournament.participants.values() if participant.had_bye]
+    assert len(byes) == 3 and len(set(byes)) == 3
+    # 3 rounds of 3 games and a bye
+    assert len(games) == 9
+    assert tournament.champion == 'P0'
+
+
+def test_swiss_round_count_defaults_to_log2_of_the_field():
+    manager = signed_up([f'P{index}' for index in range(9)], fmt='swiss')
+    play_out(manager, lambda x_name, o_name: None)
+    assert manager.tournaments['cup'].rounds_total == 4
+
+
+@pytest.mark.parametrize('count', [2, 5, 12, 31])
+def test_random_swiss_tournaments_finish(count):
+    rng = random.Random(count)
+    names = [f'P{index}' for index in range(count)]
+    manager = signed_up(names, fmt='swiss')
+
+    games = play_out(manager, lambda x_name, o_name: rng.choice((x_name, o_name, None)))
+
+    tournament = manager.tournaments['cup']
+    assert tournament.status == 'finished'
+    assert sum(p.points for p in tournament.participants.values()) == pytest.approx(
+        len(games) + sum(p.had_bye for p in tournament.participants.values()))
+
+
+def test_swiss_ties_on_points_are_broken_by_opponents_points():
+    manager = signed_up(['A', 'B', 'C', 'D'], fmt='swiss', rounds=2)
+    # Round 1: A-B, C-D; round 2: A-D, B-C
+    results = {frozenset('AB'): 'A', frozenset('CD'): 'D',
+               frozenset('AD'): 'A', frozenset('BC'): 'C'}
+
+    play_out(manager, lambda x_name, o_name: results[frozenset((x_name, o_name))])
+
+    standings = manager.tournaments['cup'].standings()
+    # D and C both have 1 point, but D's opponents scored more
+    assert [(row['name'], row['points']) for row in standings] == [
+        ('A', 2), ('D', 1), ('C', 1), ('B', 0)]
+    assert manager.tournaments['cup'].champion == 'A'
+
+
+def test_leaving_a_match_forfeits_it():
+    manager = signed_up(['A', 'B', 'C', 'D'])
+    ready = manager.take_ready(10)
+    room_id = ready[0]['room_id']
+    (leaver_id, leaver), (_, stayer) = ready[0]['players']
+
+    manager.room_closed(room_id, [leaver_id])
+
+    tournament = manager.tournaments['cup']
+    match = tournament.rounds[0][0]
+    assert match.winner == stayer
+    assert not tournament.participants[leaver].active
+    assert not manager.is_match_room(room_id)
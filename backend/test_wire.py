@@ -0,0 +1,143 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Tests for payload encoding and the encode-once broadcast fan-out."""
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, request
+from flask_socketio import SocketIO, join_room
+from socketio import packet
+
+from wire import FanoutManager, PacketJSON, RawJSON, packed_variant
+
+STATE = RawJSON('{"board":["X","",""]}', '{"board_packed":"AQ=="}')
+
+
+def test_packet_json_splices_raw_json_as_is():
+    payload = {'game_state': STATE, 'note': '\0raw-0', 'moves': [RawJSON('[1,2]')]}
+
+    text = PacketJSON.dumps(payload, separators=(',', ':'))
+
+    assert '{"board":["X","",""]}' in text
+    assert json.loads(text) == {'game_state': {'board': ['X', '', '']}, 'note': '\0raw-0',
+                                'moves': [[1, 2]]}
+
+
+def test_packed_variant_swaps_only_values_that_have_a_packed_form():
+    assert packed_variant({'room_id': 'ABC', 'count': 2}) is None
+    assert packed_variant({'room_id': 'ABC', 'moves': [RawJSON('[1]')]}) is None
+
+    variant = packed_variant({'room_id': 'ABC', 'states': [STATE, 'plain']})
+    assert variant['room_id'] == 'ABC'
+    assert variant['states'][0].text == STATE.packed
+    assert variant['states'][1] == 'plain'
+
+
+@pytest.fixture
+def server():
+    """A SocketIO server on FanoutManager whose clients join 'room' on connect"""
+    app = Flask(__name__)
+    manager = FanoutManager(shed_after=10, drop_after=100)
+    socketio = SocketIO(app, client_manager=manager, json=PacketJSON, async_mode='threading')
+
+    @socketio.on('connect')
+    def connect(auth):
+        join_room('room')
+        manager.set_board_encoding(request.sid, (auth or {}).get('encoding', 'json'))
+
+    return app, socketio, manager
+
+
+def connect(server, count: int, encoding: str = 'json'):
+    app, socketio, _ = server
+    return [socketio.test_client(app, auth={'encoding': encoding}) for _ in range(count)]
+
+
+def received(client):
+    return [(message['name'], message['args'][0]) for message in client.get_received()]
+
+
+@pytest.fixture
+def encodes(monkeypatch):
+    """Counts packets actually encoded, rather than resent from the first encode"""
+    count = []
+    encode = packet.Packet.encode
+
+    def counting(self):
+        count.append(1)
+        return encode(self)
+
+    monkeypatch.setattr(packet.Packet, 'encode', counting)
+    return count
+
+
+def test_broadcast_is_encoded_once_per_board_encoding(server, encodes):
+    json_clients, packed_clients = connect(server, 5), connect(server, 2, 'packed')
+    for client in json_clients + packed_clients:
+        client.get_received()
+    encodes.clear()
+
+    server[1].emit('state_sync', {'game_state': STATE}, to='room')
+
+    assert len(encodes) == 2
+    for client in json_clients:
+        assert received(client) == [('state_sync', {'game_state': {'board': ['X', '', '']}})]
+    for client in packed_clients:
+        assert received(client) == [('state_sync', {'game_state': {'board_packed': 'AQ=='}})]
+
+
+def test_packed_clients_share_the_json_packet_when_nothing_is_packed(server, encodes):
+    clients = connect(server, 2) + connect(server, 2, 'packed')
+    encodes.clear()
+
+    server[1].emit('chat_message', {'message': 'hi'}, to='room')
+
+    assert len(encodes) == 1
+    for client in clients:
+        assert ('chat_message', {'message': 'hi'}) in received(client)
+
+
+def backed_up(manager: FanoutManager, client, backlog: int):
+    """Give the test client an engine.io socket with backlog packets queued"""
+    closed = threading.Event()
+    manager.server.eio.sockets[client.eio_sid] = SimpleNamespace(
+        queue=SimpleNamespace(queue=[None] * backlog), closed=False,
+        close=lambda wait, abort: closed.set())
+    return closed
+
+
+def test_backed_up_clients_miss_only_sheddable_events(server):
+    manager = server[2]
+    slow, fast = connect(server, 2)
+    backed_up(manager, slow, 10)
+    for client in (slow, fast):
+        client.get_received()
+
+    server[1].emit('player_typing', {'player_name': 'A'}, to='room')
+    server[1].emit('move_made', {'position': 4}, to='room')
+
+    assert received(slow) == [('move_made', {'position': 4})]
+    assert received(fast) == [('player_typing', {'player_name': 'A'}),
+                              ('move_made', {'position': 4})]
+
+
+def test_clients_past_drop_after_are_disconnected(server):
+    manager = server[2]
+    slow, fast = connect(server, 2)
+    closed = backed_up(manager, slow, 100)
+    for client in (slow, fast):
+        client.get_received()
+
+    server[1].emit('move_made', {'position': 4}, to='room')
+
+    assert closed.wait(5)
+    assert received(slow) == []
+    assert received(fast) == [('move_made', {'position': 4})]
+    deadline = time.monotonic() + 5
+    while slow.eio_sid in manager.server.eio.sockets and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert slow.eio_sid not in manager.server.eio.sockets
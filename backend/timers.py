@@ -0,0 +1,76 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Keyed deadlines ordered by time, for sweeping expired entries cheaply."""
+
+import heapq
+import threading
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class DeadlineQueue:
+    """A min-heap of (deadline, key) with at most one live deadline per key.
+
+    Rescheduling or cancelling a key doesn't search the heap: the old entry
+    stays behind and is skipped when it reaches the top, because it no
+    longer matches the key's current deadline. Popping everything that is
+    due costs O(log n) per popped entry, however many keys are waiting.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._deadlines: Dict[Hashable, Tuple[float, int]] = {}
+        self._counter = 0  # tie-breaker, so keys never have to be comparable
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Set key's deadline, replacing any earlier one"""
+        with self._lock:
+            self._counter += 1
+            entry = (deadline, self._counter)
+            self._deadlines[key] = entry
+            heapq.heappush(self._heap, (deadline, self._counter, key))
+            self._compact()
+
+    def cancel(self, key: Hashable):
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        entry = self._deadlines.get(key)
+        return entry[0] if entry else None
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[Hashable]:
+        """Remove and return every key whose deadline is at or before now"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, counter, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == (deadline, counter):
+                    del self._deadlines[key]
+                    due.append(key)
+        return due
+
+    def _drop_stale(self):
+        while self._heap:
+            deadline, counter, key = self._heap[0]
+            if self._deadlines.get(key) == (deadline, counter):
+                return
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        # Keep stale entries from outgrowing the live ones
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(deadline, counter, key)
+                          for key, (deadline, counter) in self._deadlines.items()]
+            heapq.heapify(self._heap)
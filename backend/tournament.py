@@ -0,0 +1,575 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Single elimination and swiss tournaments played out in ordinary rooms.
+
+A tournament only decides who plays whom. Matches whose players are known
+go on a ready queue, and app.py drains it every tick and opens their rooms
+through GameManager.create_match_rooms() in one batch. Results come back
+by room id through an index of the matches being played, so a finished
+game touches its own match and, in a bracket, the one it feeds: nothing
+walks the whole bracket however many players there are.
+
+Single elimination seeds players by rating into a bracket padded with byes
+to a power of two. Drawn matches are replayed in the same room, symbols
+swapped, up to MAX_REPLAYS times before the higher seed goes through.
+Swiss plays a fixed number of rounds, pairing players on equal points who
+haven't met yet; a win or a bye is worth 1 point and a draw 1/2.
+Sign-ups and changed matches are collected and pushed to participants and
+spectators once per tick instead of after every game.
+"""
+
+import math
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+FORMATS = ('single_elimination', 'swiss')
+MAX_PLAYERS = int(os.environ.get('TOURNAMENT_MAX_PLAYERS', 4096))
+MAX_REPLAYS = 2
+MAX_NAME_LENGTH = 40
+# Seconds a finished tournament stays around to be looked at
+FINISHED_TTL = float(os.environ.get('TOURNAMENT_FINISHED_TTL', 600))
+
+
+class Participant:
+    __slots__ = ('name', 'player_id', 'token', 'seed', 'points', 'opponents', 'active', 'match',
+                 'had_bye')
+
+    def __init__(self, name: str, player_id: str):
+        self.name = name
+        # None while offline between matches; a match for them is then forfeited
+        self.player_id: Optional[str] = player_id
+        # Lets a reconnected client take the place back, like a room's resume token
+        self.token = secrets.token_urlsafe(16)
+        self.seed = 0
+        self.points = 0.0
+        self.opponents: List[str] = []
+        self.active = True  # False once eliminated or withdrawn
+        self.match: Optional['Match'] = None  # the match being played
+        self.had_bye = False
+
+
+class Match:
+    __slots__ = ('match_id', 'round', 'players', 'waiting', 'status', 'room_id', 'winner',
+                 'is_draw', 'replays', 'next_match', 'next_slot')
+
+    def __init__(self, match_id: int, round_number: int, waiting: int = 0):
+        self.match_id = match_id
+        self.round = round_number
+        self.players: List[Optional[str]] = [None, None]  # names, X first
+        self.waiting = waiting  # earlier matches still to decide a player
+        self.status = 'pending'  # then 'ready', 'playing', 'done'
+        self.room_id: Optional[str] = None
+        self.winner: Optional[str] = None
+        self.is_draw = False
+        self.replays = 0
+        # The bracket match the winner moves on to, and in which slot
+        self.next_match: Optional['Match'] = None
+        self.next_slot = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'match_id': self.match_id,
+            'round': self.round,
+            'players': list(self.players),
+            'status': self.status,
+            'room_id': self.room_id,
+            'winner': self.winner,
+            'is_draw': self.is_draw,
+        }
+
+
+class Tournament:
+    def __init__(self, tournament_id: str, name: str, host: str, grid_size: int, fmt: str,
+                 max_players: int, rounds: Optional[int], time_control: Optional[Dict]):
+        self.tournament_id = tournament_id
+        self.name = name
+        self.host = host  # name of the participant who may start it
+        self.grid_size = grid_size
+        self.format = fmt
+        self.max_players = max_players
+        self.rounds_total = rounds  # swiss only; worked out at start if None
+        self.time_control = time_control
+        self.status = 'registering'  # then 'running', 'finished'
+        self.created_at = time.time()
+        self.participants: Dict[str, Participant] = {}  # {name: participant}, in sign-up order
+        self.by_token: Dict[str, Participant] = {}
+        self.rounds: List[List[Match]] = []
+        self.current_round = 0
+        self.open_matches = 0  # undecided matches of the current swiss round
+        self.champion: Optional[str] = None
+        # Top of the table as of the last finished swiss round, or the final
+        self.top: List[Dict] = []
+        # Matches changed since the last drain_updates(), and whether top did
+        self.changed: Dict[int, Match] = {}
+        self.top_changed = False
+        self.next_match_id = 0
+
+    def new_match(self, round_number: int, waiting: int = 0) -> Match:
+        self.next_match_id += 1
+        return Match(self.next_match_id, round_number, waiting)
+
+    def summary(self) -> Dict:
+        return {
+            'tournament_id': self.tournament_id,
+            'name': self.name,
+            'format': self.format,
+            'grid_size': self.grid_size,
+            'time_control': self.time_control,
+            'status': self.status,
+            'host': self.host,
+            'players': len(self.participants),
+            'max_players': self.max_players,
+            'round': self.current_round,
+            'rounds': len(self.rounds) if self.format == 'single_elimination' else self.rounds_total,
+            'champion': self.champion,
+        }
+
+    def standings(self, limit: Optional[int] = None) -> List[Dict]:
+        """Players by points, then the points of the opponents they beat or drew with"""
+        def tiebreak(participant: Participant) -> float:
+            return sum(self.participants[name].points for name in participant.opponents)
+
+        ranked = sorted(self.participants.values(),
+                        key=lambda p: (-p.points, -tiebreak(p), p.seed))
+        return [{'name': p.name, 'points': p.points, 'seed': p.seed, 'active': p.active}
+                for p in ranked[:limit]]
+
+
+def seed_order(size: int) -> List[int]:
+    """Bracket positions of seeds 1..size (a power of two), so the top seeds meet last"""
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+class TournamentManager:
+    def __init__(self, max_players: int = MAX_PLAYERS):
+        self.max_players = max_players
+        self.tournaments: Dict[str, Tournament] = {}
+        self.players: Dict[str, Tuple[Tournament, Participant]] = {}  # {player_id: ...}
+        # Matches being played, by room, so results are O(1) lookups
+        self.match_rooms: Dict[str, Tuple[Tournament, Match]] = {}
+        # Matches with both players known, waiting for take_ready() to open rooms
+        self.ready: deque = deque()
+        # Tournaments with changes for drain_updates(), and finished ones by expiry
+        self.changed: Set[Tournament] = set()
+        self.finished: deque = deque()  # (expires_at, tournament_id)
+        self._lock = threading.Lock()
+
+    def create(self, tournament_id: str, host_id: str, host_name: str, name: str, grid_size: int = 3,
+               fmt: str = 'single_elimination', max_players: Optional[int] = None,
+               rounds: Optional[int] = None, time_control: Optional[Dict] = None) -> Dict:
+        """Open a tournament for sign-ups, with its host as the first participant"""
+        if fmt not in FORMATS:
+            return {'success': False, 'message': f'Format must be one of {", ".join(FORMATS)}'}
+        if not 3 <= grid_size <= 10:
+            return {'success': False, 'message': 'Grid size must be 3 to 10'}
+        max_players = min(max_players or self.max_players, self.max_players)
+        if max_players < 2:
+            return {'success': False, 'message': 'A tournament needs room for 2 players'}
+        if rounds is not None and not 1 <= rounds <= 20:
+            return {'success': False, 'message': 'Swiss rounds must be 1 to 20'}
+        with self._lock:
+            if tournament_id in self.tournaments:
+                return {'success': False, 'message': 'Tournament already exists'}
+            if host_id in self.players:
+                return {'success': False, 'message': 'Already in a tournament'}
+            tournament = Tournament(tournament_id, (name or 'Tournament')[:MAX_NAME_LENGTH], host_name,
+                                    grid_size, fmt, max_players, rounds, time_control)
+            self.tournaments[tournament_id] = tournament
+            return self._register(tournament, host_id, host_name)
+
+    def register(self, tournament_id: str, player_id: str, name: str) -> Dict:
+        with self._lock:
+            tournament = self.tournaments.get(tournament_id)
+            if tournament is None:
+                return {'success': False, 'message': 'Tournament not found'}
+            if tournament.status != 'registering':
+                return {'success': False, 'message': 'Tournament already started'}
+            if player_id in self.players:
+                return {'success': False, 'message': 'Already in a tournament'}
+            if len(tournament.participants) >= tournament.max_players:
+                return {'success': False, 'message': 'Tournament is full'}
+            # Results come back by player name, so names are unique per tournament
+            if name[:MAX_NAME_LENGTH] in tournament.participants:
+                return {'success': False, 'message': 'Name already taken in this tournament'}
+            return self._register(tournament, player_id, name)
+
+    def _register(self, tournament: Tournament, player_id: str, name: str) -> Dict:
+        participant = Participant(name[:MAX_NAME_LENGTH], player_id)
+        tournament.participants[participant.name] = participant
+        tournament.by_token[participant.token] = participant
+        self.players[player_id] = (tournament, participant)
+        self.changed.add(tournament)
+        return {'success': True, 'token': participant.token, 'tournament': tournament.summary()}
+
+    def rejoin(self, tournament_id: str, token: str, player_id: str) -> Dict:
+        """Give a reconnected client (new player_id) back its place"""
+        with self._lock:
+            tournament = self.tournaments.get(tournament_id)
+            if tournament is None:
+                return {'success': False, 'message': 'Tournament not found'}
+            participant = tournament.by_token.get(token)
+            if participant is None or not participant.active:
+                return {'success': False, 'message': 'No longer in this tournament'}
+            if participant.player_id is not None:
+                self.players.pop(participant.player_id, None)
+            participant.player_id = player_id
+            self.players[player_id] = (tournament, participant)
+            return {'success': True, 'name': participant.name, 'tournament': tournament.summary()}
+
+    def player_resumed(self, previous_id: str, player_id: str):
+        """Follow a player who resumed their room seat under a new id"""
+        with self._lock:
+            entry = self.players.pop(previous_id, None)
+            if entry is not None:
+                entry[1].player_id = player_id
+                self.players[player_id] = entry
+
+    def player_offline(self, player_id: str):
+        """A participant's connection dropped. In a match the room holds their
+        seat; between matches they can rejoin() until their next match starts."""
+        with self._lock:
+            entry = self.players.get(player_id)
+            if entry is None or entry[1].match is not None:
+                return
+            tournament, participant = entry
+            del self.players[player_id]
+            if tournament.status == 'registering':
+                self._unregister(tournament, participant)
+            else:
+                participant.player_id = None
+
+    def withdraw(self, player_id: str) -> Optional[str]:
+        """Leave a tournament for good; returns the room of a match this forfeits"""
+        with self._lock:
+            entry = self.players.pop(player_id, None)
+            if entry is None:
+                return None
+            tournament, participant = entry
+            if tournament.status == 'registering':
+                self._unregister(tournament, participant)
+                return None
+            participant.active = False
+            participant.player_id = None
+            match = participant.match
+            if match is None:
+                return None
+            self._forfeit(tournament, match, [participant.name])
+            return match.room_id
+
+    def _unregister(self, tournament: Tournament, participant: Participant):
+        del tournament.participants[participant.name]
+        del tournament.by_token[participant.token]
+        if not tournament.participants:
+            del self.tournaments[tournament.tournament_id]
+            self.changed.discard(tournament)
+            return
+        if participant.name == tournament.host:
+            # The earliest sign-up left takes over
+            tournament.host = next(iter(tournament.participants))
+        self.changed.add(tournament)
+
+    def start(self, tournament_id: str, player_id: str,
+              ratings: Optional[Dict[str, float]] = None) -> Dict:
+        """Seed by rating (sign-up order breaks ties) and queue the first round"""
+        with self._lock:
+            tournament = self.tournaments.get(tournament_id)
+            if tournament is None:
+                return {'success': False, 'message': 'Tournament not found'}
+            entry = self.players.get(player_id)
+            if entry is None or entry[0] is not tournament or entry[1].name != tournament.host:
+                return {'success': False, 'message': 'Only the host can start the tournament'}
+            if tournament.status != 'registering':
+                return {'success': False, 'message': 'Tournament already started'}
+            if len(tournament.participants) < 2:
+                return {'success': False, 'message': 'Need at least 2 players'}
+
+            ratings = ratings or {}
+            order = sorted(tournament.participants.values(),
+                           key=lambda p: -ratings.get(p.name, 0))
+            for seed, participant in enumerate(order, 1):
+                participant.seed = seed
+            tournament.status = 'running'
+            if tournament.format == 'single_elimination':
+                self._build_bracket(tournament, [p.name for p in order])
+            else:
+                if tournament.rounds_total is None:
+                    tournament.rounds_total = max(1, math.ceil(math.log2(len(order))))
+                self._pair_swiss_round(tournament)
+            return {'success': True, 'tournament': tournament.summary()}
+
+    def _build_bracket(self, tournament: Tournament, names: List[str]):
+        size = 1 << (len(names) - 1).bit_length()
+        rounds = size.bit_length() - 1
+        # Every match up front: round r has size / 2^(r+1), and match k
+        # feeds slot k % 2 of match k // 2 in the next round
+        tournament.rounds = [[tournament.new_match(1, 0) for _ in range(size // 2)]]
+        for round_number in range(2, rounds + 1):
+            previous = tournament.rounds[-1]
+            current = [tournament.new_match(round_number, 2) for _ in range(len(previous) // 2)]
+            for index, match in enumerate(previous):
+                match.next_match = current[index // 2]
+                match.next_slot = index % 2
+            tournament.rounds.append(current)
+
+        positions = seed_order(size)
+        for index, match in enumerate(tournament.rounds[0]):
+            for slot in (0, 1):
+                seed = positions[index * 2 + slot]
+                match.players[slot] = names[seed - 1] if seed <= len(names) else None
+        tournament.current_round = 1
+        for match in tournament.rounds[0]:
+            self._resolve(tournament, match)
+
+    def _pair_swiss_round(self, tournament: Tournament):
+        players = sorted((p for p in tournament.participants.values() if p.active),
+                         key=lambda p: (-p.points, p.seed))
+        tournament.current_round += 1
+        round_number = tournament.current_round
+        matches = []
+
+        # Odd numbers: the lowest ranked player yet to sit out gets a bye
+        bye = None
+        if len(players) % 2:
+            bye = next((p for p in reversed(players) if not p.had_bye), players[-1])
+            players.remove(bye)
+
+        # Top down, each player meets the next one on the list they haven't
+        # played, or the next one at all if they have played everyone left
+        unpaired = players
+        while unpaired:
+            first = unpaired[0]
+            partner = next((index for index in range(1, len(unpaired))
+                            if unpaired[index].name not in first.opponents), 1)
+            second = unpaired.pop(partner)
+            unpaired.pop(0)
+            match = tournament.new_match(round_number)
+            # Alternate which of the two plays X from round to round
+            match.players = [first.name, second.name] if round_number % 2 else [second.name, first.name]
+            matches.append(match)
+
+        if bye is not None:
+            match = tournament.new_match(round_number)
+            match.players = [bye.name, None]
+            matches.append(match)
+        tournament.rounds.append(matches)
+        tournament.open_matches = len(matches)
+        for match in matches:
+            self._resolve(tournament, match)
+
+    def _resolve(self, tournament: Tournament, match: Match):
+        """A match with its players settled: queue it, or decide it on the spot"""
+        present = [name for name in match.players
+                   if name is not None and tournament.participants[name].active]
+        if len(present) == 2:
+            match.status = 'ready'
+            self._touch(tournament, match)
+            self.ready.append((tournament, match))
+        elif present:
+            if tournament.format == 'swiss' and None in match.players:
+                tournament.participants[present[0]].had_bye = True
+            self._finish(tournament, match, present[0])
+        else:
+            self._finish(tournament, match, None)
+
+    def _finish(self, tournament: Tournament, match: Match, winner: Optional[str],
+                is_draw: bool = False):
+        match.status = 'done'
+        match.winner = winner
+        match.is_draw = is_draw
+        self._touch(tournament, match)
+        if match.room_id is not None:
+            self.match_rooms.pop(match.room_id, None)
+
+        names = [name for name in match.players if name is not None]
+        for name in names:
+            participant = tournament.participants[name]
+            participant.match = None
+            if len(names) == 2:
+                participant.opponents.append(names[1] if name == names[0] else names[0])
+
+        # A point a win, byes and walkovers included, so the table also ranks a bracket
+        if is_draw:
+            for name in names:
+                tournament.participants[name].points += 0.5
+        elif winner is not None:
+            tournament.participants[winner].points += 1
+
+        if tournament.format == 'single_elimination':
+            for name in names:
+                if name != winner:
+                    tournament.participants[name].active = False
+            following = match.next_match
+            if following is None:
+                tournament.champion = winner
+                self._end(tournament)
+                return
+            following.players[match.next_slot] = winner
+            following.waiting -= 1
+            if following.waiting == 0:
+                tournament.current_round = max(tournament.current_round, following.round)
+                self._resolve(tournament, following)
+            return
+
+        tournament.open_matches -= 1
+        if tournament.open_matches == 0:
+            active = sum(p.active for p in tournament.participants.values())
+            if tournament.current_round >= tournament.rounds_total or active < 2:
+                self._end(tournament)
+                tournament.champion = tournament.top[0]['name'] if tournament.top else None
+            else:
+                self._update_top(tournament)
+                self._pair_swiss_round(tournament)
+
+    def _update_top(self, tournament: Tournament):
+        # Once per round, never per result
+        tournament.top = tournament.standings(10)
+        tournament.top_changed = True
+
+    def _touch(self, tournament: Tournament, match: Match):
+        tournament.changed[match.match_id] = match
+        self.changed.add(tournament)
+
+    def _end(self, tournament: Tournament):
+        tournament.status = 'finished'
+        self._update_top(tournament)
+        # Everyone is free to enter another tournament
+        for participant in tournament.participants.values():
+            if participant.player_id is not None:
+                self.players.pop(participant.player_id, None)
+        self.finished.append((time.time() + FINISHED_TTL, tournament.tournament_id))
+
+    def _forfeit(self, tournament: Tournament, match: Match, losers: List[str]):
+        remaining = [name for name in match.players if name is not None and name not in losers]
+        self._finish(tournament, match, remaining[0] if len(remaining) == 1 else None)
+
+    def take_ready(self, limit: int, is_online: Optional[Callable[[str], bool]] = None) -> List[Dict]:
+        """Up to limit matches to open rooms for, now marked as playing.
+
+        Each is {'tournament_id', 'room_id', 'grid_size', 'time_control',
+        'players': [(player_id, name), (player_id, name)]}, X first. A player
+        who went offline since their last match (is_online, if given, checks
+        the connection) forfeits this one instead.
+        """
+        started = []
+        with self._lock:
+            while self.ready and len(started) < limit:
+                tournament, match = self.ready.popleft()
+                if match.status != 'ready':
+                    continue
+                participants = [tournament.participants[name] for name in match.players]
+                offline = []
+                for participant in participants:
+                    if participant.player_id is not None and is_online is not None \
+                            and not is_online(participant.player_id):
+                        # Their connection dropped during their last match
+                        self.players.pop(participant.player_id, None)
+                        participant.player_id = None
+                    if participant.player_id is None or not participant.active:
+                        offline.append(participant.name)
+                if offline:
+                    self._forfeit(tournament, match, offline)
+                    continue
+                match.status = 'playing'
+                match.room_id = f'{tournament.tournament_id}-{match.match_id}'
+                for participant in participants:
+                    participant.match = match
+                self.match_rooms[match.room_id] = (tournament, match)
+                self._touch(tournament, match)
+                started.append({
+                    'tournament_id': tournament.tournament_id,
+                    'room_id': match.room_id,
+                    'grid_size': tournament.grid_size,
+                    'time_control': tournament.time_control,
+                    'players': [(p.player_id, p.name) for p in participants],
+                })
+        return started
+
+    def record_result(self, room_id: str, winner_name: Optional[str], is_draw: bool) -> Optional[str]:
+        """Settle a tournament room's finished game.
+
+        Returns None for rooms outside tournaments, 'replay' when a drawn
+        elimination match is to be played again in the same room, and
+        'finished' when the match is decided and its room can close.
+        """
+        with self._lock:
+            entry = self.match_rooms.get(room_id)
+            if entry is None:
+                return None
+            tournament, match = entry
+            if is_draw and tournament.format == 'single_elimination':
+                if match.replays < MAX_REPLAYS:
+                    match.replays += 1
+                    return 'replay'
+                # Still level: the higher seed goes through
+                winner_name = min(match.players, key=lambda name: tournament.participants[name].seed)
+                is_draw = False
+            if winner_name not in match.players:
+                winner_name = None
+            self._finish(tournament, match, winner_name, is_draw)
+            return 'finished'
+
+    def is_match_room(self, room_id: str) -> bool:
+        return room_id in self.match_rooms
+
+    def room_closed(self, room_id: str, leaver_ids: List[str]):
+        """A tournament room closed before its game finished. Players in
+        leaver_ids forfeit; if that is nobody or everybody, both do."""
+        with self._lock:
+            entry = self.match_rooms.get(room_id)
+            if entry is None:
+                return
+            tournament, match = entry
+            losers = [name for name in match.players
+                      if tournament.participants[name].player_id in leaver_ids]
+            # Leaving a match is leaving the tournament, also for swiss
+            for name in losers:
+                tournament.participants[name].active = False
+            self._forfeit(tournament, match, losers if len(losers) == 1 else list(match.players))
+
+    def drain_updates(self) -> List[Tuple[str, Dict]]:
+        """(tournament_id, update) for every tournament with changes since the last call"""
+        updates = []
+        with self._lock:
+            now = time.time()
+            while self.finished and self.finished[0][0] <= now:
+                self.tournaments.pop(self.finished.popleft()[1], None)
+
+            changed_tournaments, self.changed = self.changed, set()
+            for tournament in changed_tournaments:
+                changed = sorted(tournament.changed.values(), key=lambda match: match.match_id)
+                tournament.changed = {}
+                update = tournament.summary()
+                update['matches'] = [match.to_dict() for match in changed]
+                if tournament.top_changed:
+                    update['standings'] = tournament.top
+                    tournament.top_changed = False
+                updates.append((tournament.tournament_id, update))
+        return updates
+
+    def get_tournament(self, tournament_id: str, round_number: Optional[int] = None) -> Optional[Dict]:
+        """Summary, top standings and the matches of one round (the current one by default)"""
+        with self._lock:
+            tournament = self.tournaments.get(tournament_id)
+            if tournament is None:
+                return None
+            result = tournament.summary()
+            round_number = round_number or tournament.current_round
+            matches = (tournament.rounds[round_number - 1]
+                       if 1 <= round_number <= len(tournament.rounds) else [])
+            result['matches'] = [match.to_dict() for match in matches]
+            result['standings'] = tournament.top
+            if tournament.status == 'registering':
+                result['entrants'] = list(tournament.participants)
+            return result
+
+    def get_player_tournament(self, player_id: str) -> Optional[str]:
+        entry = self.players.get(player_id)
+        return entry[0].tournament_id if entry else None
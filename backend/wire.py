@@ -0,0 +1,188 @@
+# (C) 2025 Bismaya Jyoti Dalei All rights reserved.
+
+"""Encoding helpers for payloads sent over the socket."""
+
+import json
+import secrets
+from typing import Optional
+
+import socketio
+from socketio import packet
+
+from metrics import REGISTRY
+
+PACKETS_SHED = REGISTRY.counter(
+    'socket_packets_shed_total', 'Low-priority packets not sent to backed up clients', ['event'])
+SLOW_CLIENTS_DROPPED = REGISTRY.counter(
+    'socket_slow_clients_dropped_total', 'Clients disconnected for a full outbound queue')
+
+# Events a backed up client can miss without harm: typing indicators and
+# lobby updates are superseded by the next one
+SHEDDABLE_EVENTS = frozenset({'player_typing', 'player_stopped_typing', 'lobby_update'})
+
+# Never appears in real data, so it can't collide with user supplied strings
+_PLACEHOLDER = '\0raw-' + secrets.token_hex(8) + '-'
+
+
+# Board encodings a client can ask for when connecting: 'json' sends the
+# board as a list of '', 'X' and 'O', 'packed' as 2 bits per cell (see
+# game_logic.pack_board), base64 encoded under 'board_packed'
+BOARD_ENCODINGS = ('json', 'packed')
+
+
+class RawJSON:
+    """Already-encoded JSON that is spliced into a packet as-is.
+
+    packed is the same value with its board packed, sent instead to clients
+    that negotiated the packed board encoding.
+    """
+
+    __slots__ = ('text', 'packed')
+
+    def __init__(self, text: str, packed: Optional[str] = None):
+        self.text = text
+        self.packed = packed
+
+
+def packed_variant(data):
+    """data with every RawJSON swapped for its packed form, or None if it has none"""
+    if isinstance(data, RawJSON):
+        return RawJSON(data.packed) if data.packed is not None else None
+    if isinstance(data, dict):
+        changed = {key: packed_variant(value) for key, value in data.items()}
+        if all(value is None for value in changed.values()):
+            return None
+        return {key: data[key] if value is None else value for key, value in changed.items()}
+    if isinstance(data, (list, tuple)):
+        changed = [packed_variant(value) for value in data]
+        if all(value is None for value in changed):
+            return None
+        return type(data)(value if value is not None else original
+                          for value, original in zip(changed, data))
+    return None
+
+
+class PacketJSON:
+    """Drop-in json module for Socket.IO that doesn't re-encode RawJSON values.
+
+    Cached game state snapshots are encoded once and then reused by every
+    emit that carries them, nested anywhere in the payload.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        fragments = []
+
+        def default(value):
+            if isinstance(value, RawJSON):
+                fragments.append(value.text)
+                return f'{_PLACEHOLDER}{len(fragments) - 1}'
+            raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+        text = json.dumps(obj, default=default, **kwargs)
+        for index, fragment in enumerate(fragments):
+            text = text.replace(json.dumps(f'{_PLACEHOLDER}{index}'), fragment, 1)
+        return text
+
+    @staticmethod
+    def loads(*args, **kwargs):
+        return json.loads(*args, **kwargs)
+
+
+class FanoutManager(socketio.BaseManager):
+    """Client manager that encodes a broadcast once for all of its recipients.
+
+    The stock manager builds and encodes the packet again for every socket
+    in the room, so a room watched by thousands of spectators would pay for
+    thousands of identical JSON encodes per update.
+
+    It also keeps slow clients from piling up packets without limit: past
+    shed_after queued packets a client stops getting SHEDDABLE_EVENTS, and
+    past drop_after it is disconnected. 0 turns either off.
+
+    Clients in packed_sids get the packed form of any RawJSON in a payload,
+    encoded once for all of them too.
+    """
+
+    def __init__(self, shed_after: int = 0, drop_after: int = 0):
+        super().__init__()
+        self.shed_after = shed_after
+        self.drop_after = drop_after
+        self.packed_sids = set()
+
+    def set_board_encoding(self, sid, encoding: str):
+        if encoding == 'packed':
+            self.packed_sids.add(sid)
+        else:
+            self.packed_sids.discard(sid)
+
+    def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, **kwargs):
+        if callback is not None:
+            # Every recipient needs its own ack id
+            return super().emit(event, data, namespace, room=room, skip_sid=skip_sid,
+                                callback=callback, **kwargs)
+        if namespace not in self.rooms:
+            return
+        if not isinstance(skip_sid, list):
+            skip_sid = [skip_sid]
+
+        pkt = packed_pkt = None
+        packed_sids = self.packed_sids
+        bounded = self.shed_after or self.drop_after
+        sockets = self.server.eio.sockets
+        for sid, eio_sid in self.get_participants(namespace, room):
+            if sid in skip_sid:
+                continue
+            if bounded:
+                eio_socket = sockets.get(eio_sid)
+                # Lock-free read of the underlying deque, which all of
+                # threading, gevent and eventlet queues keep in .queue
+                backlog = len(eio_socket.queue.queue) if eio_socket is not None else 0
+                if self.drop_after and backlog >= self.drop_after:
+                    SLOW_CLIENTS_DROPPED.inc()
+                    # Not inline: disconnect handlers emit too
+                    self.server.start_background_task(self._drop, eio_sid)
+                    continue
+                if self.shed_after and backlog >= self.shed_after and event in SHEDDABLE_EVENTS:
+                    PACKETS_SHED.inc(1, event)
+                    continue
+            if packed_sids and sid in packed_sids:
+                if packed_pkt is None:
+                    packed_data = packed_variant(data)
+                    if packed_data is None:
+                        if pkt is None:
+                            pkt = self._encoded_event(event, data, namespace)
+                        packed_pkt = pkt
+                    else:
+                        packed_pkt = self._encoded_event(event, packed_data, namespace)
+                self.server._send_packet(eio_sid, packed_pkt)
+                continue
+            if pkt is None:
+                pkt = self._encoded_event(event, data, namespace)
+            self.server._send_packet(eio_sid, pkt)
+
+    def disconnect(self, sid, namespace, **kwargs):
+        self.packed_sids.discard(sid)
+        return super().disconnect(sid, namespace, **kwargs)
+
+    def _drop(self, eio_sid):
+        eio_socket = self.server.eio.sockets.get(eio_sid)
+        if eio_socket is not None and not eio_socket.closed:
+            # abort: waiting for a backed up client to drain its queue is the problem
+            eio_socket.close(wait=False, abort=True)
+            self.server.eio.sockets.pop(eio_sid, None)
+
+    def _encoded_event(self, event, data, namespace):
+        # Same argument handling as socketio.Server._emit_internal
+        if isinstance(data, tuple):
+            data = list(data)
+        elif data is not None:
+            data = [data]
+        else:
+            data = []
+        pkt = self.server.packet_class(packet.EVENT, namespace=namespace, data=[event] + data)
+
+        # Every recipient's send reuses the first encode
+        encoded = pkt.encode()
+        pkt.encode = lambda: encoded
+        return pkt
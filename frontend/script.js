@@ -73,18 +73,47 @@ class AudioManager {
     }
 }
 
+// Boards arrive packed at 2 bits per cell (0 empty, 1 X, 2 O), cell i in
+// bits 2i and 2i+1 of the base64 decoded bytes; see pack_board in game_logic.py
+const PACKED_SYMBOLS = ['', 'X', 'O', ''];
+
+function unpackBoard(packed, cells) {
+    const bytes = atob(packed);
+    const board = new Array(cells);
+    for (let i = 0; i < cells; i++) {
+        board[i] = PACKED_SYMBOLS[(bytes.charCodeAt(i >> 2) >> ((i & 3) * 2)) & 3];
+    }
+    return board;
+}
+
+// Give a packed game state back its board list, in place
+function unpackGameState(state) {
+    if (state && typeof state.board_packed === 'string') {
+        state.board = unpackBoard(state.board_packed, state.grid_size * state.grid_size);
+        delete state.board_packed;
+    }
+}
+
 class TicTacToeGame {
     constructor() {
         this.debug = false;
         this.socket = null;
         this.gameState = null;
         this.currentScreen = 'menuScreen';
+        this.spectating = false;
+        this.matchmaking = false;
+        // Server clock minus ours, in seconds, for counting down turn deadlines
+        this.serverTimeOffset = 0;
         this.playerInfo = {
             id: null,
             name: '',
             symbol: '',
             roomId: ''
         };
+        this.lobbyRooms = [];
+        // The tournament we play in or watch, and whether the current game is one of its matches
+        this.tournament = null;
+        this.tournamentGame = false;
         this.theme = localStorage.getItem('theme') || 'light';
         this.audioManager = new AudioManager();
         this.chatOpen = false;
@@ -102,6 +131,7 @@ class TicTacToeGame {
         this.initializeSocket();
         this.setupEventListeners();
         this.applyTheme();
+        setInterval(() => this.updateTurnClock(), 250);
         this.showAudioPrompt();
         this.initializeEmojis();
 
@@ -183,7 +213,16 @@ class TicTacToeGame {
             upgrade: true,
             rememberUpgrade: true,
             timeout: 20000,
-            forceNew: true
+            forceNew: true,
+            auth: { board_encoding: 'packed' }
+        });
+
+        // Runs before the event's own listener, so handlers only ever see board lists
+        this.socket.onAny((event, data) => {
+            if (data && typeof data === 'object') {
+                unpackGameState(data);
+                unpackGameState(data.game_state);
+            }
         });
 
         this.setupSocketListeners();
@@ -194,9 +233,28 @@ class TicTacToeGame {
             console.log('🔌 Connected to server');
             console.log('🆔 My Socket ID:', this.socket.id);
             this.hideLoadingOverlay();
+            this.playerInfo.id = this.socket.id; // Store socket ID
+
+            // Back into our tournament, if we were in one
+            const savedTournament = this.loadTournamentSession();
+            if (savedTournament) {
+                this.socket.emit('rejoin_tournament', {
+                    tournament_id: savedTournament.tournamentId,
+                    token: savedTournament.token
+                });
+            }
+
+            // Take our seat back after a dropped connection or a page reload
+            const saved = this.loadResumeSession();
+            if (saved) {
+                this.socket.emit('resume_session', {
+                    room_id: saved.roomId,
+                    resume_token: saved.token
+                });
+                return;
+            }
             this.showScreen('menuScreen');
             this.showNotification('Connected to server!', 'success', false);
-            this.playerInfo.id = this.socket.id; // Store socket ID
         });
 
         this.socket.on('connect_error', (error) => {
@@ -213,11 +271,25 @@ class TicTacToeGame {
         this.socket.on('connected', (data) => {
             console.log('Received connected event:', data);
             this.playerInfo.id = data.client_id;
+            if (data.server_time) {
+                this.serverTimeOffset = data.server_time - Date.now() / 1000;
+            }
+        });
+
+        this.socket.on('matchmaking_queued', (data) => {
+            this.setMatchmaking(true);
+            this.showNotification(`Looking for an opponent (rating ${data.rating})...`, 'info');
+        });
+
+        this.socket.on('matchmaking_cancelled', () => {
+            this.setMatchmaking(false);
+            this.showNotification('Stopped looking for a match', 'info');
         });
 
         this.socket.on('room_created', (data) => {
             console.log('Room created:', data);
             this.hideLoadingOverlay();
+            this.setMatchmaking(false);
             this.playerInfo = {
                 id: this.socket.id,
                 name: data.player_name,
@@ -225,6 +297,9 @@ class TicTacToeGame {
                 roomId: data.room_id
             };
             this.gameState = data.game_state;
+            this.tournamentGame = Boolean(data.tournament_id);
+            this.stopSpectating();
+            this.saveResumeSession(data.room_id, data.resume_token);
             this.showWaitingScreen(data.room_id, data.game_state.grid_size);
             this.showNotification(`Room ${data.room_id} created!`, 'success');
         });
@@ -234,6 +309,7 @@ class TicTacToeGame {
             console.log('🆔 My Socket ID at join:', this.socket.id);
 
             this.hideLoadingOverlay();
+            this.setMatchmaking(false);
             this.playerInfo = {
                 id: this.socket.id,
                 name: data.player_name,
@@ -241,6 +317,9 @@ class TicTacToeGame {
                 roomId: data.room_id
             };
             this.gameState = data.game_state;
+            this.tournamentGame = Boolean(data.tournament_id);
+            this.stopSpectating();
+            this.saveResumeSession(data.room_id, data.resume_token);
 
             console.log('🎮 Updated player info:', this.playerInfo);
             console.log('🎮 Game state:', this.gameState);
@@ -253,6 +332,53 @@ class TicTacToeGame {
             }, 500);
         });
 
+        this.socket.on('session_resumed', (data) => {
+            console.log('🔁 Session resumed:', data);
+            this.playerInfo = {
+                id: this.socket.id,
+                name: data.player_name,
+                symbol: data.symbol,
+                roomId: data.room_id
+            };
+            this.gameState = data.game_state;
+            // Tournament rooms are named after their tournament
+            this.tournamentGame = Boolean(this.tournament && data.room_id.startsWith(`${this.tournament.id}-`));
+            this.saveResumeSession(data.room_id, data.resume_token);
+
+            if (Object.keys(this.gameState.players).length < 2) {
+                this.showWaitingScreen(data.room_id, this.gameState.grid_size);
+            } else {
+                this.showGameScreen();
+                this.renderGameBoard();
+            }
+            this.showNotification('Reconnected to your game!', 'success');
+        });
+
+        this.socket.on('spectating', (data) => {
+            console.log('👀 Spectating:', data);
+            this.hideLoadingOverlay();
+            this.spectating = true;
+            this.playerInfo = {
+                id: this.socket.id,
+                name: data.player_name,
+                symbol: '',
+                roomId: data.room_id
+            };
+            this.gameState = data.game_state;
+            this.showGameScreen();
+            this.renderGameBoard();
+            this.showNotification(`Watching room ${data.room_id} with ${data.spectators - 1} others`, 'info');
+        });
+
+        this.socket.on('resume_failed', (data) => {
+            console.log('Could not resume session:', data.message);
+            this.clearResumeSession();
+            this.gameState = null;
+            this.playerInfo.roomId = '';
+            this.showScreen('menuScreen');
+            this.showNotification(`Previous game unavailable: ${data.message}`, 'warning');
+        });
+
         this.socket.on('player_joined', (data) => {
             console.log('👥 Player joined:', data);
             this.showNotification(`${data.player_name} joined the game!`, 'info');
@@ -282,9 +408,14 @@ class TicTacToeGame {
         });
 
         this.socket.on('move_made', (data) => {
-            if (data.game_state) {
-                this.gameState = data.game_state;
+            if (!this.gameState) return;
+
+            // Moves arrive as deltas; a skipped version means we missed one
+            if (data.version !== this.gameState.version + 1) {
+                this.requestStateSync();
+                return;
             }
+            this.applyMoveDelta(data);
 
             if (data.symbol === 'X') {
                 this.audioManager.play('click_x');
@@ -300,6 +431,9 @@ class TicTacToeGame {
         // Chat listeners
         this.socket.on('chat_message', (data) => {
             console.log('Received chat message:', data);
+            if (data.spectator) {
+                data.player_name = `👀 ${data.player_name}`;
+            }
             this.addChatMessage(data);
 
             if (!this.chatOpen) {
@@ -331,9 +465,32 @@ class TicTacToeGame {
         });
 
         this.socket.on('game_over', (data) => {
+            if (this.gameState && data.reason === 'timeout') {
+                // No move_made comes first when a match is lost on time
+                this.gameState.game_over = true;
+                this.gameState.winner = data.winner;
+                this.gameState.winning_line = null;
+                this.gameState.version = data.version;
+                this.gameState.turn_deadline = null;
+                this.gameState.clocks = data.clocks;
+            }
+            if (this.gameState) {
+                this.gameState.session_scores = data.session_scores;
+                this.gameState.match_history = data.match_history;
+                this.gameState.session_leader = data.session_leader;
+            }
             this.handleGameOver(data);
         });
 
+        this.socket.on('state_sync', (gameState) => {
+            console.log('🔄 Resynced game state:', gameState);
+            this.gameState = gameState;
+            this.renderGameBoard();
+            this.updateTurnIndicator(this.gameState.current_turn);
+            this.updatePlayerInfo();
+            this.updateScoreboard();
+        });
+
         this.socket.on('game_restarted', (data) => {
             this.gameState = data.game_state;
 
@@ -360,12 +517,17 @@ class TicTacToeGame {
 
         this.socket.on('session_terminated', (data) => {
             this.showNotification(data.message, 'warning');
+            this.clearResumeSession();
 
             this.gameState = null;
             this.playerInfo.roomId = '';
 
             setTimeout(() => {
-                this.backToMenu();
+                if (this.tournament) {
+                    this.backToTournament();
+                } else {
+                    this.backToMenu();
+                }
             }, 2000);
         });
 
@@ -374,7 +536,44 @@ class TicTacToeGame {
         });
 
         this.socket.on('rooms_list', (data) => {
-            this.updateRoomsList(data.rooms);
+            this.lobbyRooms = data.rooms;
+            this.updateRoomsList(this.lobbyRooms);
+        });
+
+        this.socket.on('lobby_update', (data) => {
+            if (data.type === 'added') {
+                this.lobbyRooms.push(data.room);
+            } else {
+                this.lobbyRooms = this.lobbyRooms.filter(room => room.room_id !== data.room.room_id);
+            }
+            this.updateRoomsList(this.lobbyRooms);
+        });
+
+        this.socket.on('tournament_created', (data) => {
+            this.enterTournament(data);
+            this.showNotification(`Tournament ${data.tournament.tournament_id} created!`, 'success');
+        });
+
+        this.socket.on('tournament_joined', (data) => {
+            this.enterTournament(data);
+            this.showNotification(`Joined tournament ${data.tournament.tournament_id}!`, 'success');
+        });
+
+        this.socket.on('tournament_rejoined', (data) => {
+            this.enterTournament(data);
+        });
+
+        this.socket.on('tournament_state', (data) => {
+            this.setTournamentState(data);
+        });
+
+        this.socket.on('tournament_update', (data) => {
+            this.applyTournamentUpdate(data);
+        });
+
+        this.socket.on('left_tournament', () => {
+            this.clearTournament();
+            this.showNotification('You left the tournament', 'info');
         });
 
         this.socket.on('error', (data) => {
@@ -419,11 +618,17 @@ class TicTacToeGame {
 
         document.getElementById('browseRoomsBtn').addEventListener('click', () => {
             this.showScreen('browseRoomsScreen');
-            this.refreshRooms();
+        });
+
+        document.getElementById('tournamentsBtn').addEventListener('click', () => {
+            this.showScreen('tournamentScreen');
         });
 
         // Back buttons
         document.getElementById('backFromCreate').addEventListener('click', () => {
+            if (this.matchmaking) {
+                this.socket.emit('cancel_matchmaking');
+            }
             this.showScreen('menuScreen');
         });
 
@@ -435,6 +640,31 @@ class TicTacToeGame {
             this.showScreen('menuScreen');
         });
 
+        document.getElementById('backFromTournament').addEventListener('click', () => {
+            this.showScreen('menuScreen');
+        });
+
+        // Tournaments
+        document.getElementById('createTournamentBtn').addEventListener('click', () => {
+            this.createTournament();
+        });
+
+        document.getElementById('joinTournamentBtn').addEventListener('click', () => {
+            this.joinTournament();
+        });
+
+        document.getElementById('watchTournamentBtn').addEventListener('click', () => {
+            this.watchTournament();
+        });
+
+        document.getElementById('startTournamentBtn').addEventListener('click', () => {
+            this.socket.emit('start_tournament', { tournament_id: this.tournament.id });
+        });
+
+        document.getElementById('leaveTournamentBtn').addEventListener('click', () => {
+            this.leaveTournament();
+        });
+
         // Form submissions
         document.getElementById('createRoomForm').addEventListener('submit', (e) => {
             e.preventDefault();
@@ -446,6 +676,18 @@ class TicTacToeGame {
             this.joinRoom();
         });
 
+        document.getElementById('findMatchBtn').addEventListener('click', () => {
+            this.findMatch();
+        });
+
+        document.getElementById('playBotBtn').addEventListener('click', () => {
+            this.createRoom('bot');
+        });
+
+        document.getElementById('spectateRoomBtn').addEventListener('click', () => {
+            this.spectateRoom();
+        });
+
         // Grid size slider
         const gridSizeSlider = document.getElementById('gridSizeSlider');
         gridSizeSlider.addEventListener('input', (e) => {
@@ -1518,6 +1760,15 @@ class TicTacToeGame {
 
     // Screen Management
     showScreen(screenId) {
+        // Live lobby updates are only needed while browsing rooms
+        if (screenId !== this.currentScreen) {
+            if (screenId === 'browseRoomsScreen') {
+                this.socket.emit('subscribe_lobby');
+            } else if (this.currentScreen === 'browseRoomsScreen') {
+                this.socket.emit('unsubscribe_lobby');
+            }
+        }
+
         // Hide all screens
         document.querySelectorAll('.screen').forEach(screen => {
             screen.classList.remove('active');
@@ -1551,23 +1802,55 @@ class TicTacToeGame {
     }
 
     // Room Management
-    createRoom() {
+    createRoom(opponent = null) {
         const playerName = document.getElementById('playerName').value.trim();
         const gridSize = parseInt(document.getElementById('gridSizeSlider').value);
+        // "move:30" or "clock:180:2" from the time control picker
+        const [mode, seconds, increment] = document.getElementById('timeControl').value.split(':');
+        const timeControl = mode ? { mode, seconds: Number(seconds), increment: Number(increment || 0) } : null;
 
         if (!playerName) {
             this.showNotification('Please enter your name', 'error');
             return;
         }
 
-        console.log('Creating room with:', { playerName, gridSize });
+        console.log('Creating room with:', { playerName, gridSize, opponent, timeControl });
         this.showLoadingOverlay();
         this.socket.emit('create_room', {
+            player_name: playerName,
+            grid_size: gridSize,
+            opponent: opponent,
+            time_control: timeControl
+        });
+    }
+
+    findMatch() {
+        if (this.matchmaking) {
+            this.socket.emit('cancel_matchmaking');
+            return;
+        }
+
+        const playerName = document.getElementById('playerName').value.trim();
+        const gridSize = parseInt(document.getElementById('gridSizeSlider').value);
+
+        if (!playerName) {
+            this.showNotification('Please enter your name', 'error');
+            return;
+        }
+
+        this.socket.emit('find_match', {
             player_name: playerName,
             grid_size: gridSize
         });
     }
 
+    setMatchmaking(searching) {
+        this.matchmaking = searching;
+        document.getElementById('findMatchBtn').innerHTML = searching
+            ? '<i class="fas fa-times"></i> Cancel Search'
+            : '<i class="fas fa-search"></i> Find Match';
+    }
+
     joinRoom() {
         const playerName = document.getElementById('joinPlayerName').value.trim();
         const roomCode = document.getElementById('roomCode').value.trim().toUpperCase();
@@ -1584,6 +1867,22 @@ class TicTacToeGame {
         });
     }
 
+    spectateRoom() {
+        const playerName = document.getElementById('joinPlayerName').value.trim();
+        const roomCode = document.getElementById('roomCode').value.trim().toUpperCase();
+
+        if (!roomCode) {
+            this.showNotification('Please enter a room code', 'error');
+            return;
+        }
+
+        this.showLoadingOverlay();
+        this.socket.emit('spectate_room', {
+            player_name: playerName,
+            room_id: roomCode
+        });
+    }
+
     refreshRooms() {
         this.socket.emit('get_rooms');
     }
@@ -1779,12 +2078,12 @@ class TicTacToeGame {
         player2Avatar.classList.remove('active');
 
         if (currentTurn === this.playerInfo.symbol) {
-            turnIndicator.innerHTML = '<span class="turn-text">Your Turn</span>';
+            turnIndicator.innerHTML = '<span class="turn-text">Your Turn</span><span class="turn-clock" id="turnClock"></span>';
             player1Avatar.classList.add('active');
             document.getElementById('player1Info').querySelector('.player-status').textContent = 'Your Turn';
             document.getElementById('player2Info').querySelector('.player-status').textContent = 'Waiting';
         } else {
-            turnIndicator.innerHTML = '<span class="turn-text">Opponent\'s Turn</span>';
+            turnIndicator.innerHTML = '<span class="turn-text">Opponent\'s Turn</span><span class="turn-clock" id="turnClock"></span>';
             player2Avatar.classList.add('active');
             document.getElementById('player1Info').querySelector('.player-status').textContent = 'Waiting';
             document.getElementById('player2Info').querySelector('.player-status').textContent = 'Playing';
@@ -1802,6 +2101,72 @@ class TicTacToeGame {
         });
     }
 
+    applyMoveDelta(moveData) {
+        this.gameState.board[moveData.position] = moveData.symbol;
+        this.gameState.current_turn = moveData.current_turn;
+        this.gameState.version = moveData.version;
+        this.gameState.game_over = moveData.game_over;
+        this.gameState.winner = moveData.winner;
+        this.gameState.winning_line = moveData.winning_line;
+        this.gameState.is_draw = moveData.is_draw;
+        this.gameState.turn_deadline = moveData.turn_deadline;
+        this.gameState.clocks = moveData.clocks;
+    }
+
+    // Time left for the player to move in timed rooms; the server decides when it runs out
+    updateTurnClock() {
+        const clock = document.getElementById('turnClock');
+        if (!clock) return;
+        const deadline = this.gameState && !this.gameState.game_over && this.gameState.turn_deadline;
+        if (!deadline) {
+            clock.textContent = '';
+            return;
+        }
+        const remaining = Math.max(0, deadline - Date.now() / 1000 - this.serverTimeOffset);
+        const minutes = Math.floor(remaining / 60);
+        const seconds = Math.floor(remaining % 60).toString().padStart(2, '0');
+        clock.textContent = ` ⏱ ${minutes}:${seconds}`;
+        clock.classList.toggle('low', remaining < 10);
+    }
+
+    // Resume tokens live in sessionStorage, so they survive a reload of this tab only
+    saveResumeSession(roomId, token) {
+        if (token) {
+            sessionStorage.setItem('resumeSession', JSON.stringify({ roomId, token }));
+        }
+    }
+
+    loadResumeSession() {
+        try {
+            return JSON.parse(sessionStorage.getItem('resumeSession'));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    clearResumeSession() {
+        sessionStorage.removeItem('resumeSession');
+    }
+
+    requestStateSync() {
+        this.socket.emit('request_state', {
+            room_id: this.playerInfo.roomId,
+            version: this.gameState ? this.gameState.version : null
+        });
+    }
+
+    renderGameBoard() {
+        const cells = document.querySelectorAll('.game-cell');
+        const winningLine = this.gameState.winning_line || [];
+
+        cells.forEach((cell, position) => {
+            const symbol = this.gameState.board[position];
+            cell.textContent = symbol;
+            cell.classList.toggle('filled', symbol !== '');
+            cell.classList.toggle('winning', winningLine.includes(position));
+        });
+    }
+
     updateGameBoard(moveData) {
         const cells = document.querySelectorAll('.game-cell');
         const cell = cells[moveData.position];
@@ -1815,6 +2180,22 @@ class TicTacToeGame {
     }
 
     handleGameOver(data) {
+        if (this.spectating) {
+            // Spectators see the result, but there is nothing to restart
+            if (data.reason === 'timeout') {
+                this.addSystemMessage(`⏰ ${data.timed_out_symbol} ran out of time`);
+            }
+            this.addSystemMessage(data.is_draw ? "🤝 It's a draw!" : `🏆 ${data.winner_name} wins this round!`);
+            this.renderGameBoard();
+            this.updateScoreboard();
+            return;
+        }
+
+        if (data.reason === 'timeout') {
+            this.addSystemMessage(data.timed_out_symbol === this.playerInfo.symbol
+                ? '⏰ You ran out of time' : '⏰ Your opponent ran out of time');
+        }
+
         if (data.is_draw) {
             this.addSystemMessage("🤝 It's a draw! Well played both!");
         } else if (data.winner === this.playerInfo.symbol) {
@@ -1837,6 +2218,18 @@ class TicTacToeGame {
             this.updateScoreboard();
         }, 500);
 
+        if (this.tournamentGame) {
+            // Drawn knockout games are replayed in the same room by the server
+            if (data.is_draw && this.tournament && this.tournament.summary.format === 'single_elimination') {
+                this.addSystemMessage('🔁 Knockout games have a winner: replaying in a moment...');
+                return;
+            }
+            setTimeout(() => {
+                this.showGameOverModal(data);
+            }, 1000);
+            return;
+        }
+
         setTimeout(() => {
             this.showGameOverModal(data);
         }, 1000);
@@ -1872,6 +2265,9 @@ class TicTacToeGame {
             message = `${opponentName} won this round. Ready for revenge?`;
             icon = "fas fa-medal";
         }
+        if (this.tournamentGame) {
+            message = 'Your next pairing shows up in the bracket.';
+        }
 
         // Show session stats if multiple matches played
         let sessionStats = '';
@@ -1913,7 +2309,9 @@ class TicTacToeGame {
                 ${sessionStats}
                 <div class="modal-buttons">
                     <button id="playAgainBtn" class="btn primary">
-                        <i class="fas fa-redo"></i> Play Again
+                        ${this.tournamentGame
+                            ? '<i class="fas fa-sitemap"></i> Bracket'
+                            : '<i class="fas fa-redo"></i> Play Again'}
                     </button>
                     <button id="backToMenuBtn" class="btn secondary">
                         <i class="fas fa-home"></i> Main Menu
@@ -1923,7 +2321,11 @@ class TicTacToeGame {
         `;
 
         document.getElementById('playAgainBtn').addEventListener('click', () => {
-            this.restartGame();
+            if (this.tournamentGame) {
+                this.backToTournament();
+            } else {
+                this.restartGame();
+            }
         });
 
         document.getElementById('backToMenuBtn').addEventListener('click', () => {
@@ -1968,6 +2370,9 @@ class TicTacToeGame {
             });
         }
 
+        this.clearResumeSession();
+        this.spectating = false;
+        this.tournamentGame = false;
         this.gameState = null;
         this.playerInfo = {
             id: this.playerInfo.id,
@@ -1995,6 +2400,235 @@ class TicTacToeGame {
         this.showScreen('menuScreen');
     }
 
+    // A tournament match can start while we watch another one
+    stopSpectating() {
+        if (this.spectating) {
+            this.socket.emit('stop_spectating');
+            this.spectating = false;
+        }
+    }
+
+    backToTournament() {
+        this.backToMenu();
+        this.showScreen('tournamentScreen');
+        if (this.tournament) {
+            this.socket.emit('get_tournament', { tournament_id: this.tournament.id });
+        }
+    }
+
+    // Tournaments
+    createTournament() {
+        const playerName = document.getElementById('tournamentPlayerName').value.trim();
+        if (!playerName) {
+            this.showNotification('Please enter your name', 'error');
+            return;
+        }
+
+        this.socket.emit('create_tournament', {
+            player_name: playerName,
+            name: `${playerName}'s Cup`,
+            format: document.getElementById('tournamentFormat').value
+        });
+    }
+
+    joinTournament() {
+        const playerName = document.getElementById('tournamentPlayerName').value.trim();
+        const code = document.getElementById('tournamentCode').value.trim().toUpperCase();
+
+        if (!playerName || !code) {
+            this.showNotification('Please enter your name and the tournament code', 'error');
+            return;
+        }
+
+        this.socket.emit('join_tournament', {
+            player_name: playerName,
+            tournament_id: code
+        });
+    }
+
+    watchTournament() {
+        const code = document.getElementById('tournamentCode').value.trim().toUpperCase();
+        if (!code) {
+            this.showNotification('Please enter a tournament code', 'error');
+            return;
+        }
+        this.socket.emit('watch_tournament', { tournament_id: code });
+    }
+
+    leaveTournament() {
+        if (!this.tournament) {
+            return;
+        }
+        if (this.tournament.watching) {
+            this.socket.emit('unwatch_tournament', { tournament_id: this.tournament.id });
+            this.clearTournament();
+        } else {
+            this.socket.emit('leave_tournament');
+        }
+    }
+
+    enterTournament(data) {
+        const summary = data.tournament;
+        const name = data.name || document.getElementById('tournamentPlayerName').value.trim();
+        const token = data.token || (this.loadTournamentSession() || {}).token;
+        this.tournament = {
+            id: summary.tournament_id,
+            name,
+            watching: false,
+            summary,
+            matches: new Map(),
+            standings: []
+        };
+        this.saveTournamentSession(summary.tournament_id, token);
+        this.socket.emit('get_tournament', { tournament_id: summary.tournament_id });
+        this.renderTournament();
+    }
+
+    setTournamentState(data) {
+        // A full view of one round, from watch_tournament or get_tournament
+        if (!this.tournament || this.tournament.id !== data.tournament_id) {
+            this.tournament = { id: data.tournament_id, name: null, watching: true };
+        }
+        this.tournament.summary = data;
+        this.tournament.matches = new Map(data.matches.map(match => [match.match_id, match]));
+        this.tournament.standings = data.standings || [];
+        this.renderTournament();
+        if (this.currentScreen === 'menuScreen') {
+            this.showScreen('tournamentScreen');
+        }
+    }
+
+    applyTournamentUpdate(data) {
+        const tournament = this.tournament;
+        if (!tournament || tournament.id !== data.tournament_id) {
+            return;
+        }
+
+        // Updates only carry what changed; a new round is fetched whole
+        if (data.round !== tournament.summary.round) {
+            this.socket.emit('get_tournament', { tournament_id: tournament.id });
+        }
+        tournament.summary = data;
+        data.matches.forEach(match => {
+            if (match.round === data.round) {
+                tournament.matches.set(match.match_id, match);
+            }
+        });
+        if (data.standings) {
+            tournament.standings = data.standings;
+        }
+
+        if (data.status === 'finished') {
+            this.clearTournamentSession();
+            this.showNotification(data.champion
+                ? `🏆 ${data.champion} wins ${data.name}!`
+                : `${data.name} is over`, 'success');
+        }
+        this.renderTournament();
+    }
+
+    clearTournament() {
+        this.tournament = null;
+        this.clearTournamentSession();
+        document.getElementById('tournamentPanel').style.display = 'none';
+    }
+
+    renderTournament() {
+        const tournament = this.tournament;
+        if (!tournament || !tournament.summary) {
+            return;
+        }
+        const summary = tournament.summary;
+
+        document.getElementById('tournamentPanel').style.display = 'block';
+        document.getElementById('tournamentTitle').textContent = `${summary.name} · ${summary.tournament_id}`;
+
+        let status;
+        if (summary.status === 'registering') {
+            status = `${summary.players}/${summary.max_players} players signed up, waiting for ${summary.host} to start`;
+        } else if (summary.status === 'running') {
+            status = `Round ${summary.round} of ${summary.rounds}`;
+        } else {
+            status = summary.champion ? `Finished, won by ${summary.champion}` : 'Finished';
+        }
+        document.getElementById('tournamentStatus').textContent = status;
+
+        const canStart = summary.status === 'registering' && !tournament.watching && tournament.name === summary.host;
+        document.getElementById('startTournamentBtn').style.display = canStart ? 'flex' : 'none';
+        document.getElementById('leaveTournamentBtn').innerHTML = tournament.watching
+            ? '<i class="fas fa-eye-slash"></i> Stop Watching'
+            : '<i class="fas fa-sign-out-alt"></i> Leave';
+
+        document.getElementById('tournamentStandings').innerHTML = tournament.standings.map(player => `
+            <li class="${player.active ? '' : 'eliminated'}">
+                ${this.escapeHtml(player.name)}: ${player.points}
+            </li>
+        `).join('');
+
+        const matches = [...tournament.matches.values()].sort((a, b) => a.match_id - b.match_id);
+        const matchesList = document.getElementById('tournamentMatches');
+        if (matches.length === 0) {
+            matchesList.innerHTML = `
+                <div class="no-rooms">
+                    <i class="fas fa-sitemap"></i>
+                    <p>No matches yet</p>
+                </div>
+            `;
+            return;
+        }
+
+        matchesList.innerHTML = matches.map(match => {
+            const [first, second] = match.players.map(name => name === null ? 'bye' : this.escapeHtml(name));
+            const yours = tournament.name && match.players.includes(tournament.name);
+            let result = match.status;
+            if (match.status === 'done') {
+                result = match.is_draw ? 'draw' : match.winner ? `${this.escapeHtml(match.winner)} won` : 'no result';
+            }
+            return `
+                <div class="room-item match-item ${yours ? 'yours' : ''}" data-room-id="${match.status === 'playing' ? match.room_id : ''}">
+                    <div class="room-info">
+                        <h4>${first} vs ${second}</h4>
+                        <p>Round ${match.round}</p>
+                    </div>
+                    <div class="room-meta">${result}</div>
+                </div>
+            `;
+        }).join('');
+
+        // Games being played can be watched
+        matchesList.querySelectorAll('.match-item').forEach(item => {
+            if (!item.dataset.roomId) {
+                return;
+            }
+            item.style.cursor = 'pointer';
+            item.addEventListener('click', () => {
+                this.socket.emit('spectate_room', {
+                    player_name: document.getElementById('tournamentPlayerName').value.trim(),
+                    room_id: item.dataset.roomId
+                });
+            });
+        });
+    }
+
+    // Like resume tokens, the tournament token survives a reload of this tab only
+    saveTournamentSession(tournamentId, token) {
+        if (token) {
+            sessionStorage.setItem('tournamentSession', JSON.stringify({ tournamentId, token }));
+        }
+    }
+
+    loadTournamentSession() {
+        try {
+            return JSON.parse(sessionStorage.getItem('tournamentSession'));
+        } catch (e) {
+            return null;
+        }
+    }
+
+    clearTournamentSession() {
+        sessionStorage.removeItem('tournamentSession');
+    }
+
     escapeHtml(text) {
         const div = document.createElement('div');
         div.textContent = text;